@@ -1,6 +1,7 @@
 # app/config.py
 import os
 from pathlib import Path
+from typing import Literal
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 BASE_DIR = Path(__file__).resolve().parent.parent  # backend/
@@ -20,6 +21,23 @@ class Settings(BaseSettings):
     # ✅ 給預設值：本機不設 DATABASE_URL 也能跑起來（你要的 dev.db）
     database_url: str = "sqlite:///./dev.db"
 
+    # SQLite 正式環境模式（1=開）：WAL + pragma + 讀寫分開的連線池（見 db.py）
+    sqlite_production: int = 0
+    sqlite_read_pool_size: int = 8
+    sqlite_busy_timeout_ms: int = 30000
+    sqlite_cache_kib: int = 20000          # 每條連線的 page cache（約 20MB）
+    sqlite_mmap_bytes: int = 268435456     # 256MB
+
+    # 唯讀副本（Postgres replica / 另一個 SQLite 檔）；沒設就全部走主庫
+    read_database_url: str | None = None
+    # 後台改完資料後幾秒內讀取改走主庫（read-your-writes，避開副本延遲）
+    read_your_writes_seconds: float = 5.0
+
+    # async 讀取路由（商品 / 分類 / 訂單查詢）的連線池；driver 依 URL 換成 aiosqlite / psycopg async
+    # 等 DB 時不佔 thread，同時能處理的查詢數 = pool_size + max_overflow（sync 路由受限於 40 條 threadpool）
+    async_db_pool_size: int = 20
+    async_db_max_overflow: int = 80
+
     frontend_origin: str = ""
     seed_demo_data: int = 0
     admin_token_ttl_seconds: int = 3600
@@ -37,11 +55,56 @@ class Settings(BaseSettings):
     smtp_from_email: str | None = None
 
     resend_api_key: str | None = None
+    # 測試 / 本機可指向 stub server
+    resend_endpoint: str = "https://api.resend.com/emails"
+
+    # email outbox sender
+    # 1 = 跟 API 同行程跑 sender（async，不佔 request thread）；另外跑 python -m app.email_worker 時設 0
+    email_outbox_inline_worker: int = 1
+    email_outbox_concurrency: int = 4
+    email_outbox_batch_size: int = 50
+    email_outbox_max_attempts: int = 6
+    email_outbox_poll_seconds: float = 2.0
 
     admin_token: str | None = None
     admin_password: str | None = None
     upload_dir: str | None = None
 
+    # /metrics：有設就要帶 Authorization: Bearer <token>
+    metrics_token: str | None = None
+
+    # POST /orders 的 Idempotency-Key：結果保留多久、同一把 key 處理中時最多等多久
+    idempotency_ttl_seconds: int = 86400
+    idempotency_wait_seconds: float = 10.0
+    # 結帳保留庫存：開始結帳後保留幾秒
+    stock_reservation_ttl_seconds: int = 600
+    # 背景清理（過期 idempotency key / 保留量）多久跑一次
+    housekeeping_interval_seconds: float = 60.0
+    # 庫存異動帳保留天數（0 = 永久保留；已進快照又超過天數的才刪）
+    stock_movement_retention_days: int = 0
+
+    # 金流 webhook：HMAC 簽章密鑰（沒設 = webhook 關閉）、簽章時間戳容許誤差
+    payment_provider: str = "gateway"
+    payment_webhook_secret: str | None = None
+    payment_webhook_tolerance_seconds: int = 300
+    # 背景套用付款事件：沒新事件時多久掃一次、一批幾筆（0 = 不在 API 行程跑）
+    payment_processor_interval_seconds: float = 1.0
+    payment_processor_batch_size: int = 200
+
+    # 銷售彙總（/admin/analytics）用哪個時區切「一天」
+    analytics_timezone: str = "Asia/Taipei"
+
+    # 運費規則：max = 各品項運費取最高（一箱寄出）；sum = 各品項運費相加
+    # ✅ Literal：SHIPPING_FEE_RULE 打錯字啟動時就報錯，不會默默用錯規則算運費
+    shipping_fee_rule: Literal["max", "sum"] = "max"
+
+    # 列表 API（/products、/admin/products、/admin/orders）的快速序列化（1=開啟，見 services/fast_json.py）
+    fast_json_lists: int = 0
+
+    # 商品 / 分類列表快取（1=開啟）；TTL 讓多 worker 之間最晚幾秒內一致
+    enable_catalog_cache: int = 1
+    catalog_cache_ttl_seconds: int = 30
+
     # ✅ pydantic-settings v2 推薦用 model_config
     model_config = SettingsConfigDict(
         env_file=get_env_file(),
@@ -50,3 +113,6 @@ class Settings(BaseSettings):
     )
 
 settings = Settings()
+
+# ✅ 上傳檔案資料夾（靜態檔掛載 / 上傳 API 共用這一個；import 時不建立，啟動時才 mkdir）
+UPLOAD_DIR = Path(settings.upload_dir) if settings.upload_dir else BASE_DIR / "uploads"
@@ -1,17 +1,24 @@
 # app/db.py
 from __future__ import annotations
 
+import hashlib
+import hmac
+import math
+import time
 from pathlib import Path
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker, DeclarativeBase
+from typing import AsyncIterator, Callable, Iterator
+
+from fastapi import Request, Response
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import Session, sessionmaker, DeclarativeBase
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 from .config import settings
 
 db_url: str = settings.database_url or ""
 is_sqlite = db_url.startswith("sqlite")
 
-# SQLite：給 FastAPI 用的常見設定
-connect_args = {"check_same_thread": False, "timeout": 30} if is_sqlite else {}
-
 def _ensure_sqlite_dir(url: str) -> None:
     """確保 sqlite 檔案所在資料夾存在，避免 unable to open database file"""
     prefix = "sqlite:///"
@@ -26,23 +33,147 @@ def _ensure_sqlite_dir(url: str) -> None:
     db_dir = db_path.parent if str(db_path.parent) else Path(".")
     db_dir.mkdir(parents=True, exist_ok=True)
 
+read_db_url: str = settings.read_database_url or ""
+
 if is_sqlite:
     _ensure_sqlite_dir(db_url)
+if read_db_url.startswith("sqlite"):
+    _ensure_sqlite_dir(read_db_url)
+
+
+# ===== SQLite 正式環境模式（SQLITE_PRODUCTION=1） =====
+# - WAL：讀者不會被寫入擋住（寫入只擋寫入）
+# - 每條連線都套 pragma（synchronous / cache / mmap / busy_timeout）
+# - 寫入：只有 1 條連線 + BEGIN IMMEDIATE → 多個下單在 Python 端排隊，不會在 SQLite 裡互搶鎖
+# - 讀取：另一個連線池，連線設 query_only，GET 路由用 get_read_db
+
+def _sqlite_pragmas(read_only: bool):
+    def on_connect(dbapi_conn, _record):
+        # 交給 SQLAlchemy 的 "begin" event 決定 BEGIN 方式（pysqlite 預設的隱式 BEGIN 關掉）
+        dbapi_conn.isolation_level = None
+        cur = dbapi_conn.cursor()
+        cur.execute("PRAGMA journal_mode=WAL")
+        cur.execute("PRAGMA synchronous=NORMAL")  # WAL 下 NORMAL 仍不會壞檔，只是斷電可能少最後幾筆
+        cur.execute(f"PRAGMA busy_timeout={int(settings.sqlite_busy_timeout_ms)}")
+        cur.execute(f"PRAGMA cache_size=-{int(settings.sqlite_cache_kib)}")
+        cur.execute(f"PRAGMA mmap_size={int(settings.sqlite_mmap_bytes)}")
+        cur.execute("PRAGMA temp_store=MEMORY")
+        if read_only:
+            cur.execute("PRAGMA query_only=ON")
+        cur.close()
+
+    return on_connect
+
+
+def _begin(immediate: bool):
+    stmt = "BEGIN IMMEDIATE" if immediate else "BEGIN"
+
+    def on_begin(conn):
+        conn.exec_driver_sql(stmt)
+
+    return on_begin
+
+
+def build_engines(url: str, sqlite_production: bool | None = None) -> tuple[Engine, Engine]:
+    """
+    回傳 (寫入 engine, 讀取 engine)。
+    非 SQLite 正式模式時兩個是同一個 engine（行為跟以前一樣）。
+    """
+    sqlite = url.startswith("sqlite")
+    if sqlite_production is None:
+        sqlite_production = int(getattr(settings, "sqlite_production", 0) or 0) == 1
 
-engine_kwargs = {
-    "connect_args": connect_args,
-}
+    # SQLite：給 FastAPI 用的常見設定
+    kwargs: dict = {"connect_args": {"check_same_thread": False, "timeout": 30} if sqlite else {}}
 
-# Postgres / MySQL 之類：才需要 pool 設定
-if not is_sqlite:
-    engine_kwargs.update(
-        pool_pre_ping=True,
-        pool_recycle=300,
+    # Postgres / MySQL 之類：才需要 pool 設定
+    if not sqlite:
+        kwargs.update(
+            pool_pre_ping=True,
+            pool_recycle=300,
+        )
+
+    if not (sqlite and sqlite_production):
+        e = create_engine(url, **kwargs)
+        return e, e
+
+    writer = create_engine(url, pool_size=1, max_overflow=0, pool_timeout=30, **kwargs)
+    event.listen(writer, "connect", _sqlite_pragmas(read_only=False))
+    event.listen(writer, "begin", _begin(immediate=True))
+
+    reader = create_engine(
+        url,
+        pool_size=max(int(settings.sqlite_read_pool_size), 1),
+        max_overflow=0,
+        pool_timeout=30,
+        **kwargs,
     )
+    event.listen(reader, "connect", _sqlite_pragmas(read_only=True))
+    event.listen(reader, "begin", _begin(immediate=False))
+    return writer, reader
 
-engine = create_engine(db_url, **engine_kwargs)
+
+engine, read_engine = build_engines(db_url)
+# ✅ 有設 READ_DATABASE_URL：讀取改走副本（副本本身不需要寫入連線）
+if read_db_url:
+    _, read_engine = build_engines(read_db_url)
 
 SessionLocal = sessionmaker(bind=engine, autocommit=False, autoflush=False)
+ReadSessionLocal = sessionmaker(bind=read_engine, autocommit=False, autoflush=False)
+
+
+# ===== async（商品 / 分類 / 訂單查詢等讀取路由） =====
+# sync 路由查 DB 時整段佔著一個 threadpool 位置（Starlette 預設 40 條），併發一多就在那裡排隊；
+# async 路由等 DB 時把 event loop 讓出來，上限變成連線池大小（ASYNC_DB_POOL_SIZE + ASYNC_DB_MAX_OVERFLOW）。
+# 查詢邏輯不另寫一份：路由裡用 AsyncSession.run_sync() 跑原本的 sync 查詢函式。
+
+def async_url(url: str) -> str:
+    """同一個 DB 的 async driver：sqlite → aiosqlite、postgresql（psycopg2 / psycopg）→ psycopg async"""
+    u = make_url(url)
+    backend = u.get_backend_name()
+    if backend == "sqlite":
+        u = u.set(drivername="sqlite+aiosqlite")
+    elif backend == "postgresql" and u.get_driver_name() in ("psycopg2", "psycopg"):
+        u = u.set(drivername="postgresql+psycopg")
+    return u.render_as_string(hide_password=False)
+
+
+def build_async_engines(url: str, sqlite_production: bool | None = None) -> tuple[AsyncEngine, AsyncEngine]:
+    """回傳 (主庫 engine, 讀取 engine)；規則跟 build_engines 一樣（SQLite 正式模式才分兩個）"""
+    sqlite = url.startswith("sqlite")
+    if sqlite_production is None:
+        sqlite_production = int(getattr(settings, "sqlite_production", 0) or 0) == 1
+
+    kwargs: dict = {
+        "pool_size": max(int(settings.async_db_pool_size), 1),
+        "max_overflow": max(int(settings.async_db_max_overflow), 0),
+        "pool_timeout": 30,
+    }
+    if sqlite:
+        # aiosqlite 預設 NullPool（每次開新連線 + 新 thread）：改成連線池，連線 / pragma 重複使用
+        kwargs.update(poolclass=AsyncAdaptedQueuePool, connect_args={"timeout": 30})
+    else:
+        kwargs.update(pool_pre_ping=True, pool_recycle=300)
+
+    primary = create_async_engine(async_url(url), **kwargs)
+    if not (sqlite and sqlite_production):
+        return primary, primary
+
+    # ⚠️ async 這邊只拿來讀：主庫那個也不用 BEGIN IMMEDIATE（寫入仍只走 sync 的單一寫入連線）
+    event.listen(primary.sync_engine, "connect", _sqlite_pragmas(read_only=False))
+    event.listen(primary.sync_engine, "begin", _begin(immediate=False))
+    reader = create_async_engine(async_url(url), **kwargs)
+    event.listen(reader.sync_engine, "connect", _sqlite_pragmas(read_only=True))
+    event.listen(reader.sync_engine, "begin", _begin(immediate=False))
+    return primary, reader
+
+
+async_engine, async_read_engine = build_async_engines(db_url)
+if read_db_url:
+    _, async_read_engine = build_async_engines(read_db_url)
+
+AsyncSessionLocal = async_sessionmaker(bind=async_engine, autoflush=False, expire_on_commit=False)
+AsyncReadSessionLocal = async_sessionmaker(bind=async_read_engine, autoflush=False, expire_on_commit=False)
 
 class Base(DeclarativeBase):
     pass
@@ -53,3 +184,95 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+async def get_async_db() -> AsyncIterator[AsyncSession]:
+    """async 路由用的主庫 session（剛寫入就要讀到的查詢，例如買家查自己的訂單）"""
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+# ===== read-your-writes =====
+# 後台改完資料後，副本可能還沒追上；這段時間內「這個管理員」的讀取改走主庫，
+# 不然存檔後重新整理會看到舊資料。
+# ✅ pin 跟著 client 走，不記在行程裡：寫入的回應帶一個簽過名的 X-Read-Primary（到期時間），
+#    前端之後的 request 原樣帶回來。多 worker 時打到哪個 worker 都認得；
+#    其他買家的讀取照樣走副本，後台改商品時不會整個行程都壓到主庫。
+# ⚠️ 簽章用 ADMIN_TOKEN（沒設就不發 pin）：外人偽造不出來，不能拿來把讀取都導到主庫
+READ_PIN_HEADER = "X-Read-Primary"
+
+
+def _pin_signature(until: int) -> str:
+    secret = (settings.admin_token or "").encode()
+    return hmac.new(secret, f"read-pin:{until}".encode(), hashlib.sha256).hexdigest()[:32]
+
+
+def stick_to_primary(response: Response, seconds: float | None = None) -> None:
+    """後台寫入 commit 後呼叫：在回應帶上 pin，這個 client 接下來幾秒的讀取都走主庫"""
+    window = settings.read_your_writes_seconds if seconds is None else seconds
+    if window <= 0 or not settings.admin_token:
+        return
+    until = math.ceil(time.time() + window)
+    response.headers[READ_PIN_HEADER] = f"{until}.{_pin_signature(until)}"
+
+
+def reads_pinned_to_primary(request: Request) -> bool:
+    value = request.headers.get(READ_PIN_HEADER)
+    if not value or not settings.admin_token:
+        return False
+    until, _, sig = value.partition(".")
+    if not until.isdigit() or int(until) < time.time():
+        return False
+    return hmac.compare_digest(sig, _pin_signature(int(until)))
+
+
+def _use_primary(request: Request, lagging: bool) -> bool:
+    pinned = lagging and reads_pinned_to_primary(request)
+    # 給快取看：帶 pin 的讀取不吃快取裡可能是副本舊資料建的內容（見 catalog_cache）
+    request.state.read_primary = pinned
+    return pinned
+
+
+def read_session_dependency(
+    primary: Callable[[], Session],
+    replica: Callable[[], Session],
+    *,
+    lagging: bool,
+) -> Callable[[], Iterator[Session]]:
+    """
+    建立讀取用的 dependency。
+    lagging=True 表示 replica 是非同步複製的副本 → 寫入後的視窗內改用 primary。
+    （SQLite 正式模式的讀取池是同一個檔案，沒有延遲，不需要切換）
+    """
+    def dependency(request: Request):
+        factory = primary if _use_primary(request, lagging) else replica
+        db = factory()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    dependency.__doc__ = "唯讀查詢用（GET 路由）；有副本就走副本，後台剛改過資料則走主庫"
+    return dependency
+
+
+def async_read_session_dependency(
+    primary: Callable[[], AsyncSession],
+    replica: Callable[[], AsyncSession],
+    *,
+    lagging: bool,
+) -> Callable[[], AsyncIterator[AsyncSession]]:
+    """read_session_dependency 的 async 版（async 讀取路由用，切換規則相同）"""
+    async def dependency(request: Request):
+        factory = primary if _use_primary(request, lagging) else replica
+        async with factory() as db:
+            yield db
+
+    dependency.__doc__ = "唯讀查詢用（async GET 路由）；有副本就走副本，後台剛改過資料則走主庫"
+    return dependency
+
+
+get_read_db = read_session_dependency(SessionLocal, ReadSessionLocal, lagging=bool(read_db_url))
+get_async_read_db = async_read_session_dependency(
+    AsyncSessionLocal, AsyncReadSessionLocal, lagging=bool(read_db_url)
+)
@@ -0,0 +1,36 @@
+# backend/app/email_worker.py
+import asyncio
+import logging
+import signal
+
+from .services.notification_service import OutboxSender
+
+
+async def _run() -> None:
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(sig, stop.set)
+        except NotImplementedError:  # Windows
+            pass
+
+    sender = OutboxSender()
+    try:
+        await sender.run_forever(stop)
+    finally:
+        await sender.aclose()
+
+
+def main() -> None:
+    """
+    獨立跑 email outbox sender（不跟 API 搶 worker）：
+      python -m app.email_worker
+    這樣跑時，API 那邊記得設 EMAIL_OUTBOX_INLINE_WORKER=0
+    """
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(_run())
+
+
+if __name__ == "__main__":
+    main()
@@ -1,12 +1,18 @@
-from pathlib import Path
+# ✅ 啟動時間從這裡開始算（import 本身也算進去）
+import time
 
-from fastapi import FastAPI
-from fastapi.middleware.cors import CORSMiddleware
-from fastapi.staticfiles import StaticFiles
+_IMPORT_STARTED = time.perf_counter()
 
-from .config import settings
-from .db import Base, engine, SessionLocal
-from .routers import (
+import asyncio  # noqa: E402
+from contextlib import asynccontextmanager  # noqa: E402
+from pathlib import Path  # noqa: E402
+
+from fastapi import FastAPI  # noqa: E402
+from fastapi.middleware.cors import CORSMiddleware  # noqa: E402
+
+from .config import UPLOAD_DIR, settings  # noqa: E402
+from .db import async_engine, async_read_engine, engine, read_engine, SessionLocal  # noqa: E402
+from .routers import (  # noqa: E402
     products,
     orders,
     admin,
@@ -15,12 +21,51 @@ from .routers import (
     admin_categories,
     admin_auth,
     admin_uploads,
+    cart,
+    payments_webhook,
+    metrics,
 )
-from .seed import seed_products
-from .models.order_item import OrderItem  # noqa: F401
-
-
-app = FastAPI()
+from .seed import seed_products  # noqa: E402
+from .static_uploads import UploadsStaticFiles  # noqa: E402
+from .services.catalog_cache import PRODUCTS, invalidate  # noqa: E402
+from .services.notification_service import OutboxSender  # noqa: E402
+from .services import housekeeping, payment_service  # noqa: E402
+from .services.metrics import MetricsMiddleware, install_db_listeners, startup  # noqa: E402
+
+
+@asynccontextmanager
+async def lifespan(_app: FastAPI):
+    # ⚠️ schema 不在這裡建：部署前跑 python -m app.migrate（N 個 worker 不會跑 N 次 DDL）
+    UPLOAD_DIR.mkdir(parents=True, exist_ok=True)
+
+    # ✅ email outbox sender：預設跟 API 同行程跑（async loop，不佔 request thread）
+    #    另外跑 python -m app.email_worker 時，設 EMAIL_OUTBOX_INLINE_WORKER=0 關掉這裡
+    stop = asyncio.Event()
+    task = None
+    sender = None
+    if settings.email_outbox_inline_worker == 1 and settings.enable_email_notify == 1:
+        sender = OutboxSender()
+        task = asyncio.create_task(sender.run_forever(stop))
+    # ✅ 定期清理（過期 Idempotency-Key 等）；HOUSEKEEPING_INTERVAL_SECONDS=0 關掉
+    cleaner = None
+    if settings.housekeeping_interval_seconds > 0:
+        cleaner = asyncio.create_task(housekeeping.run_forever(stop))
+    # ✅ 金流事件：webhook 只負責存，這裡分批套用到訂單；PAYMENT_PROCESSOR_INTERVAL_SECONDS=0 關掉
+    payments = None
+    if settings.payment_processor_interval_seconds > 0:
+        payments = asyncio.create_task(payment_service.run_forever(stop))
+    startup.ready(time.perf_counter() - _IMPORT_STARTED)
+    try:
+        yield
+    finally:
+        stop.set()
+        if payments is not None:
+            await payments
+        if cleaner is not None:
+            await cleaner
+        if task is not None:
+            await task
+            await sender.aclose()
 
 
 def parse_origins(value: str | None) -> list[str]:
@@ -35,87 +80,102 @@ def parse_origins(value: str | None) -> list[str]:
     return [p for p in parts if p]
 
 
-# ✅ dev / local origins（shop/admin）
-origins: list[str] = [
-    "http://localhost:5173",  # shop dev
-    "http://localhost:5174",  # admin dev（如果你有跑 dev:admin）
-    "http://localhost:4173",  # shop preview
-    "http://localhost:4174",  # admin preview
-    "http://127.0.0.1:5173",
-    "http://127.0.0.1:5174",
-    "http://127.0.0.1:4173",
-    "http://127.0.0.1:4174",
-]
-
-# ✅ production origins（Railway / 自訂網域）
-# settings.frontend_origin 建議設成：
-# "https://julie-shop.up.railway.app,https://julie-shop-admin.up.railway.app"
-origins += parse_origins(getattr(settings, "frontend_origin", None))
-
-# 去重（保持順序）
-seen: set[str] = set()
-origins = [o for o in origins if not (o in seen or seen.add(o))]
-
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=origins,
-    allow_credentials=False,  # 你說走 token header，不用 cookies
-    allow_methods=["*"],
-    allow_headers=["*"],      # 含 Content-Type / Authorization / X-Admin-Token 等
-)
+def build_origins() -> list[str]:
+    # ✅ dev / local origins（shop/admin）
+    origins: list[str] = [
+        "http://localhost:5173",  # shop dev
+        "http://localhost:5174",  # admin dev（如果你有跑 dev:admin）
+        "http://localhost:4173",  # shop preview
+        "http://localhost:4174",  # admin preview
+        "http://127.0.0.1:5173",
+        "http://127.0.0.1:5174",
+        "http://127.0.0.1:4173",
+        "http://127.0.0.1:4174",
+    ]
 
-# ✅ 靜態檔：uploads（圖片會放這裡）
-UPLOAD_DIR = Path(settings.upload_dir) if getattr(settings, "upload_dir", None) else (
-    Path(__file__).resolve().parent.parent / "uploads"
-)
-UPLOAD_DIR.mkdir(parents=True, exist_ok=True)
-app.mount("/uploads", StaticFiles(directory=str(UPLOAD_DIR)), name="uploads")
-
-# ✅ DB / seed
-Base.metadata.create_all(bind=engine)
-
-# ✅ 只允許在 dev + 明確開 seed 時才跑
-if settings.env == "dev" and settings.seed_demo_data == 1:
-    with SessionLocal() as db:
-        seed_products(db)
-
-# ✅ routers
-app.include_router(categories.router)
-app.include_router(admin_categories.router)
-app.include_router(admin_products.router)
-app.include_router(products.router)
-app.include_router(orders.router)
-app.include_router(admin.router)
-app.include_router(admin_auth.router)
-app.include_router(admin_uploads.router)
-
-
-@app.get("/health", tags=["health"])
-def health():
-    return {"ok": True}
-
-
-@app.post("/dev/seed", tags=["dev"])
-def dev_seed():
-    with SessionLocal() as db:
-        seed_products(db)
-    return {"ok": True}
-
-
-@app.get("/debug/admin-auth")
-def debug_admin_auth():
-    # ⚠️ 建議 prod 關掉或加 admin token；避免洩漏環境狀態
-    p = getattr(settings, "admin_password", None) or ""
-    t = getattr(settings, "admin_token", None) or ""
-    return {
-        "env": getattr(settings, "env", None),
-        "admin_password_set": bool(p),
-        "admin_password_len": len(p),
-        "admin_token_set": bool(t),
-        "admin_token_len": len(t),
-        "frontend_origin": getattr(settings, "frontend_origin", None),
-        "cors_allow_origins": origins,
-        "database_url": settings.database_url,
-        "env_file": str(
-            (Path(__file__).resolve().parent.parent) / (".env.prod" if settings.env == "prod" else ".env.dev")),
-    }
+    # ✅ production origins（Railway / 自訂網域）
+    # settings.frontend_origin 建議設成：
+    # "https://julie-shop.up.railway.app,https://julie-shop-admin.up.railway.app"
+    origins += parse_origins(getattr(settings, "frontend_origin", None))
+
+    # 去重（保持順序）
+    seen: set[str] = set()
+    return [o for o in origins if not (o in seen or seen.add(o))]
+
+
+def create_app() -> FastAPI:
+    """
+    app factory：只組裝 app，不碰 DB、不建資料夾。
+    uvicorn app.main:app 或 uvicorn --factory app.main:create_app 都可以。
+    """
+    app = FastAPI(lifespan=lifespan)
+    origins = build_origins()
+
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=origins,
+        allow_credentials=False,  # 你說走 token header，不用 cookies
+        allow_methods=["*"],
+        allow_headers=["*"],      # 含 Content-Type / Authorization / X-Admin-Token 等
+        # 讓前端 JS 讀得到（無限捲動用；X-Read-Primary = 後台寫入後的 read-your-writes pin，見 db.py）
+        expose_headers=["ETag", "X-Next-Cursor", "X-Total-Count", "X-Read-Primary"],
+    )
+
+    # ✅ 每個 route 的延遲 / 狀態碼 / DB query 數（GET /metrics、Server-Timing header）
+    app.add_middleware(MetricsMiddleware)
+    install_db_listeners(engine)
+    install_db_listeners(read_engine)
+    install_db_listeners(async_engine.sync_engine)
+    install_db_listeners(async_read_engine.sync_engine)
+
+    # ✅ 靜態檔：uploads（圖片會放這裡；資料夾在 lifespan 建立）
+    # 檔名唯一、不覆寫 → 長效 immutable 快取（見 static_uploads.py）
+    app.mount("/uploads", UploadsStaticFiles(directory=str(UPLOAD_DIR), check_dir=False), name="uploads")
+
+    # ✅ routers
+    app.include_router(categories.router)
+    app.include_router(admin_categories.router)
+    app.include_router(admin_products.router)
+    app.include_router(products.router)
+    app.include_router(orders.router)
+    app.include_router(cart.router)
+    app.include_router(payments_webhook.router)
+    app.include_router(admin.router)
+    app.include_router(admin_auth.router)
+    app.include_router(admin_uploads.router)
+    app.include_router(metrics.router)
+
+    @app.get("/health", tags=["health"])
+    def health():
+        return {"ok": True}
+
+    @app.post("/dev/seed", tags=["dev"])
+    def dev_seed():
+        with SessionLocal() as db:
+            seed_products(db)
+        invalidate(PRODUCTS)
+        return {"ok": True}
+
+    @app.get("/debug/admin-auth")
+    def debug_admin_auth():
+        # ⚠️ 建議 prod 關掉或加 admin token；避免洩漏環境狀態
+        p = getattr(settings, "admin_password", None) or ""
+        t = getattr(settings, "admin_token", None) or ""
+        return {
+            "env": getattr(settings, "env", None),
+            "admin_password_set": bool(p),
+            "admin_password_len": len(p),
+            "admin_token_set": bool(t),
+            "admin_token_len": len(t),
+            "frontend_origin": getattr(settings, "frontend_origin", None),
+            "cors_allow_origins": origins,
+            "database_url": settings.database_url,
+            "env_file": str(
+                (Path(__file__).resolve().parent.parent) / (".env.prod" if settings.env == "prod" else ".env.dev")),
+        }
+
+    return app
+
+
+app = create_app()
+startup.imported(time.perf_counter() - _IMPORT_STARTED)
@@ -0,0 +1,73 @@
+# backend/app/migrate.py
+"""
+資料庫 schema 升級（取代以前 import app.main 時的 create_all）：
+  python -m app.migrate            # upgrade head（+ dev 且 SEED_DEMO_DATA=1 時 seed）
+  python -m app.migrate --no-seed
+
+部署時在啟動 uvicorn 之前跑一次（見 Dockerfile），開幾個 worker 都只會有一次 DDL。
+Postgres 上會先拿 advisory lock：多個容器同時啟動也只有一個真的在 migrate，其他等它做完。
+"""
+from __future__ import annotations
+
+import argparse
+import time
+from pathlib import Path
+
+from alembic import command
+from alembic.config import Config
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+
+from .config import BASE_DIR, settings
+from .db import engine, SessionLocal
+
+# 隨便一個固定數字，只要整個 app 不重複就好
+MIGRATE_LOCK_ID = 7_312_001
+
+
+def alembic_config(connection: Connection | None = None) -> Config:
+    cfg = Config(str(BASE_DIR / "alembic.ini"))
+    cfg.set_main_option("script_location", str(Path(BASE_DIR) / "migrations"))
+    cfg.attributes["configure_logger"] = False
+    if connection is not None:
+        cfg.attributes["connection"] = connection
+    return cfg
+
+
+def upgrade(target: str = "head", bind=None) -> None:
+    bind = bind if bind is not None else engine
+    with bind.connect() as conn:
+        locked = conn.dialect.name == "postgresql"
+        if locked:
+            conn.execute(text("SELECT pg_advisory_lock(:id)"), {"id": MIGRATE_LOCK_ID})
+            conn.commit()
+        try:
+            command.upgrade(alembic_config(conn), target)
+            conn.commit()
+        finally:
+            if locked:
+                conn.execute(text("SELECT pg_advisory_unlock(:id)"), {"id": MIGRATE_LOCK_ID})
+                conn.commit()
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Upgrade the database schema")
+    parser.add_argument("--revision", default="head")
+    parser.add_argument("--no-seed", action="store_true")
+    args = parser.parse_args(argv)
+
+    t0 = time.perf_counter()
+    upgrade(args.revision)
+    print(f"[migrate] {args.revision} done in {time.perf_counter() - t0:.2f}s")
+
+    # ✅ 只允許在 dev + 明確開 seed 時才跑（以前在 main.py import 時做）
+    if not args.no_seed and settings.env == "dev" and settings.seed_demo_data == 1:
+        from .seed import seed_products
+
+        with SessionLocal() as db:
+            seed_products(db)
+        print("[migrate] demo data seeded")
+
+
+if __name__ == "__main__":
+    main()
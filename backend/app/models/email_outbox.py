@@ -0,0 +1,34 @@
+from datetime import datetime
+
+from sqlalchemy import DateTime, Index, Integer, String, Text, func
+from sqlalchemy.orm import Mapped, mapped_column
+
+from ..db import Base
+
+
+class EmailOutbox(Base):
+    """
+    待寄信件（outbox）。
+    和訂單寫在同一個 transaction：訂單成立 = 信一定排進來；重啟也不會掉信。
+    status: pending → sending → sent；重試用完或對方明確拒收 → dead（留著人工查）
+    """
+    __tablename__ = "email_outbox"
+    __table_args__ = (
+        # ✅ sender 撈「該寄了」的信：WHERE status IN (...) AND next_attempt_at <= now
+        Index("ix_email_outbox_status_next_attempt", "status", "next_attempt_at"),
+    )
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    to_email: Mapped[str] = mapped_column(String(200), nullable=False)
+    subject: Mapped[str] = mapped_column(String(300), nullable=False)
+    body: Mapped[str] = mapped_column(Text, nullable=False, default="")
+
+    status: Mapped[str] = mapped_column(String(20), nullable=False, default="pending")
+    attempts: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    # sending 狀態時當「租約到期時間」用：sender 當掉，過了這個時間別的 sender 可以接手
+    next_attempt_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+    last_error: Mapped[str | None] = mapped_column(String(1000), nullable=True)
+    provider_id: Mapped[str | None] = mapped_column(String(100), nullable=True)
+
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
+    sent_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
@@ -0,0 +1,33 @@
+from datetime import datetime
+
+from sqlalchemy import DateTime, Index, Integer, String, Text, func
+from sqlalchemy.orm import Mapped, mapped_column
+
+from ..db import Base
+
+
+class IdempotencyKey(Base):
+    """
+    Idempotency-Key 的結果（目前只有 POST /orders 用）。
+    第一個請求先插一列 in_progress 佔位，跟訂單同一個 transaction 改成 done + 存回應；
+    之後同一把 key 的請求直接拿這份回應，不會再建一次單。
+    """
+    __tablename__ = "idempotency_keys"
+    __table_args__ = (
+        # ✅ 清理過期 key：WHERE expires_at < now
+        Index("ix_idempotency_keys_expires_at", "expires_at"),
+    )
+
+    scope: Mapped[str] = mapped_column(String(50), primary_key=True)
+    key: Mapped[str] = mapped_column(String(200), primary_key=True)
+    # 請求內容的 sha256：同一把 key 拿來送不同內容 → 拒絕
+    request_hash: Mapped[str] = mapped_column(String(64), nullable=False)
+
+    status: Mapped[str] = mapped_column(String(20), nullable=False, default="in_progress")
+    response_code: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    response_body: Mapped[str | None] = mapped_column(Text, nullable=True)
+
+    # in_progress 的租約：處理的 worker 當掉，過了這個時間別人可以接手
+    locked_until: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
+    expires_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
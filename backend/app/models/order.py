@@ -1,18 +1,25 @@
 from sqlalchemy.orm import Mapped, mapped_column
-from sqlalchemy import Integer, String, DateTime, func, text
+from sqlalchemy import Integer, String, DateTime, Index, func, text
 from ..db import Base
 from datetime import datetime
 
 
 class Order(Base):
     __tablename__ = "orders"
+    __table_args__ = (
+        # ✅ 後台列表：依狀態 / 物流方式篩選 + id keyset 分頁；日期區間
+        Index("ix_orders_status_id", "status", "id"),
+        Index("ix_orders_shipping_method_id", "shipping_method", "id"),
+        Index("ix_orders_created_at", "created_at"),
+    )
 
     # ===== 基本訂單資訊 =====
     id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
     customer_name: Mapped[str] = mapped_column(String(100))
     customer_email: Mapped[str] = mapped_column(String(200))
     customer_phone: Mapped[str] = mapped_column(String(30), nullable=False, default="")
-    total_amount: Mapped[int] = mapped_column(Integer)  # 總金額（元）
+    total_amount: Mapped[int] = mapped_column(Integer)  # 總金額（元，含運費）
+    shipping_fee: Mapped[int] = mapped_column(Integer, nullable=False, default=0, server_default=text("0"))
     created_at: Mapped[datetime] = mapped_column(
         DateTime(timezone=True),
         server_default=func.now()
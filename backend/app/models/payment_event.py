@@ -0,0 +1,35 @@
+from datetime import datetime
+
+from sqlalchemy import DateTime, Index, Integer, String, Text, UniqueConstraint, func
+from sqlalchemy.orm import Mapped, mapped_column
+
+from ..db import Base
+
+
+class PaymentEvent(Base):
+    """
+    金流 webhook 收到的原始事件（payment_service）。
+    收到就存、立刻回 200；背景 processor 依 id 順序分批套用到訂單狀態。
+    (provider, event_id) 唯一：金流重送同一個事件只會存一次。
+    """
+    __tablename__ = "payment_events"
+    __table_args__ = (
+        UniqueConstraint("provider", "event_id", name="uq_payment_events_provider_event_id"),
+        # ✅ processor：WHERE status = 'pending' ORDER BY id
+        Index("ix_payment_events_status_id", "status", "id"),
+        Index("ix_payment_events_order_id", "order_id"),
+    )
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    provider: Mapped[str] = mapped_column(String(30), nullable=False)
+    event_id: Mapped[str] = mapped_column(String(100), nullable=False)
+    type: Mapped[str] = mapped_column(String(50), nullable=False)
+    order_id: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    amount: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    payload: Mapped[str] = mapped_column(Text, nullable=False)  # 原始 body，對帳 / 重放用
+
+    # pending → applied（改了訂單）| ignored（不用改，例如已付款）| failed（對不上，要人看）
+    status: Mapped[str] = mapped_column(String(20), nullable=False, default="pending")
+    result: Mapped[str] = mapped_column(String(200), nullable=False, default="")
+    received_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
+    processed_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
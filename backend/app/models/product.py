@@ -1,11 +1,17 @@
 from sqlalchemy.orm import Mapped, mapped_column, relationship
-from sqlalchemy import Integer, String, ForeignKey, Boolean
+from sqlalchemy import Integer, String, ForeignKey, Boolean, Index
 from .product_shipping_option import ProductShippingOption
 from ..db import Base
 
 
 class Product(Base):
     __tablename__ = "products"
+    __table_args__ = (
+        # ✅ 前台列表：is_active + 分類篩選 + id keyset 分頁
+        Index("ix_products_active_category_id", "is_active", "category_id", "id"),
+        # ✅ 前台列表：價格區間 / 價格排序
+        Index("ix_products_active_price_id", "is_active", "price", "id"),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
     name: Mapped[str] = mapped_column(String(200), nullable=False)
@@ -0,0 +1,32 @@
+from datetime import date
+
+from sqlalchemy import Date, Integer, String
+from sqlalchemy.orm import Mapped, mapped_column
+
+from ..db import Base
+
+
+class SalesDailyProduct(Base):
+    """
+    每日 × 商品 銷售彙總（analytics_service 在下單 / 改狀態時增量更新，跟訂單同一個 transaction）。
+    只算有效訂單（非 cancelled）；day 是商店時區（ANALYTICS_TIMEZONE）的日期。
+    """
+    __tablename__ = "sales_daily_product"
+
+    day: Mapped[date] = mapped_column(Date, primary_key=True)
+    # 彙總資料不掛 FK：可以整張刪掉重建（python -m app.rebuild_analytics）
+    product_id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    orders: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    qty: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    revenue: Mapped[int] = mapped_column(Integer, nullable=False, default=0)  # qty * 下單單價（不含運費）
+
+
+class SalesDailyShipping(Base):
+    """每日 × 物流方式 銷售彙總（revenue = 訂單總金額，含運費；運費另外記一欄）"""
+    __tablename__ = "sales_daily_shipping"
+
+    day: Mapped[date] = mapped_column(Date, primary_key=True)
+    shipping_method: Mapped[str] = mapped_column(String(50), primary_key=True)
+    orders: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    revenue: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    shipping_fee: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
@@ -0,0 +1,41 @@
+from datetime import datetime
+
+from sqlalchemy import DateTime, ForeignKey, Index, Integer, String
+from sqlalchemy.orm import Mapped, mapped_column
+
+from ..db import Base
+
+
+class StockMovement(Base):
+    """
+    庫存異動帳（只新增、不修改）：每次 products.stock_qty 變動都記一筆，說明為什麼變。
+    products.stock_qty 仍是下單時條件式扣庫存用的即時數字；這張表是「帳」，對不起來時查得到原因。
+    """
+    __tablename__ = "stock_movements"
+    __table_args__ = (
+        # ✅ 單一商品異動紀錄（新到舊 keyset 分頁）、snapshot 之後的增量加總
+        Index("ix_stock_movements_product_id_id", "product_id", "id"),
+        Index("ix_stock_movements_created_at", "created_at"),
+        # ⚠️ SQLite 預設會重用被刪掉的最大 id；快照靠 id 判斷「之後的異動」，一定不能重用
+        {"sqlite_autoincrement": True},
+    )
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    product_id: Mapped[int] = mapped_column(Integer, ForeignKey("products.id"), nullable=False)
+    delta: Mapped[int] = mapped_column(Integer, nullable=False)          # 正 = 入庫，負 = 出庫
+    reason: Mapped[str] = mapped_column(String(20), nullable=False)      # sale | restock | adjustment | import
+    ref: Mapped[str] = mapped_column(String(100), nullable=False, default="")  # order:123 / admin / import
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+
+
+class StockSnapshot(Base):
+    """
+    每個商品最近一次的庫存快照：qty = 到 movement_id（含）為止的異動加總。
+    帳上庫存 = 快照 qty + 之後的異動，不用每次從第一筆加起（housekeeping 定期往前推）。
+    """
+    __tablename__ = "stock_snapshots"
+
+    product_id: Mapped[int] = mapped_column(Integer, ForeignKey("products.id"), primary_key=True)
+    qty: Mapped[int] = mapped_column(Integer, nullable=False)
+    movement_id: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    taken_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
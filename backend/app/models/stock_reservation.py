@@ -0,0 +1,27 @@
+from datetime import datetime
+
+from sqlalchemy import DateTime, ForeignKey, Index, Integer, String, func
+from sqlalchemy.orm import Mapped, mapped_column
+
+from ..db import Base
+
+
+class StockReservation(Base):
+    """
+    結帳中的暫時保留量（checkout_service）。
+    開始結帳時建立、下單成功時轉成真正的扣庫存（刪掉這幾列）；沒下單的過期後由 housekeeping 清掉。
+    可賣量 = products.stock_qty - 未過期的保留量
+    """
+    __tablename__ = "stock_reservations"
+    __table_args__ = (
+        # ✅ 可賣量：WHERE product_id = ? AND expires_at > now → SUM(qty)（qty 也在 index 裡，不用回表）
+        Index("ix_stock_reservations_product_expires", "product_id", "expires_at", "qty"),
+        # ✅ 清理：WHERE expires_at < now
+        Index("ix_stock_reservations_expires_at", "expires_at"),
+    )
+
+    token: Mapped[str] = mapped_column(String(64), primary_key=True)
+    product_id: Mapped[int] = mapped_column(Integer, ForeignKey("products.id"), primary_key=True)
+    qty: Mapped[int] = mapped_column(Integer, nullable=False)
+    expires_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
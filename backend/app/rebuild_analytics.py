@@ -0,0 +1,31 @@
+# backend/app/rebuild_analytics.py
+"""
+從訂單歷史重建銷售彙總表（/admin/analytics 的資料來源）。
+
+    python -m app.rebuild_analytics [--batch-size 1000]
+
+平常不用跑：下單 / 改狀態時就會增量更新。第一次上線、彙總規則改了、或懷疑數字不對時再跑。
+"""
+import argparse
+import time
+
+from .db import SessionLocal
+from .services import analytics_service
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Rebuild sales rollup tables from order history")
+    parser.add_argument("--batch-size", type=int, default=1000)
+    args = parser.parse_args(argv)
+
+    t0 = time.perf_counter()
+    with SessionLocal() as db:
+        stats = analytics_service.rebuild(db, args.batch_size)
+    print(
+        f"[analytics] rebuilt {stats['product_rows']} product rows, "
+        f"{stats['shipping_rows']} shipping rows in {time.perf_counter() - t0:.2f}s"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,21 +1,144 @@
-from fastapi import APIRouter, Depends, HTTPException
+from datetime import date, datetime
+
+from typing_extensions import NotRequired, TypedDict
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from fastapi.responses import StreamingResponse
+from pydantic import TypeAdapter
 from sqlalchemy.orm import Session
-from ..db import get_db
+from ..db import get_db, get_read_db, stick_to_primary
 from ..deps import require_admin, require_admin_key
 from ..models.order import Order
 from ..models.order_item import OrderItem
-from ..models.product import Product
 from ..config import settings
-from sqlalchemy import delete
+from ..services import analytics_service, fast_json, order_status
+from ..services.order_query import load_item_counts, load_items, parse_include, stream_export
+from sqlalchemy import delete, func
 
 router = APIRouter(prefix="/admin", tags=["admin"], dependencies=[Depends(require_admin)])
 
 ALLOWED_STATUS = {"pending", "paid", "shipped", "done", "cancelled"}
 
+
+def _filter_orders(
+    q,
+    status: str | None = None,
+    shipping_method: str | None = None,
+    date_from: datetime | None = None,
+    date_to: datetime | None = None,
+):
+    """訂單列表 / 匯出共用的篩選條件（date_to 不含，方便傳「下個月 1 號」）"""
+    if status:
+        if status not in ALLOWED_STATUS:
+            raise HTTPException(status_code=400, detail=f"Invalid status: {status}")
+        q = q.filter(Order.status == status)
+    if shipping_method:
+        q = q.filter(Order.shipping_method == shipping_method)
+    if date_from is not None:
+        q = q.filter(Order.created_at >= date_from)
+    if date_to is not None:
+        q = q.filter(Order.created_at < date_to)
+    return q
+
+
+# ===== 訂單列表 =====
+# FAST_JSON_LISTS=1：只 select 列表用得到的欄位（不建 Order 物件），用事先建好的 TypeAdapter 直接輸出
+
+class _OrderItemRow(TypedDict):
+    product_id: int
+    name: str
+    qty: int
+    unit_price: int
+    line_total: int
+
+
+class _OrderRow(TypedDict):
+    id: int
+    status: str | None
+    customer_name: str
+    customer_email: str
+    shipping_method: str
+    recipient_name: str | None
+    recipient_phone: str | None
+    shipping_post_address: str | None
+    cvs_brand: str | None
+    cvs_store_id: str | None
+    cvs_store_name: str | None
+    total_amount: int
+    shipping_fee: int | None
+    line_count: int
+    item_count: int
+    items: NotRequired[list[_OrderItemRow]]
+
+
+_order_rows = TypeAdapter(list[_OrderRow])
+
+_LIST_COLUMNS = (
+    Order.id,
+    Order.status,
+    Order.customer_name,
+    Order.customer_email,
+    Order.shipping_method,
+    Order.recipient_name,
+    Order.recipient_phone,
+    Order.shipping_post_address,
+    Order.cvs_brand,
+    Order.cvs_store_id,
+    Order.cvs_store_name,
+    Order.total_amount,
+    Order.shipping_fee,
+)
+
+
 @router.get("/orders")
-def list_orders(db: Session = Depends(get_db), limit: int = 50, offset: int = 0):
-    qs = db.query(Order).order_by(Order.id.desc()).offset(offset).limit(limit).all()
-    return [
+def list_orders(
+    response: Response,
+    db: Session = Depends(get_read_db),
+    limit: int = Query(default=50, ge=1, le=200),
+    offset: int = Query(default=0, ge=0),
+    cursor: int | None = Query(default=None, description="上一頁最後一筆的 order id（keyset 分頁）"),
+    status: str | None = None,
+    shipping_method: str | None = None,
+    date_from: datetime | None = Query(default=None, alias="from"),
+    date_to: datetime | None = Query(default=None, alias="to"),
+    with_total: bool = False,
+    include: str | None = Query(default=None, description="include=items：每張訂單內嵌明細"),
+):
+    """
+    後台訂單列表（新到舊）。
+    - 建議用 cursor 分頁：把 X-Next-Cursor 帶回來拿下一頁，越後面的頁也不會變慢
+    - offset 保留給舊前端相容；有 cursor 時忽略 offset
+    - with_total=true 才算總筆數（X-Total-Count），大表上 count 很貴，預設關閉
+    - line_count / item_count 一律附上；include=items 再內嵌明細（整頁只多 1 個 query）
+    """
+    includes = parse_include(include)
+    fast = fast_json.enabled()
+    q = _filter_orders(db.query(*_LIST_COLUMNS) if fast else db.query(Order), status, shipping_method, date_from, date_to)
+
+    if with_total:
+        total = q.with_entities(func.count(Order.id)).scalar() or 0
+        response.headers["X-Total-Count"] = str(total)
+
+    q = q.order_by(Order.id.desc())
+    if cursor is not None:
+        q = q.filter(Order.id < cursor)
+    elif offset:
+        q = q.offset(offset)
+
+    qs = q.limit(limit + 1).all()
+    if len(qs) > limit:
+        qs = qs[:limit]
+        response.headers["X-Next-Cursor"] = str(qs[-1].id)
+
+    ids = [o.id for o in qs]
+    if "items" in includes:
+        items = load_items(db, ids)
+        counts = {oid: (len(lines), sum(it["qty"] for it in lines)) for oid, lines in items.items()}
+    else:
+        items = None
+        counts = load_item_counts(db, ids)
+
+    rows = [
         {
             "id": o.id,
             "status": getattr(o, "status", "pending"),
@@ -29,23 +152,56 @@ def list_orders(db: Session = Depends(get_db), limit: int = 50, offset: int = 0)
             "cvs_store_id": o.cvs_store_id,
             "cvs_store_name": o.cvs_store_name,
             "total_amount": o.total_amount,
+            "shipping_fee": o.shipping_fee,
+            "line_count": counts.get(o.id, (0, 0))[0],
+            "item_count": counts.get(o.id, (0, 0))[1],
         }
         for o in qs
     ]
+    if items is not None:
+        for row in rows:
+            row["items"] = items.get(row["id"], [])
+    if fast:
+        return fast_json.json_response(_order_rows, rows, response.headers)
+    return rows
+
+@router.get("/orders/export")
+def export_orders(
+    db: Session = Depends(get_read_db),
+    fmt: str = Query(default="csv", alias="format", pattern="^(csv|jsonl)$"),
+    status: str | None = None,
+    shipping_method: str | None = None,
+    date_from: datetime | None = Query(default=None, alias="from"),
+    date_to: datetime | None = Query(default=None, alias="to"),
+):
+    """
+    對帳用匯出（舊到新）：篩選條件跟訂單列表一樣。
+    - csv：一列一個明細（訂單欄位重複），含商品名稱 / 小計
+    - jsonl：一行一張訂單，明細在 items
+    整份邊查邊送，不分頁。
+    """
+    q = _filter_orders(db.query(Order), status, shipping_method, date_from, date_to)
+
+    def body():
+        # ⚠️ dependency 的 session 在回應送出前就收掉了；這裡用完自己再 close 一次把連線還回去
+        try:
+            yield from stream_export(q, fmt)
+        finally:
+            db.close()
+
+    return StreamingResponse(
+        body(),
+        media_type="text/csv; charset=utf-8" if fmt == "csv" else "application/x-ndjson",
+        headers={"Content-Disposition": f'attachment; filename="orders.{fmt}"'},
+    )
+
 
 @router.get("/orders/{order_id}")
-def get_order_full(order_id: int, db: Session = Depends(get_db)):
+def get_order_full(order_id: int, db: Session = Depends(get_read_db)):
     o = db.query(Order).filter(Order.id == order_id).first()
     if not o:
         raise HTTPException(status_code=404, detail="Order not found")
 
-    items = (
-        db.query(OrderItem, Product)
-        .join(Product, Product.id == OrderItem.product_id)
-        .filter(OrderItem.order_id == order_id)
-        .all()
-    )
-
     return {
         "order": {
             "id": o.id,
@@ -61,21 +217,32 @@ def get_order_full(order_id: int, db: Session = Depends(get_db)):
             "cvs_store_id": o.cvs_store_id,
             "cvs_store_name": o.cvs_store_name,
             "total_amount": o.total_amount,
+            "shipping_fee": o.shipping_fee,
         },
-        "items": [
-            {
-                "product_id": p.id,
-                "name": p.name,
-                "qty": oi.qty,
-                "unit_price": oi.unit_price,
-                "line_total": oi.qty * oi.unit_price,
-            }
-            for (oi, p) in items
-        ],
+        "items": load_items(db, [o.id]).get(o.id, []),
     }
 
+@router.get("/analytics")
+def analytics(
+    db: Session = Depends(get_read_db),
+    date_from: date | None = Query(default=None, alias="from"),
+    date_to: date | None = Query(default=None, alias="to", description="不含這一天"),
+    top: int = Query(default=20, ge=1, le=200),
+):
+    """
+    銷售報表：每日營收、各物流方式、商品排行（不含 cancelled）。
+    預設最近 30 天；日期以商店時區（ANALYTICS_TIMEZONE）計。只讀彙總表，不掃訂單。
+    """
+    default_from, default_to = analytics_service.default_range()
+    date_to = date_to or default_to
+    date_from = date_from or (date_to - (default_to - default_from))
+    if date_from >= date_to:
+        raise HTTPException(status_code=400, detail="from must be before to")
+    return analytics_service.summary(db, date_from, date_to, top)
+
+
 @router.patch("/orders/{order_id}/status")
-def update_order_status(order_id: int, status: str, db: Session = Depends(get_db)):
+def update_order_status(order_id: int, status: str, response: Response, db: Session = Depends(get_db)):
     if status not in ALLOWED_STATUS:
         raise HTTPException(status_code=400, detail=f"Invalid status: {status}")
 
@@ -83,16 +250,20 @@ def update_order_status(order_id: int, status: str, db: Session = Depends(get_db
     if not o:
         raise HTTPException(status_code=404, detail="Order not found")
 
-    o.status = status
+    # ✅ 條件式 UPDATE；進出 cancelled 時庫存補回 / 重扣、銷售彙總加減（同一個 transaction）
+    order_status.change_status(db, o, status)
     db.commit()
+    stick_to_primary(response)
     return {"ok": True, "order_id": order_id, "status": status}
 
 @router.delete("/orders/dev/reset", dependencies=[Depends(require_admin_key)])
-def dev_reset_orders(db: Session = Depends(get_db)):
+def dev_reset_orders(response: Response, db: Session = Depends(get_db)):
     if settings.allow_dev_reset != 1:
         raise HTTPException(status_code=404, detail="Not Found")
     # 先刪明細再刪主檔（避免 FK）
     db.execute(delete(OrderItem))
     db.execute(delete(Order))
+    analytics_service.clear(db)
     db.commit()
+    stick_to_primary(response)
     return {"ok": True}
\ No newline at end of file
@@ -1,8 +1,8 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Response
 from sqlalchemy.orm import Session
 from sqlalchemy.exc import IntegrityError
 
-from ..db import get_db
+from ..db import get_db, get_read_db, stick_to_primary
 from ..models.category import Category
 from ..schemas.admin_category import (
     AdminCategoryOut,
@@ -10,13 +10,14 @@ from ..schemas.admin_category import (
     AdminCategoryUpdate,
 )
 from ..deps import require_admin_key
+from ..services.catalog_cache import CATEGORIES, invalidate
 
 router = APIRouter(prefix="/admin/categories", tags=["admin"])
 
 
 @router.get("", response_model=list[AdminCategoryOut])
 def admin_list_categories(
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     _admin=Depends(require_admin_key),
 ):
     rows = (
@@ -30,6 +31,7 @@ def admin_list_categories(
 @router.post("", response_model=AdminCategoryOut)
 def admin_create_category(
     payload: AdminCategoryCreate,
+    response: Response,
     db: Session = Depends(get_db),
     _admin=Depends(require_admin_key),
 ):
@@ -45,6 +47,8 @@ def admin_create_category(
     db.add(row)
     try:
         db.commit()
+        invalidate(CATEGORIES)
+        stick_to_primary(response)
         db.refresh(row)
         return row
     except IntegrityError:
@@ -56,6 +60,7 @@ def admin_create_category(
 def admin_update_category(
     category_id: int,
     payload: AdminCategoryUpdate,
+    response: Response,
     db: Session = Depends(get_db),
     _admin=Depends(require_admin_key),
 ):
@@ -77,6 +82,8 @@ def admin_update_category(
 
     try:
         db.commit()
+        invalidate(CATEGORIES)
+        stick_to_primary(response)
         db.refresh(row)
         return row
     except IntegrityError:
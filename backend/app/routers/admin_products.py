@@ -1,13 +1,23 @@
-from fastapi import APIRouter, Depends, HTTPException
+import tempfile
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
 
-from ..db import get_db
+from ..db import get_db, get_read_db, stick_to_primary
 from ..deps import require_admin
 from ..models.product import Product
 from ..models.category import Category
 from ..models.product_shipping_option import ProductShippingOption
 from ..models.order_item import OrderItem
 from typing import Any
+from typing_extensions import TypedDict
+from pydantic import TypeAdapter
+from ..services import fast_json, inventory_service, product_io_service
+from ..services.catalog_cache import PRODUCTS, invalidate
+from ..services.search_service import index_product, remove_product
+from ..services.shipping_service import shipping_engine
 from ..schemas.admin_product import (
     AdminProductCreate,
     AdminProductUpdate,
@@ -36,14 +46,169 @@ def _validate_shipping_options(options: list[Any]):
         seen.add(m)
 
 
+# ===== 快速序列化（FAST_JSON_LISTS=1）：欄位 / 順序跟 AdminProductOut 一樣 =====
+
+class _AdminOptionRow(TypedDict):
+    id: int
+    method: str
+    fee: int
+    region_note: str
+
+
+class _AdminProductRow(TypedDict):
+    id: int
+    name: str
+    category_id: int | None
+    stock_qty: int
+    price: int
+    description: str
+    description_text: str
+    image_url: str
+    is_active: bool
+    shipping_options: list[_AdminOptionRow]
+
+
+_admin_rows = TypeAdapter(list[_AdminProductRow])
+
+
+def _admin_list_fast(db: Session) -> Response:
+    """欄位直接 select（商品一個 query、運送選項一個 query），不建 ORM / Pydantic 物件"""
+    rows = (
+        db.query(
+            Product.id,
+            Product.name,
+            Product.category_id,
+            Product.stock_qty,
+            Product.price,
+            Product.description,
+            Product.description_text,
+            Product.image_url,
+            Product.is_active,
+        )
+        .order_by(Product.id.desc())
+        .all()
+    )
+    options: dict[int, list[dict]] = {r.id: [] for r in rows}
+    for o in db.query(
+        ProductShippingOption.product_id,
+        ProductShippingOption.id,
+        ProductShippingOption.method,
+        ProductShippingOption.fee,
+        ProductShippingOption.region_note,
+    ).order_by(ProductShippingOption.id):
+        if o.product_id in options:
+            options[o.product_id].append({"id": o.id, "method": o.method, "fee": o.fee, "region_note": o.region_note})
+    return fast_json.json_response(_admin_rows, [dict(r._mapping, shipping_options=options[r.id]) for r in rows])
+
+
 @router.get("", response_model=list[AdminProductOut], dependencies=[Depends(require_admin)])
-def list_products(db: Session = Depends(get_db)):
+def list_products(db: Session = Depends(get_read_db)):
+    if fast_json.enabled():
+        return _admin_list_fast(db)
     rows = db.query(Product).order_by(Product.id.desc()).all()
     return rows
 
 
+_MEDIA_TYPES = {"csv": "text/csv; charset=utf-8", "jsonl": "application/x-ndjson"}
+
+
+def _import_format(request: Request, fmt: str | None) -> str:
+    if fmt is None:
+        ctype = request.headers.get("content-type", "")
+        fmt = "csv" if "csv" in ctype else "jsonl" if ("ndjson" in ctype or "jsonl" in ctype) else None
+    if fmt not in product_io_service.FORMATS:
+        raise HTTPException(status_code=400, detail="Unsupported format: use format=csv or format=jsonl")
+    return fmt
+
+
+@router.post("/import", dependencies=[Depends(require_admin)])
+async def import_products(
+    request: Request,
+    response: Response,
+    fmt: str | None = Query(default=None, alias="format", description="csv / jsonl（不給就看 Content-Type）"),
+    batch_size: int = Query(default=500, ge=1, le=5000),
+    db: Session = Depends(get_db),
+):
+    """
+    批次新增 / 更新商品（request body 直接放 CSV 或 JSONL 檔內容）。
+    - 有 id = 更新（只改有給的欄位），沒 id = 新增；分類可給 category_id 或 category（名稱）
+    - 分批 commit；單列錯誤記在 errors（row = 檔案行號），其他列照常寫入
+    """
+    fmt = _import_format(request, fmt)
+
+    # ✅ 邊收邊寫暫存檔（小的留在記憶體，大的落地），不把整個檔案讀成一個 bytes
+    with tempfile.SpooledTemporaryFile(max_size=1 << 20) as fp:
+        async for chunk in request.stream():
+            fp.write(chunk)
+        fp.seek(0)
+        report, touched = await run_in_threadpool(
+            lambda: product_io_service.import_products(db, product_io_service.read_rows(fp, fmt), batch_size)
+        )
+
+    if touched:
+        invalidate(PRODUCTS)
+        shipping_engine.forget(*touched)
+        stick_to_primary(response)
+    return report
+
+
+@router.get("/export", dependencies=[Depends(require_admin)])
+def export_products(
+    fmt: str = Query(default="csv", alias="format", pattern="^(csv|jsonl)$"),
+    db: Session = Depends(get_read_db),
+):
+    """全部商品（含運送選項）匯出成 CSV / JSONL；分批讀、邊讀邊送，格式跟匯入相同"""
+
+    def body():
+        # ⚠️ dependency 的 session 在回應送出前就收掉了；這裡用完自己再 close 一次把連線還回去
+        try:
+            yield from product_io_service.export_products(db, fmt)
+        finally:
+            db.close()
+
+    return StreamingResponse(
+        body(),
+        media_type=_MEDIA_TYPES[fmt],
+        headers={"Content-Disposition": f'attachment; filename="products.{fmt}"'},
+    )
+
+
+@router.get("/{product_id}/stock", dependencies=[Depends(require_admin)])
+def get_stock(product_id: int, db: Session = Depends(get_db)):
+    """目前庫存 vs 帳上庫存（快照 + 之後的異動）；drift 不是 0 就是有人繞過異動帳改了數字"""
+    out = inventory_service.drift(db, product_id)
+    if out is None:
+        raise HTTPException(status_code=404, detail="Product not found")
+    return {"product_id": product_id, **out}
+
+
+@router.get("/{product_id}/stock-movements", dependencies=[Depends(require_admin)])
+def list_stock_movements(
+    product_id: int,
+    response: Response,
+    limit: int = Query(default=50, ge=1, le=200),
+    cursor: int | None = Query(default=None, description="上一頁最後一筆的 movement id（keyset 分頁）"),
+    db: Session = Depends(get_read_db),
+):
+    """單一商品的庫存異動（新到舊）；X-Next-Cursor 帶回來拿下一頁"""
+    rows = inventory_service.history(db, product_id, limit + 1, cursor)
+    if len(rows) > limit:
+        rows = rows[:limit]
+        response.headers["X-Next-Cursor"] = str(rows[-1].id)
+    return [
+        {
+            "id": m.id,
+            "delta": m.delta,
+            "reason": m.reason,
+            "ref": m.ref,
+            "created_at": m.created_at,
+        }
+        for m in rows
+    ]
+
+
 @router.post("", response_model=AdminProductOut, dependencies=[Depends(require_admin)])
-def create_product(payload: AdminProductCreate, db: Session = Depends(get_db)):
+def create_product(payload: AdminProductCreate, response: Response, db: Session = Depends(get_db)):
     # category_id 驗證
     _validate_category(db, payload.category_id)
 
@@ -71,24 +236,34 @@ def create_product(payload: AdminProductCreate, db: Session = Depends(get_db)):
             )
 
     db.add(p)
+    db.flush()
+    index_product(db, p)  # ✅ 搜尋索引跟商品同一個 transaction
+    inventory_service.record(db, [(p.id, p.stock_qty, inventory_service.ADJUSTMENT, "admin")])
     db.commit()
+    invalidate(PRODUCTS)
+    shipping_engine.forget(p.id)
+    stick_to_primary(response)
     db.refresh(p)
     return p
 
 @router.patch("/{product_id}/active", response_model=AdminProductOut, dependencies=[Depends(require_admin)])
-def set_product_active(product_id: int, payload: AdminProductActiveUpdate, db: Session = Depends(get_db)):
+def set_product_active(
+    product_id: int, payload: AdminProductActiveUpdate, response: Response, db: Session = Depends(get_db)
+):
     p = db.query(Product).filter(Product.id == product_id).first()
     if not p:
         raise HTTPException(status_code=404, detail="Product not found")
 
     p.is_active = payload.is_active
     db.commit()
+    invalidate(PRODUCTS)
+    stick_to_primary(response)
     db.refresh(p)
     return p
 
 
 @router.patch("/{product_id}", response_model=AdminProductOut, dependencies=[Depends(require_admin)])
-def update_product(product_id: int, payload: AdminProductUpdate, db: Session = Depends(get_db)):
+def update_product(product_id: int, payload: AdminProductUpdate, response: Response, db: Session = Depends(get_db)):
     p = db.query(Product).filter(Product.id == product_id).first()
     if not p:
         raise HTTPException(status_code=404, detail="Product not found")
@@ -101,8 +276,9 @@ def update_product(product_id: int, payload: AdminProductUpdate, db: Session = D
 
     if "name" in data:
         p.name = data["name"]
-    if "stock_qty" in data:
-        p.stock_qty = data["stock_qty"]
+    if data.get("stock_qty") is not None:
+        # ✅ 鎖住商品列再改，差額記進庫存異動帳（跟同時的下單不會互相蓋掉）
+        inventory_service.set_stock(db, {p.id: data["stock_qty"]}, inventory_service.ADJUSTMENT, "admin")
     if "price" in data:
         p.price = data["price"]
     if "description" in data:
@@ -128,13 +304,18 @@ def update_product(product_id: int, payload: AdminProductUpdate, db: Session = D
                 )
             )
 
+    if data.keys() & {"name", "description", "description_text"}:
+        index_product(db, p)
     db.commit()
+    invalidate(PRODUCTS)
+    shipping_engine.forget(p.id)
+    stick_to_primary(response)
     db.refresh(p)
     return p
 
 
 @router.delete("/{product_id}", dependencies=[Depends(require_admin)])
-def delete_product(product_id: int, db: Session = Depends(get_db)):
+def delete_product(product_id: int, response: Response, db: Session = Depends(get_db)):
     p = db.query(Product).filter(Product.id == product_id).first()
     if not p:
         raise HTTPException(status_code=404, detail="商品不存在")
@@ -147,6 +328,11 @@ def delete_product(product_id: int, db: Session = Depends(get_db)):
             detail="此商品已存在於訂單明細中，為保留歷史紀錄，禁止刪除；請改用下架(is_active=false)。",
         )
 
+    inventory_service.forget_product(db, product_id)
     db.delete(p)  # shipping_options 會因 relationship cascade 一起刪（你已設 cascade）
+    remove_product(db, product_id)
     db.commit()
+    invalidate(PRODUCTS)
+    shipping_engine.forget(product_id)
+    stick_to_primary(response)
     return {"ok": True, "deleted_product_id": product_id}
@@ -1,44 +1,71 @@
 # app/routers/admin_uploads.py
-import os
+import hashlib
 import uuid
-from pathlib import Path
 
 from fastapi import APIRouter, Depends, File, HTTPException, UploadFile
+from starlette.concurrency import run_in_threadpool
+
+from ..config import UPLOAD_DIR
 from ..deps import require_admin
+from ..services.image_service import EXT, make_variants_async, sniff_mime
 
 router = APIRouter(prefix="/admin/uploads", tags=["admin-uploads"])
 
-UPLOAD_DIR = Path(os.getenv("UPLOAD_DIR", "./uploads"))
-UPLOAD_DIR.mkdir(parents=True, exist_ok=True)
-
-ALLOWED_MIME = {"image/jpeg", "image/png", "image/webp", "image/gif"}
+ALLOWED_MIME = set(EXT)
 MAX_BYTES = 5 * 1024 * 1024  # 5MB
+CHUNK_BYTES = 64 * 1024
 
-EXT = {
-    "image/jpeg": ".jpg",
-    "image/png": ".png",
-    "image/webp": ".webp",
-    "image/gif": ".gif",
-}
 
 @router.post("/image", dependencies=[Depends(require_admin)])
 async def upload_image(file: UploadFile = File(...)):
-    ct = (file.content_type or "").lower()
-    if ct not in ALLOWED_MIME:
-        raise HTTPException(status_code=415, detail="Unsupported image type")
+    UPLOAD_DIR.mkdir(parents=True, exist_ok=True)  # 平常 lifespan 已建好；這裡只是保險
+    # ✅ 邊讀邊寫暫存檔 + 邊算 sha256：不把整個檔案放進記憶體，超過上限立刻停
+    tmp_path = UPLOAD_DIR / f".upload-{uuid.uuid4().hex}.tmp"
+    digest = hashlib.sha256()
+    size = 0
+    head = b""
+
+    try:
+        with tmp_path.open("wb") as out:
+            while chunk := await file.read(CHUNK_BYTES):
+                size += len(chunk)
+                if size > MAX_BYTES:
+                    raise HTTPException(status_code=413, detail="File too large")
+                if len(head) < 16:
+                    head += chunk[: 16 - len(head)]
+                digest.update(chunk)
+                await run_in_threadpool(out.write, chunk)
+
+        if size == 0:
+            raise HTTPException(status_code=400, detail="Empty file")
+
+        # ✅ 用檔頭判斷格式（Content-Type 可以亂填）
+        ct = sniff_mime(head)
+        if ct not in ALLOWED_MIME:
+            raise HTTPException(status_code=415, detail="Unsupported image type")
 
-    ext = EXT.get(ct)
-    if not ext:
-        raise HTTPException(status_code=415, detail="Unsupported image type")
+        sha = digest.hexdigest()
+        filename = f"{sha}{EXT[ct]}"
+        save_path = UPLOAD_DIR / filename
 
-    data = await file.read()
-    if not data:
-        raise HTTPException(status_code=400, detail="Empty file")
-    if len(data) > MAX_BYTES:
-        raise HTTPException(status_code=413, detail="File too large")
+        # ✅ 內容定址：同一張圖已經有了就直接沿用
+        deduped = save_path.exists()
+        if deduped:
+            tmp_path.unlink(missing_ok=True)
+        else:
+            tmp_path.replace(save_path)
+    except BaseException:
+        tmp_path.unlink(missing_ok=True)
+        raise
 
-    filename = f"{uuid.uuid4().hex}{ext}"
-    save_path = UPLOAD_DIR / filename
-    save_path.write_bytes(data)
+    variants = await make_variants_async(save_path, sha)
 
-    return {"filename": filename, "url": f"/uploads/{filename}"}
+    return {
+        "filename": filename,
+        "url": f"/uploads/{filename}",
+        "content_type": ct,
+        "size": size,
+        "sha256": sha,
+        "deduped": deduped,
+        "variants": {v: f"/uploads/{name}" for v, name in variants.items()},
+    }
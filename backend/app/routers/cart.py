@@ -0,0 +1,121 @@
+from collections import defaultdict
+from datetime import datetime, timezone
+
+from fastapi import APIRouter, Depends
+from sqlalchemy.orm import Session, noload
+
+from ..db import get_db, get_read_db
+from ..models.product import Product
+from ..schemas.cart import (
+    CartLineOut,
+    CartQuoteIn,
+    CartQuoteOut,
+    ReservationIn,
+    ReservationOut,
+    ShippingQuoteOut,
+)
+from ..services import checkout_service
+from ..services.shipping_service import shipping_engine
+
+router = APIRouter(prefix="/cart", tags=["cart"])
+
+
+def _merge(items) -> dict[int, int]:
+    # 合併同商品（跟下單一樣）
+    merged: dict[int, int] = defaultdict(int)
+    for it in items:
+        merged[it.product_id] += it.qty
+    return merged
+
+
+@router.post("/quote", response_model=CartQuoteOut)
+def quote_cart(payload: CartQuoteIn, db: Session = Depends(get_read_db)):
+    """
+    用「現在的」價格 / 庫存 / 上架狀態 / 運送方式驗整台購物車（不扣庫存、不建單）。
+    購物車每次變動就可以重打一次，不用等到下單失敗才知道價格變了或賣完了。
+    """
+    merged = _merge(payload.items)
+
+    # ✅ 商品 + 可賣量（扣掉別人結帳中的保留）一次撈完；運送方式走運費引擎（已快取的不再查）
+    held = checkout_service.held_qty(Product.id, datetime.now(timezone.utc), payload.reservation_token)
+    rows = (
+        db.query(Product, held)
+        .options(noload(Product.shipping_options))
+        .filter(Product.id.in_(list(merged)))
+        .all()
+    )
+    by_id = {p.id: p for p, _ in rows}
+    available = {p.id: max((p.stock_qty or 0) - int(h or 0), 0) for p, h in rows}
+
+    lines: list[CartLineOut] = []
+    subtotal = 0
+    buyable: list[int] = []
+
+    for pid, qty in merged.items():
+        p = by_id.get(pid)
+        if p is None:
+            lines.append(CartLineOut(product_id=pid, qty=qty, available=False, problem="not_found"))
+            continue
+
+        problem = None
+        if not p.is_active:
+            problem = "inactive"
+        elif qty > available[p.id]:
+            problem = "insufficient_stock"
+
+        line_total = p.price * qty
+        lines.append(
+            CartLineOut(
+                product_id=p.id,
+                name=p.name,
+                image_url=p.image_url or "",
+                unit_price=p.price,
+                qty=qty,
+                line_total=line_total,
+                stock_qty=available[p.id],
+                available=problem is None,
+                problem=problem,
+            )
+        )
+        if problem is not None:
+            continue
+
+        subtotal += line_total
+        buyable.append(p.id)
+
+    allowed = shipping_engine.quote(db, buyable).methods
+    shipping_options = [ShippingQuoteOut(method=m, fee=fee) for m, fee in allowed.items()]
+
+    method = payload.shipping_method
+    method_ok = method is None or method in allowed
+    shipping_fee = allowed.get(method, 0) if method else 0
+
+    return CartQuoteOut(
+        lines=lines,
+        subtotal=subtotal,
+        shipping_options=shipping_options,
+        shipping_method=method,
+        shipping_fee=shipping_fee,
+        total=subtotal + shipping_fee,
+        ok=bool(lines) and all(ln.available for ln in lines) and method_ok and bool(allowed),
+    )
+
+
+@router.post("/reservations", response_model=ReservationOut)
+def create_reservation(payload: ReservationIn, db: Session = Depends(get_db)):
+    """
+    開始結帳：保留購物車裡的數量幾分鐘，填表單的時候不會被別人買走。
+    購物車改了就帶同一個 token 再打一次（整組換掉）；下單時把 token 放在 reservation_token。
+    """
+    r = checkout_service.reserve(db, _merge(payload.items), token=payload.token)
+    return ReservationOut(
+        token=r.token,
+        expires_at=r.expires_at,
+        items=[{"product_id": pid, "qty": qty} for pid, qty in r.items.items()],
+    )
+
+
+@router.delete("/reservations/{token}")
+def release_reservation(token: str, db: Session = Depends(get_db)):
+    """放棄結帳：馬上把保留量還回去（不呼叫也沒關係，過期會自動失效）"""
+    return {"ok": True, "released": checkout_service.release(db, token)}
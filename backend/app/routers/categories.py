@@ -1,17 +1,25 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Request
+from pydantic import TypeAdapter
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from ..db import get_db
+from ..db import get_async_read_db
 from ..models.category import Category
 from ..schemas.category import CategoryOut
+from ..services.catalog_cache import CATEGORIES, cached_json_response
 
 router = APIRouter(prefix="/categories", tags=["categories"])
 
+_category_list = TypeAdapter(list[CategoryOut])
+
 @router.get("", response_model=list[CategoryOut])
-def list_categories(db: Session = Depends(get_db)):
-    rows = (
-        db.query(Category)
-        .filter(Category.is_active == True)
-        .order_by(Category.sort_order.asc(), Category.id.asc())
-        .all()
-    )
-    return rows
+async def list_categories(request: Request, db: AsyncSession = Depends(get_async_read_db)):
+    def build(db: Session) -> tuple[bytes, dict[str, str]]:
+        rows = (
+            db.query(Category)
+            .filter(Category.is_active == True)
+            .order_by(Category.sort_order.asc(), Category.id.asc())
+            .all()
+        )
+        return _category_list.dump_json(_category_list.validate_python(rows, from_attributes=True)), {}
+
+    return await cached_json_response(request, CATEGORIES, "list", lambda: db.run_sync(build))
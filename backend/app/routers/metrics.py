@@ -0,0 +1,16 @@
+from fastapi import APIRouter, Header, HTTPException
+from fastapi.responses import PlainTextResponse
+
+from ..config import settings
+from ..services.metrics import render_prometheus
+
+router = APIRouter(tags=["health"])
+
+
+@router.get("/metrics", response_class=PlainTextResponse)
+def metrics(authorization: str | None = Header(default=None)):
+    # 有設 METRICS_TOKEN 就要帶 Authorization: Bearer <token>（Prometheus 的 bearer_token 設定）
+    token = getattr(settings, "metrics_token", None)
+    if token and authorization != f"Bearer {token}":
+        raise HTTPException(status_code=401, detail="Unauthorized")
+    return PlainTextResponse(render_prometheus(), media_type="text/plain; version=0.0.4")
@@ -1,13 +1,21 @@
 from collections import defaultdict
-from fastapi import APIRouter, Depends, HTTPException
+from typing import Callable
+
+from fastapi import APIRouter, Depends, Header, HTTPException
+from sqlalchemy import update
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from ..db import get_db
+from ..db import get_async_db, get_db
 from ..models.product import Product
 from ..models.order import Order
 from ..models.order_item import OrderItem
 from ..schemas.order import OrderCreate, OrderCreated, OrderShipIn
-from fastapi import BackgroundTasks
-from ..services.emailer import send_admin_email, send_email
+from ..services.notification_service import enqueue_admin_email, enqueue_email
+from ..services import analytics_service, idempotency_service as idem, inventory_service, order_status
+from ..services.catalog_cache import PRODUCTS, invalidate
+from ..services.checkout_service import consume, held_qty, lock_products
+from ..services.shipping_service import shipping_engine
+from ..services.order_query import load_items, parse_include
 from datetime import datetime, timezone
 
 
@@ -25,12 +33,53 @@ def _ship_label(m: str) -> str:
         "cvs_family": "超商取貨（全家）",
     }.get(m, m)
 
+ORDERS_SCOPE = "orders"
+
+
 @router.post("", response_model=OrderCreated)
 def create_order(
     payload: OrderCreate,
-    background_tasks: BackgroundTasks,
     db: Session = Depends(get_db),
+    idempotency_key: str | None = Header(default=None, alias=idem.HEADER, max_length=200),
 ):
+    """
+    建立訂單。
+    帶 Idempotency-Key：同一把 key 重送（網路斷線重試 / 同時送好幾次）只會建一張單，拿到同一份回應。
+    """
+    key = (idempotency_key or "").strip()
+    if not key:
+        return _place_order(payload, db)
+
+    replay = idem.begin(db, ORDERS_SCOPE, key, idem.request_hash(payload))
+    if replay is not None:
+        return replay
+
+    try:
+        # ✅ 結果跟訂單同一個 transaction 寫回
+        return _place_order(
+            payload,
+            db,
+            before_commit=lambda created: idem.complete(db, ORDERS_SCOPE, key, 200, created.model_dump()),
+        )
+    except HTTPException as e:
+        db.rollback()
+        if e.status_code >= 500:
+            idem.release(db, ORDERS_SCOPE, key)
+        else:
+            idem.complete(db, ORDERS_SCOPE, key, e.status_code, {"detail": e.detail})
+            db.commit()
+        raise
+    except Exception:
+        db.rollback()
+        idem.release(db, ORDERS_SCOPE, key)
+        raise
+
+
+def _place_order(
+    payload: OrderCreate,
+    db: Session,
+    before_commit: Callable[[OrderCreated], None] | None = None,
+) -> OrderCreated:
     # ====== A) 情境驗證 ======
     def _require(v: str | None, field: str) -> str:
         if not v:
@@ -83,6 +132,8 @@ def create_order(
         if it.qty <= 0:
             raise HTTPException(status_code=400, detail="qty must be > 0")
         merged[it.product_id] += it.qty
+    if not merged:
+        raise HTTPException(status_code=400, detail="items required")
 
     # ====== 1) 重新計算總金額 + 先做庫存檢查 ======
     calc_items: list[tuple[Product, int]] = []
@@ -115,10 +166,48 @@ def create_order(
         calc_items.append((p, qty))
         total += p.price * qty
 
+    # ====== 1.5) 運送方式：每件商品都要支援；運費照 SHIPPING_FEE_RULE 算進總金額 ======
+    shipping_fee = shipping_engine.quote(db, [p.id for p, _ in calc_items]).fee(m)
+    if shipping_fee is None:
+        raise HTTPException(status_code=400, detail=f"Shipping method not available for all items: {m}")
+    total += shipping_fee
+
     # ====== 2) 扣庫存（在 commit 前先扣） ======
     # ⚠️ 這一步一定要在 commit 前做，確保訂單和庫存一致
-    for p, qty in calc_items:
-        p.stock_qty -= qty
+    # ✅ 「檢查 + 扣除」合成一句條件式 UPDATE（WHERE stock_qty - 別人的保留量 >= qty），
+    #    兩個 worker 同時通過上面的檢查也不會超賣；任一品項搶輸就整張訂單 rollback。
+    # ✅ 先依 product_id 排序鎖商品列再扣，避免 Postgres 上兩張訂單互相等鎖（deadlock），
+    #    也讓保留量子查詢看到的是鎖內最新的資料（見 checkout_service）
+    token = _s(payload.reservation_token) or None
+    now = datetime.now(timezone.utc)
+    lock_products(db, [p.id for p, _ in calc_items])
+    for p, qty in sorted(calc_items, key=lambda x: x[0].id):
+        res = db.execute(
+            update(Product)
+            .where(
+                Product.id == p.id,
+                Product.is_active == True,
+                Product.stock_qty - held_qty(Product.id, now, token) >= qty,
+            )
+            .values(stock_qty=Product.stock_qty - qty)
+            .execution_options(synchronize_session=False)
+        )
+        if res.rowcount != 1:
+            db.rollback()
+            raise HTTPException(
+                status_code=400,
+                detail=f"Insufficient stock: product_id={p.id}, requested={qty}",
+            )
+    # 保留量已轉成真的扣庫存
+    if token:
+        consume(db, token)
+    # 有沒有品項因這張訂單賣完（鎖內查，看到的是扣完的數字）
+    sold_out = (
+        db.query(Product.id)
+        .filter(Product.id.in_([p.id for p, _ in calc_items]), Product.stock_qty <= 0)
+        .first()
+        is not None
+    )
 
     # ====== 3) 建立訂單主檔 ======
     order = Order(
@@ -135,6 +224,8 @@ def create_order(
         shipping_post_address=payload.shipping_post_address if payload.shipping_method in ("post", "courier") else None,
 
         total_amount=total,
+        shipping_fee=shipping_fee,
+        created_at=now,  # 明確給：銷售彙總要用同一個時間切日期
     )
 
     order.customer_phone = payload.customer_phone
@@ -158,14 +249,17 @@ def create_order(
             )
         )
 
-    db.commit()
-    db.refresh(order)
+    # ✅ 庫存異動帳 + 銷售彙總（後台報表）跟訂單同一個 transaction 寫
+    inventory_service.record(
+        db, [(p.id, -qty, inventory_service.SALE, inventory_service.order_ref(order.id)) for p, qty in calc_items]
+    )
+    analytics_service.record_order(db, order, [(p.id, qty, p.price) for p, qty in calc_items])
 
     # ✅ 老闆通知（Email）— 你原本後面應該還有（此段以下我保留你既有變數結構）
     lines: list[str] = []
     lines.append("新訂單成立！")
     lines.append(f"Order ID: {order.id}")
-    lines.append(f"總金額: {order.total_amount} 元")
+    lines.append(f"總金額: {order.total_amount} 元（含運費 {order.shipping_fee} 元）")
     lines.append("")
     lines.append("【買家資訊】")
     lines.append(f"買家: {payload.customer_name}")
@@ -184,7 +278,7 @@ def create_order(
     buyer_lines.append("我們已收到您的訂單，將盡快為您處理與出貨。")
     buyer_lines.append("")
     buyer_lines.append(f"訂單編號：{order.id}")
-    buyer_lines.append(f"訂單金額：{order.total_amount} 元")
+    buyer_lines.append(f"訂單金額：{order.total_amount} 元（含運費 {order.shipping_fee} 元）")
     buyer_lines.append("")
     buyer_lines.append("【訂購內容】")
     for p, qty in calc_items:
@@ -203,12 +297,8 @@ def create_order(
 
     buyer_body = "\n".join(buyer_lines)
 
-    background_tasks.add_task(
-        send_email,
-        payload.customer_email,
-        buyer_subject,
-        buyer_body,
-    )
+    # ✅ 信件先寫進 email_outbox（跟訂單同一個 transaction），由 sender 另外寄
+    enqueue_email(db, payload.customer_email, buyer_subject, buyer_body)
 
     # ✅ 給後面「賣家通知 / 出貨通知」共用的收件資訊（對齊新 schema）
     recipient = _s(order.recipient_name) or _s(payload.recipient_name) or _s(payload.customer_name)
@@ -266,70 +356,98 @@ def create_order(
     subject = f"[A-kâu Shop] 新訂單 #{order.id}（{order.total_amount} 元）"
     body = "\n".join(lines)
 
-    background_tasks.add_task(send_admin_email, subject, body)
+    enqueue_admin_email(db, subject, body)
+
+    created = OrderCreated(order_id=order.id, total_amount=order.total_amount, shipping_fee=order.shipping_fee)
+    if before_commit is not None:
+        before_commit(created)
 
-    return OrderCreated(order_id=order.id, total_amount=order.total_amount)
+    # ====== 5) 訂單 + 明細 + 扣庫存 + 通知信，一次 commit ======
+    db.commit()
+    # ⚠️ 商品列表有帶 stock_qty，但每張訂單都讓列表快取失效的話，下單一多命中率就歸零。
+    #    只有「賣完」（前台要顯示售完、不能再加購物車）才立刻失效；其他時候庫存數字最晚
+    #    CATALOG_CACHE_TTL_SECONDS 秒後更新。顯示的數字可能稍微偏高，但下單時的條件式 UPDATE
+    #    才是準的，超過會回 Insufficient stock，前端會提示調整數量。
+    if sold_out:
+        invalidate(PRODUCTS)
 
+    return created
+
+# ⚠️ 單筆訂單查詢走主庫：買家剛下單就會查，副本可能還沒同步到（主鍵查詢很便宜）
+# ✅ async 路由（查詢本身還是 sync 的 db.query，用 run_sync 跑，等 DB 時不佔 threadpool）
 @router.get("/{order_id}/items")
-def get_order_items(order_id: int, db: Session = Depends(get_db)):
-    rows = db.query(OrderItem).filter(OrderItem.order_id == order_id).all()
-    return [
-        {
-            "id": r.id,
-            "order_id": r.order_id,
-            "product_id": r.product_id,
-            "qty": r.qty,
-            "unit_price": r.unit_price,
-        }
-        for r in rows
-    ]
+async def get_order_items(order_id: int, db: AsyncSession = Depends(get_async_db)):
+    def load(db: Session) -> list[dict]:
+        rows = db.query(OrderItem).filter(OrderItem.order_id == order_id).all()
+        return [
+            {
+                "id": r.id,
+                "order_id": r.order_id,
+                "product_id": r.product_id,
+                "qty": r.qty,
+                "unit_price": r.unit_price,
+            }
+            for r in rows
+        ]
+
+    return await db.run_sync(load)
 
 @router.get("/{order_id}")
-def get_order(order_id: int, db: Session = Depends(get_db)):
-    o = db.query(Order).filter(Order.id == order_id).first()
-    if not o:
-        raise HTTPException(status_code=404, detail="Order not found")
+async def get_order(order_id: int, include: str | None = None, db: AsyncSession = Depends(get_async_db)):
+    includes = parse_include(include)
+
+    def load(db: Session) -> dict | None:
+        o = db.query(Order).filter(Order.id == order_id).first()
+        if not o:
+            return None
+
+        data = {
+            "id": o.id,
+            "customer_name": o.customer_name,
+            "customer_email": o.customer_email,
+            "shipping_method": o.shipping_method,
+            "shipping_address": o.shipping_address,
+
+            # ✅ 結構化物流欄位
+            "recipient_name": o.recipient_name,
+            "recipient_phone": o.recipient_phone,
+            "shipping_post_address": o.shipping_post_address,
+            "cvs_brand": o.cvs_brand,
+            "cvs_store_id": o.cvs_store_id,
+            "cvs_store_name": o.cvs_store_name,
+
+            "total_amount": o.total_amount,
+            "shipping_fee": o.shipping_fee,
+        }
 
-    return {
-        "id": o.id,
-        "customer_name": o.customer_name,
-        "customer_email": o.customer_email,
-        "shipping_method": o.shipping_method,
-        "shipping_address": o.shipping_address,
-
-        # ✅ 結構化物流欄位
-        "recipient_name": o.recipient_name,
-        "recipient_phone": o.recipient_phone,
-        "shipping_post_address": o.shipping_post_address,
-        "cvs_brand": o.cvs_brand,
-        "cvs_store_id": o.cvs_store_id,
-        "cvs_store_name": o.cvs_store_name,
-
-        "total_amount": o.total_amount,
-    }
+        # ✅ include=items：明細一起回，前端不用再打 /orders/{id}/items
+        if "items" in includes:
+            data["items"] = load_items(db, [o.id]).get(o.id, [])
+        return data
+
+    data = await db.run_sync(load)
+    if data is None:
+        raise HTTPException(status_code=404, detail="Order not found")
+    return data
 
 @router.post("/{order_id}/ship")
 def mark_shipped(
     order_id: int,
     payload: OrderShipIn,
-    background_tasks: BackgroundTasks,
     db: Session = Depends(get_db),
 ):
     o = db.query(Order).filter(Order.id == order_id).first()
     if not o:
         raise HTTPException(status_code=404, detail="Order not found")
 
-    # ✅ 狀態更新
-    o.status = "shipped"
-
-    # ✅ 可選：若你有加欄位就存（沒有也不會炸）
-    if hasattr(o, "shipped_at"):
-        o.shipped_at = datetime.now(timezone.utc)
-    if hasattr(o, "tracking_no"):
-        o.tracking_no = (payload.tracking_no or "").strip() or None
-
-    db.commit()
-    db.refresh(o)
+    # ✅ 狀態更新（條件式 UPDATE；從 cancelled 改回來時庫存 / 銷售彙總會重新算進去）
+    order_status.change_status(
+        db,
+        o,
+        "shipped",
+        shipped_at=datetime.now(timezone.utc),
+        tracking_no=(payload.tracking_no or "").strip() or None,
+    )
 
     # ✅ 寄出貨通知給買家
     subject = f"[A-kâu Shop] 您的訂單 #{o.id} 已出貨"
@@ -382,7 +500,10 @@ def mark_shipped(
 
     body = "\n".join(lines)
 
-    background_tasks.add_task(send_email, o.customer_email, subject, body)
+    enqueue_email(db, o.customer_email, subject, body)
+
+    # 狀態 + 出貨通知信一起 commit
+    db.commit()
 
     return {"ok": True, "order_id": o.id, "status": o.status}
 
@@ -394,5 +515,6 @@ def dev_reset_orders(db: Session = Depends(get_db)):
     # 先刪明細再刪主檔
     db.query(OrderItem).delete()
     db.query(Order).delete()
+    analytics_service.clear(db)
     db.commit()
     return {"ok": True}
\ No newline at end of file
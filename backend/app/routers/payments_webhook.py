@@ -0,0 +1,26 @@
+# backend/app/routers/payments_webhook.py
+from fastapi import APIRouter, Depends, Request
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from ..db import get_db
+from ..services import payment_service
+
+router = APIRouter(prefix="/payments", tags=["payments"])
+
+
+@router.post("/webhook")
+async def payment_webhook(request: Request, db: Session = Depends(get_db)):
+    """
+    金流通知：驗簽 → 原始事件存進 payment_events → 立刻回 200。
+    訂單狀態由背景 processor 分批套用（payment_service.process_batch），這裡不碰訂單。
+    同一個事件重送：回 200 + duplicate=true（金流看到 2xx 就不會再送）。
+    """
+    body = await request.body()
+    payment_service.verify_signature(body, request.headers.get(payment_service.SIGNATURE_HEADER))
+    event = payment_service.parse_event(body)
+
+    created = await run_in_threadpool(payment_service.store_event, db, event, body)
+    if created:
+        payment_service.notify()
+    return {"ok": True, "duplicate": not created}
@@ -1,34 +1,246 @@
-from fastapi import APIRouter, Depends, HTTPException
+import base64
+import json
+from typing import Literal, Sequence
+
+from typing_extensions import TypedDict  # pydantic 在 3.12 以前要用這個 TypedDict
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from pydantic import TypeAdapter
+from sqlalchemy import tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from ..db import get_db
+from starlette.concurrency import run_in_threadpool
+from ..db import get_async_read_db, get_read_db
 from ..models.product import Product
 from ..schemas.product import ProductOut, ProductPublicOut
+from ..services import fast_json
+from ..services.catalog_cache import PRODUCTS, cached_json_response
+from ..services.image_service import variant_urls
+from ..services.search_service import search
+from ..services.shipping_service import product_options
 
 router = APIRouter(prefix="/products", tags=["products"])
 
+# ✅ 前台讀取都是 async 路由：查詢邏輯仍是 sync 的 db.query，用 AsyncSession.run_sync 跑
+#    （等 DB 時讓出 event loop，不佔 threadpool；命中快取時連 DB 連線都不拿）
+# ⚠️ run_sync 裡的 Python 程式碼是在 event loop 上跑的（greenlet），不是在別的 thread：
+#    裡面只做查詢、拿 row tuple（不建 ORM 物件）；組 dict + Pydantic 序列化（不帶 limit 時可能幾千筆）
+#    交給 run_in_threadpool，不然 cache miss 時整個 worker 的其他 request 都要等
+
+_public_list = TypeAdapter(list[ProductPublicOut])
+
+
+# ===== 快速序列化（FAST_JSON_LISTS=1）：欄位 / 順序跟 ProductPublicOut 一樣 =====
+
+class _OptionRow(TypedDict):
+    method: str
+    fee: int
+    region_note: str
+
+
+class _PublicRow(TypedDict):
+    id: int
+    name: str
+    price: int
+    description: str
+    description_text: str
+    category_id: int | None
+    image_url: str
+    is_active: bool
+    stock_qty: int
+    shipping_options: Sequence[_OptionRow]
+    image_variants: dict[str, str] | None
+
+
+_public_rows = TypeAdapter(list[_PublicRow])
+
+# 列表只需要這些欄位：select 成 row tuple，不建 ORM 物件
+_PUBLIC_COLUMNS = (
+    Product.id,
+    Product.name,
+    Product.price,
+    Product.description,
+    Product.description_text,
+    Product.category_id,
+    Product.image_url,
+    Product.is_active,
+    Product.stock_qty,
+)
+
+# 排序選項："-" 開頭 = 由大到小；價格排序用 (price, id) 當 keyset，同價也能穩定分頁
+SortKey = Literal["id", "-id", "price", "-price"]
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def _dump_public(rows: list, options: dict[int, tuple[dict, ...]]) -> bytes:
+    """
+    rows：_PUBLIC_COLUMNS 的 row；組 dict + 序列化（CPU 活，在 threadpool 跑）。
+    FAST_JSON_LISTS=0 時照樣經過 ProductPublicOut 驗證
+    """
+    data = [
+        {
+            "id": p.id,
+            "name": p.name,
+            "price": p.price,
+            "description": p.description or "",
+            "description_text": p.description_text or "",
+            "category_id": p.category_id,
+            "image_url": p.image_url or "",
+            "is_active": p.is_active,
+            "stock_qty": p.stock_qty,
+            "shipping_options": options.get(p.id, ()),
+        }
+        for p in rows
+    ]
+    if fast_json.enabled():
+        # ✅ 不建 Pydantic model：computed field 自己算，dict 直接交給 pydantic-core 輸出
+        for d in data:
+            d["image_variants"] = variant_urls(d["image_url"])
+        return _public_rows.dump_json(data)
+    return _public_list.dump_json(_public_list.validate_python(data))
+
+
+async def _build_public(db: AsyncSession, fetch) -> tuple[bytes, dict[str, str]]:
+    """fetch(sync_session) -> (rows, headers)：查詢走 run_sync，序列化丟 threadpool"""
+    def load(db: Session):
+        rows, headers = fetch(db)
+        # ✅ 運送選項從運費引擎拿（已整理好、有快取），不再每頁 selectin 查一次
+        return rows, product_options(db, [p.id for p in rows]), headers
+
+    rows, options, headers = await db.run_sync(load)
+    return await run_in_threadpool(_dump_public, rows, options), headers
+
+
+def _encode_cursor(sort: str, p: Product) -> str:
+    key = [p.id] if sort in ("id", "-id") else [p.price, p.id]
+    raw = json.dumps([sort, *key], separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+# cursor 裡 key 的個數：id 排序 [id]、價格排序 [price, id]、搜尋 [位移]
+_CURSOR_KEYS = {"id": 1, "-id": 1, "price": 2, "-price": 2, "rank": 1}
+
+
+def _decode_cursor(sort: str, cursor: str) -> list[int]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        cur_sort, *key = json.loads(raw)
+        if (
+            cur_sort != sort
+            or len(key) != _CURSOR_KEYS[sort]
+            or not all(isinstance(v, int) and not isinstance(v, bool) for v in key)
+        ):
+            raise ValueError
+    except (ValueError, TypeError, KeyError):
+        # ✅ 使用者亂傳的 cursor（非 list、長度不對、型別不對）一律 400，不會變成 500
+        raise HTTPException(status_code=400, detail="Invalid cursor") from None
+    return key
+
 
 @router.get("", response_model=list[ProductPublicOut])
-def list_products(db: Session = Depends(get_db)):
-    return (
-        db.query(Product)
-        .filter(Product.is_active == True)
-        .order_by(Product.id.asc())
-        .all()
-    )
+async def list_products(
+    request: Request,
+    db: AsyncSession = Depends(get_async_read_db),
+    category_id: int | None = None,
+    min_price: int | None = Query(default=None, ge=0),
+    max_price: int | None = Query(default=None, ge=0),
+    sort: SortKey = "id",
+    limit: int | None = Query(default=None, ge=1, le=200),
+    cursor: str | None = None,
+):
+    """
+    商品列表（只列上架中）。
+    - 不帶 limit：維持舊行為，一次回全部
+    - 帶 limit：keyset 分頁；還有下一頁時，response header X-Next-Cursor 會帶下一頁的 cursor
+    """
+    key = ("list", category_id, min_price, max_price, sort, limit, cursor)
+
+    def fetch(db: Session) -> tuple[list, dict[str, str]]:
+        q = db.query(*_PUBLIC_COLUMNS).filter(Product.is_active == True)
+
+        if category_id is not None:
+            q = q.filter(Product.category_id == category_id)
+        if min_price is not None:
+            q = q.filter(Product.price >= min_price)
+        if max_price is not None:
+            q = q.filter(Product.price <= max_price)
+
+        desc = sort.startswith("-")
+        if sort in ("id", "-id"):
+            cols = [Product.id]
+        else:
+            cols = [Product.price, Product.id]
+
+        if cursor:
+            after = _decode_cursor(sort, cursor)
+            kcol = cols[0] if len(cols) == 1 else tuple_(*cols)
+            kval = after[0] if len(cols) == 1 else tuple_(*after)
+            q = q.filter(kcol < kval if desc else kcol > kval)
 
+        q = q.order_by(*[c.desc() if desc else c.asc() for c in cols])
 
+        if limit is None:
+            rows = q.all()
+            headers: dict[str, str] = {}
+        else:
+            rows = q.limit(limit + 1).all()
+            headers = {}
+            if len(rows) > limit:
+                rows = rows[:limit]
+                headers[NEXT_CURSOR_HEADER] = _encode_cursor(sort, rows[-1])
+
+        return rows, headers
+
+    return await cached_json_response(request, PRODUCTS, key, lambda: _build_public(db, fetch))
+
+
+@router.get("/search", response_model=list[ProductPublicOut])
+async def search_products(
+    request: Request,
+    q: str = Query(min_length=1, max_length=100),
+    limit: int = Query(default=20, ge=1, le=50),
+    cursor: str | None = None,
+    db: AsyncSession = Depends(get_async_read_db),
+):
+    """
+    商品搜尋（名稱 / 描述，只搜上架中），相關度排序。
+    下一頁：response header X-Next-Cursor（相關度排序沒辦法 keyset，cursor 裡放的是位移）
+    """
+    offset = max(_decode_cursor("rank", cursor)[0], 0) if cursor else 0
+    key = ("search", q.strip().lower(), limit, offset)
+
+    def fetch(db: Session) -> tuple[list, dict[str, str]]:
+        rows = search(db, q, limit + 1, offset, columns=_PUBLIC_COLUMNS)
+        headers: dict[str, str] = {}
+        if len(rows) > limit:
+            rows = rows[:limit]
+            raw = json.dumps(["rank", offset + limit], separators=(",", ":")).encode()
+            headers[NEXT_CURSOR_HEADER] = base64.urlsafe_b64encode(raw).decode().rstrip("=")
+        return rows, headers
+
+    return await cached_json_response(request, PRODUCTS, key, lambda: _build_public(db, fetch))
+
+
+# ⚠️ 全部商品（含運送選項）一次驗證、沒有分頁：維持 sync 路由在 threadpool 跑，不放上 event loop
 @router.get("/admin", response_model=list[ProductOut])
-def list_products_admin(db: Session = Depends(get_db)):
-    return db.query(Product).order_by(Product.id.asc()).all()
+def list_products_admin(db: Session = Depends(get_read_db)):
+    rows = db.query(Product).order_by(Product.id.asc()).all()
+    return [ProductOut.model_validate(p) for p in rows]
 
 
 @router.get("/{product_id}", response_model=ProductPublicOut)
-def get_product(product_id: int, db: Session = Depends(get_db)):
-    p = (
-        db.query(Product)
-        .filter(Product.id == product_id, Product.is_active == True)
-        .first()
-    )
+async def get_product(product_id: int, db: AsyncSession = Depends(get_async_read_db)):
+    # ⚠️ ORM 物件要在 run_sync 裡轉好：回到 async 之後再 lazy load（shipping_options）會失敗
+    def load(db: Session) -> ProductPublicOut | None:
+        p = (
+            db.query(Product)
+            .filter(Product.id == product_id, Product.is_active == True)
+            .first()
+        )
+        return ProductPublicOut.model_validate(p) if p else None
+
+    p = await db.run_sync(load)
     if not p:
         raise HTTPException(status_code=404, detail="Product not found")
     return p
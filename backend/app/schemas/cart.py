@@ -0,0 +1,58 @@
+from datetime import datetime
+
+from pydantic import BaseModel, Field
+from typing import Optional, Literal, List
+
+from .order import CartItem, ShippingMethod
+
+# 品項不能買的原因
+LineProblem = Literal["not_found", "inactive", "insufficient_stock"]
+
+
+class CartQuoteIn(BaseModel):
+    items: List[CartItem] = Field(max_length=100)
+    # 有選就一起檢查這個運送方式能不能用、算運費；沒選就只列出可用的方式
+    shipping_method: Optional[ShippingMethod] = None
+    # 已經在結帳（有保留）：自己的保留量不算成被別人保留
+    reservation_token: Optional[str] = Field(default=None, max_length=64)
+
+
+class CartLineOut(BaseModel):
+    product_id: int
+    name: str = ""
+    image_url: str = ""
+    unit_price: int = 0          # 目前售價（以這個為準，不是前端快取的價格）
+    qty: int
+    line_total: int = 0
+    stock_qty: int = 0           # 可賣量（庫存扣掉別人結帳中的保留）
+    available: bool
+    problem: Optional[LineProblem] = None
+
+
+class ShippingQuoteOut(BaseModel):
+    method: ShippingMethod
+    fee: int
+
+
+class CartQuoteOut(BaseModel):
+    lines: List[CartLineOut]
+    subtotal: int
+    # 購物車裡「每一件商品都支援」的運送方式
+    shipping_options: List[ShippingQuoteOut]
+    shipping_method: Optional[ShippingMethod] = None
+    shipping_fee: int = 0
+    total: int
+    # 全部品項可買 +（有選運送方式時）運送方式可用 → 可以直接下單
+    ok: bool
+
+
+class ReservationIn(BaseModel):
+    items: List[CartItem] = Field(min_length=1, max_length=100)
+    # 帶舊 token = 購物車改了，整組換掉
+    token: Optional[str] = Field(default=None, max_length=64)
+
+
+class ReservationOut(BaseModel):
+    token: str
+    expires_at: datetime
+    items: List[CartItem]
@@ -37,10 +37,14 @@ class OrderCreate(BaseModel):
     # （可選擴充，先留著以後串物流/超取需要）
     cvs_store_address: Optional[str] = Field(default=None, max_length=200)
 
+    # ✅ 開始結帳時拿到的保留 token（POST /cart/reservations）；下單時轉成真的扣庫存
+    reservation_token: Optional[str] = Field(default=None, max_length=64)
+
 
 class OrderCreated(BaseModel):
     order_id: int
     total_amount: int
+    shipping_fee: int = 0
 
 
 class OrderShipIn(BaseModel):
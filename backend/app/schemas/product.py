@@ -1,5 +1,6 @@
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, computed_field
 from typing import List, Optional, Literal
+from ..services.image_service import variant_urls
 
 ShippingMethod = Literal["post", "cvs_711", "cvs_family", "courier"]
 
@@ -47,6 +48,12 @@ class ProductPublicOut(BaseModel):
 
     shipping_options: List[ShippingOptionPublic] = []
 
+    # ✅ 上傳圖的縮圖網址（thumb / list / detail）；列表頁用 list，不用下載原圖
+    @computed_field
+    @property
+    def image_variants(self) -> Optional[dict[str, str]]:
+        return variant_urls(self.image_url)
+
     class Config:
         from_attributes = True
         populate_by_name = True
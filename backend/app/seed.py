@@ -1,9 +1,10 @@
 import os
 from sqlalchemy.orm import Session
 
-from .db import SessionLocal, Base, engine
+from .db import SessionLocal
 from .models.product import Product
 from .models.product_shipping_option import ProductShippingOption
+from .services.search_service import index_product
 
 
 def get_or_create_product(db: Session, name: str, defaults: dict) -> Product:
@@ -18,6 +19,7 @@ def get_or_create_product(db: Session, name: str, defaults: dict) -> Product:
     row = Product(**defaults)
     db.add(row)
     db.flush()  # 先拿到 product.id
+    index_product(db, row)
     return row
 
 
@@ -124,7 +126,9 @@ def main() -> None:
         print("[seed] skipped (set SEED=1 to run)")
         return
 
-    Base.metadata.create_all(bind=engine)
+    from .migrate import upgrade
+
+    upgrade()
 
     db = SessionLocal()
     try:
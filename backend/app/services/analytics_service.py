@@ -0,0 +1,252 @@
+# backend/app/services/analytics_service.py
+"""
+銷售彙總（/admin/analytics 用）。
+
+兩張彙總表，主鍵就是查詢維度：
+- sales_daily_product(day, product_id)：訂單數 / 件數 / 商品金額
+- sales_daily_shipping(day, shipping_method)：訂單數 / 訂單總額 / 運費
+後台報表只讀區間內的幾百列，不用掃 orders / order_items。
+
+增量更新（跟訂單同一個 transaction，rollback 就一起不算）：
+- 下單：record_order(+1)
+- 改狀態：order_status.change_status() 進出 cancelled 時加 / 減整張訂單
+只算有效訂單（非 cancelled）；「哪一天」用 ANALYTICS_TIMEZONE 切。
+
+重建（彙總表壞掉 / 規則改了 / 第一次上線）：python -m app.rebuild_analytics
+"""
+from __future__ import annotations
+
+from collections import defaultdict
+from datetime import date, datetime, timedelta, timezone
+from typing import Any, Iterable
+from zoneinfo import ZoneInfo
+
+from sqlalchemy import delete, func, insert, or_, text, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+
+from ..config import settings
+from ..models.order import Order
+from ..models.order_item import OrderItem
+from ..models.product import Product
+from ..models.sales_rollup import SalesDailyProduct, SalesDailyShipping
+
+EXCLUDED_STATUSES = {"cancelled"}
+
+_PRODUCT_KEYS = ("day", "product_id")
+_SHIPPING_KEYS = ("day", "shipping_method")
+
+
+def counted(status: str | None) -> bool:
+    return status not in EXCLUDED_STATUSES
+
+
+def local_day(ts: datetime | None) -> date:
+    ts = ts or datetime.now(timezone.utc)
+    if ts.tzinfo is None:  # SQLite 讀回來是 naive（存的是 UTC）
+        ts = ts.replace(tzinfo=timezone.utc)
+    return ts.astimezone(ZoneInfo(settings.analytics_timezone)).date()
+
+
+def today() -> date:
+    return local_day(None)
+
+
+# ===== 寫入 =====
+
+def _add(db: Session, model, keys: tuple[str, ...], rows: list[dict]) -> None:
+    """每列「加上去」：沒有就插入（upsert），一種表一個 executemany"""
+    if not rows:
+        return
+    table = model.__table__
+    cols = [c for c in rows[0] if c not in keys]
+    dialect = db.get_bind().dialect.name
+    if dialect in ("sqlite", "postgresql"):
+        stmt = (sqlite_insert if dialect == "sqlite" else pg_insert)(table)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=list(keys),
+            set_={c: table.c[c] + stmt.excluded[c] for c in cols},
+        )
+        db.execute(stmt, rows)
+        return
+
+    for r in rows:
+        res = db.execute(
+            update(table)
+            .where(*(table.c[k] == r[k] for k in keys))
+            .values({c: table.c[c] + r[c] for c in cols})
+        )
+        if res.rowcount == 0:
+            db.execute(insert(table).values(**r))
+
+
+class _Totals:
+    """彙總用的暫存：{(day, product_id): [orders, qty, revenue]}、{(day, method): [orders, revenue, fee]}"""
+
+    def __init__(self) -> None:
+        self.products: dict[tuple, list[int]] = defaultdict(lambda: [0, 0, 0])
+        self.shipping: dict[tuple, list[int]] = defaultdict(lambda: [0, 0, 0])
+
+    def add_order(self, day: date, method: str, total: int, fee: int, lines: Iterable, sign: int = 1) -> None:
+        s = self.shipping[(day, method or "")]
+        s[0] += sign
+        s[1] += sign * (total or 0)
+        s[2] += sign * (fee or 0)
+
+        per_product: dict[int, list[int]] = defaultdict(lambda: [0, 0])
+        for product_id, qty, unit_price in lines:
+            per_product[product_id][0] += qty
+            per_product[product_id][1] += qty * unit_price
+        for product_id, (qty, revenue) in per_product.items():
+            p = self.products[(day, product_id)]
+            p[0] += sign
+            p[1] += sign * qty
+            p[2] += sign * revenue
+
+    def product_rows(self) -> list[dict]:
+        return [
+            {"day": d, "product_id": pid, "orders": o, "qty": q, "revenue": r}
+            for (d, pid), (o, q, r) in self.products.items()
+        ]
+
+    def shipping_rows(self) -> list[dict]:
+        return [
+            {"day": d, "shipping_method": m, "orders": o, "revenue": r, "shipping_fee": f}
+            for (d, m), (o, r, f) in self.shipping.items()
+        ]
+
+
+def record_order(db: Session, order: Order, lines: Iterable[tuple[int, int, int]], sign: int = 1) -> None:
+    """
+    把一張訂單加進（sign=-1：扣出）彙總；lines = [(product_id, qty, unit_price)]。
+    不 commit：跟訂單同一個 transaction。order.created_at 要有值（下單時明確給）。
+    """
+    t = _Totals()
+    t.add_order(local_day(order.created_at), order.shipping_method, order.total_amount, order.shipping_fee, lines, sign)
+    _add(db, SalesDailyProduct, _PRODUCT_KEYS, t.product_rows())
+    _add(db, SalesDailyShipping, _SHIPPING_KEYS, t.shipping_rows())
+
+
+def clear(db: Session) -> None:
+    db.execute(delete(SalesDailyProduct))
+    db.execute(delete(SalesDailyShipping))
+
+
+# ===== 重建 =====
+
+def _scan(db: Session, t: _Totals, after_id: int, batch_size: int) -> int:
+    """id > after_id 的有效訂單分批加進 t；回傳掃到的最後一個 order id"""
+    last_id = after_id
+    while True:
+        orders = (
+            db.query(Order.id, Order.created_at, Order.shipping_method, Order.total_amount, Order.shipping_fee)
+            .filter(Order.id > last_id, or_(Order.status.is_(None), Order.status.notin_(EXCLUDED_STATUSES)))
+            .order_by(Order.id.asc())
+            .limit(batch_size)
+            .all()
+        )
+        if not orders:
+            return last_id
+        lines: dict[int, list[tuple]] = defaultdict(list)
+        for oid, product_id, qty, unit_price in (
+            db.query(OrderItem.order_id, OrderItem.product_id, OrderItem.qty, OrderItem.unit_price)
+            .filter(OrderItem.order_id.in_([o.id for o in orders]))
+        ):
+            lines[oid].append((product_id, qty, unit_price))
+        for o in orders:
+            t.add_order(local_day(o.created_at), o.shipping_method, o.total_amount, o.shipping_fee, lines[o.id])
+        last_id = orders[-1].id
+
+
+def rebuild(db: Session, batch_size: int = 1000) -> dict[str, int]:
+    """
+    從訂單歷史重算彙總（會 commit），一個 transaction：
+    1. 先鎖住彙總表（下單 / 改狀態都要寫彙總表，鎖住期間會排隊等）
+    2. 分批掃完所有訂單，結果先放記憶體（大小 = 天數 × 商品數，跟訂單數無關）
+    3. 整批換掉、commit
+    ⚠️ 一定要先鎖再掃：先掃後鎖的話，已掃過的訂單在這中間進出 cancelled 會被漏掉
+       （那筆增量寫進舊的彙總表，接著被 clear 掉）。代價是重建期間下單 / 改狀態會等重建跑完，
+       重建是離線維運指令（python -m app.rebuild_analytics），可以接受。
+    """
+    if db.get_bind().dialect.name == "postgresql":
+        db.execute(text("LOCK TABLE sales_daily_product, sales_daily_shipping IN EXCLUSIVE MODE"))
+    clear(db)  # SQLite：第一個寫入就拿到整個 DB 的寫入鎖
+
+    t = _Totals()
+    _scan(db, t, 0, batch_size)
+
+    product_rows = [r for r in t.product_rows() if r["orders"]]
+    shipping_rows = [r for r in t.shipping_rows() if r["orders"]]
+    if product_rows:
+        db.execute(insert(SalesDailyProduct), product_rows)
+    if shipping_rows:
+        db.execute(insert(SalesDailyShipping), shipping_rows)
+    db.commit()
+    return {"product_rows": len(product_rows), "shipping_rows": len(shipping_rows)}
+
+
+# ===== 查詢 =====
+
+def summary(db: Session, date_from: date, date_to: date, top: int = 20) -> dict[str, Any]:
+    """[date_from, date_to) 的報表：每日、各物流方式、商品排行（全部只讀彙總表）"""
+    S, P = SalesDailyShipping, SalesDailyProduct
+
+    daily = (
+        db.query(S.day, func.sum(S.orders), func.sum(S.revenue), func.sum(S.shipping_fee))
+        .filter(S.day >= date_from, S.day < date_to)
+        .group_by(S.day)
+        .order_by(S.day)
+        .all()
+    )
+    by_method = (
+        db.query(S.shipping_method, func.sum(S.orders), func.sum(S.revenue), func.sum(S.shipping_fee))
+        .filter(S.day >= date_from, S.day < date_to)
+        .group_by(S.shipping_method)
+        .order_by(func.sum(S.revenue).desc())
+        .all()
+    )
+    revenue = func.sum(P.revenue)
+    by_product = (
+        db.query(P.product_id, Product.name, func.sum(P.orders), func.sum(P.qty), revenue)
+        .outerjoin(Product, Product.id == P.product_id)
+        .filter(P.day >= date_from, P.day < date_to)
+        .group_by(P.product_id, Product.name)
+        .having(func.sum(P.orders) > 0)
+        .order_by(revenue.desc(), P.product_id)
+        .limit(top)
+        .all()
+    )
+
+    def _n(v) -> int:
+        return int(v or 0)
+
+    daily_rows = [
+        {"day": d.isoformat(), "orders": _n(o), "revenue": _n(r), "shipping_fee": _n(f)}
+        for d, o, r, f in daily
+        if _n(o)
+    ]
+    return {
+        "from": date_from.isoformat(),
+        "to": date_to.isoformat(),
+        "totals": {
+            "orders": sum(x["orders"] for x in daily_rows),
+            "revenue": sum(x["revenue"] for x in daily_rows),
+            "shipping_fee": sum(x["shipping_fee"] for x in daily_rows),
+        },
+        "daily": daily_rows,
+        "by_shipping_method": [
+            {"shipping_method": m, "orders": _n(o), "revenue": _n(r), "shipping_fee": _n(f)}
+            for m, o, r, f in by_method
+            if _n(o)
+        ],
+        "top_products": [
+            {"product_id": pid, "name": name, "orders": _n(o), "qty": _n(q), "revenue": _n(r)}
+            for pid, name, o, q, r in by_product
+        ],
+    }
+
+
+def default_range(days: int = 30) -> tuple[date, date]:
+    end = today() + timedelta(days=1)
+    return end - timedelta(days=days), end
@@ -0,0 +1,133 @@
+# backend/app/services/catalog_cache.py
+"""
+商品 / 分類列表的行程內快取（in-process）。
+
+- 存的是「已序列化好的 JSON bytes」，命中時完全不碰 DB、也不跑 Pydantic
+- 用 namespace 版本號失效：後台寫入（admin_products / admin_categories）或下單把商品賣完時 bump
+- 每筆 entry 另有 TTL：多個 uvicorn worker 各有一份快取，別的 worker 改了資料，最晚 TTL 秒後也會更新
+- ETag 用內容 hash（不是版本號），不同 worker / 重啟後同樣內容仍是同一個 ETag，瀏覽器可拿 304
+"""
+from __future__ import annotations
+
+import hashlib
+import threading
+import time
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Hashable
+
+from fastapi import Request, Response
+
+from ..config import settings
+
+PRODUCTS = "products"
+CATEGORIES = "categories"
+
+# 參數組合（分頁 cursor / 篩選）可能很多：超過上限先丟過期的，再丟最舊的
+_MAX_ENTRIES = 2048
+
+# build() 回傳：(JSON bytes, 額外 response headers)
+Built = tuple[bytes, dict[str, str]]
+
+
+@dataclass(frozen=True)
+class _Entry:
+    version: int
+    body: bytes
+    headers: dict[str, str]
+    etag: str
+    expires_at: float
+
+
+class CatalogCache:
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._versions: dict[str, int] = {}
+        self._entries: dict[tuple[str, Hashable], _Entry] = {}
+
+    def version(self, ns: str) -> int:
+        return self._versions.get(ns, 0)
+
+    def invalidate(self, *namespaces: str) -> None:
+        with self._lock:
+            for ns in namespaces:
+                self._versions[ns] = self._versions.get(ns, 0) + 1
+            # 舊 entry 直接丟掉，避免參數組合多時越積越多
+            self._entries = {k: v for k, v in self._entries.items() if k[0] not in namespaces}
+
+    def clear(self) -> None:
+        with self._lock:
+            self._versions.clear()
+            self._entries.clear()
+
+    def _evict(self, now: float) -> None:
+        self._entries = {k: v for k, v in self._entries.items() if v.expires_at > now}
+        while len(self._entries) >= _MAX_ENTRIES:
+            self._entries.pop(next(iter(self._entries)))
+
+    async def get_or_build(
+        self, ns: str, key: Hashable, build: Callable[[], Awaitable[Built]], *, fresh: bool = False
+    ) -> _Entry:
+        """fresh=True：不看現有的 entry，重建後存回去（主庫讀到的最新內容，別人也用得到）"""
+        now = time.monotonic()
+        entry = None if fresh else self._entries.get((ns, key))
+        if entry and entry.version == self.version(ns) and entry.expires_at > now:
+            return entry
+
+        # ⚠️ 先記下版本再 build：build 途中若被 invalidate，存進去的 entry 版本已過期，下次會重建
+        version = self.version(ns)
+        body, headers = await build()
+        ttl = max(int(getattr(settings, "catalog_cache_ttl_seconds", 30) or 0), 0)
+        entry = _Entry(version, body, headers, _etag(body), now + ttl)
+
+        with self._lock:
+            if version == self.version(ns):
+                if len(self._entries) >= _MAX_ENTRIES:
+                    self._evict(now)
+                self._entries[(ns, key)] = entry
+        return entry
+
+
+catalog_cache = CatalogCache()
+
+
+def _etag(body: bytes) -> str:
+    return f'"{hashlib.sha1(body).hexdigest()}"'
+
+
+def invalidate(*namespaces: str) -> None:
+    catalog_cache.invalidate(*namespaces)
+
+
+def _etag_matches(if_none_match: str | None, etag: str) -> bool:
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    tags = [t.strip().removeprefix("W/") for t in if_none_match.split(",")]
+    return etag in tags
+
+
+async def cached_json_response(
+    request: Request,
+    ns: str,
+    key: Hashable,
+    build: Callable[[], Awaitable[Built]],
+) -> Response:
+    """
+    命中快取就直接回 bytes；If-None-Match 相同就回 304（連 body 都不送）。
+    build 是 coroutine（async 路由裡通常是 db.run_sync(...)）：命中時不碰 DB、也不佔 thread。
+    """
+    if int(getattr(settings, "enable_catalog_cache", 1) or 0) != 1:
+        body, extra = await build()
+        etag = _etag(body)
+    else:
+        # ⚠️ 後台剛寫入、讀取被 pin 到主庫的 client（db.stick_to_primary）：快取可能是別的 request
+        #    在失效後從還沒追上的副本重建的，對它來說是舊資料，所以直接重建
+        fresh = bool(getattr(request.state, "read_primary", False))
+        entry = await catalog_cache.get_or_build(ns, key, build, fresh=fresh)
+        body, extra, etag = entry.body, entry.headers, entry.etag
+
+    headers = {"ETag": etag, "Cache-Control": "no-cache", **extra}
+    if _etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
@@ -0,0 +1,139 @@
+# backend/app/services/checkout_service.py
+"""
+結帳保留庫存（限時）。
+
+- reserve()：開始結帳時呼叫，替這台購物車保留數量 STOCK_RESERVATION_TTL_SECONDS 秒
+  可賣量不夠就整台失敗（跟下單一樣是 400 Insufficient stock）
+- 下單時帶 reservation_token：扣庫存時不把「自己的保留量」算成別人的，扣完 consume() 刪掉保留
+- 沒下單的保留過期後自動不算（查詢都帶 expires_at > now），housekeeping 再定期 sweep_expired() 刪掉
+
+可賣量 = stock_qty - SUM(未過期保留)，走 ix_stock_reservations_product_expires（product_id, expires_at, qty）。
+
+⚠️ 併發：先鎖商品列再讀保留量
+- Postgres：SELECT ... FOR UPDATE（依 id 排序，避免 deadlock）
+- SQLite：先做一次 no-op UPDATE 拿到寫入鎖（之後的讀取都在鎖內，不會兩邊都以為還有貨）
+"""
+from __future__ import annotations
+
+import secrets
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Iterable
+
+from fastapi import HTTPException
+from sqlalchemy import delete, func, select, update
+from sqlalchemy.orm import Session
+
+from ..config import settings
+from ..models.product import Product
+from ..models.stock_reservation import StockReservation
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+@dataclass(frozen=True)
+class Reservation:
+    token: str
+    expires_at: datetime
+    items: dict[int, int]
+
+
+def lock_products(db: Session, product_ids: Iterable[int]) -> None:
+    ids = sorted(set(product_ids))
+    if not ids:
+        return
+    if db.get_bind().dialect.name == "sqlite":
+        db.execute(
+            update(Product)
+            .where(Product.id.in_(ids))
+            .values(stock_qty=Product.stock_qty)
+            .execution_options(synchronize_session=False)
+        )
+    else:
+        db.execute(select(Product.id).where(Product.id.in_(ids)).order_by(Product.id).with_for_update())
+
+
+def held_qty(product_id, now: datetime, exclude_token: str | None = None):
+    """某商品目前被（別人）保留的數量：correlated scalar subquery，給條件式 UPDATE 用"""
+    q = select(func.coalesce(func.sum(StockReservation.qty), 0)).where(
+        StockReservation.product_id == product_id,
+        StockReservation.expires_at > now,
+    )
+    if exclude_token:
+        q = q.where(StockReservation.token != exclude_token)
+    return q.scalar_subquery()
+
+
+def available_stock(
+    db: Session,
+    product_ids: Iterable[int],
+    exclude_token: str | None = None,
+) -> dict[int, int]:
+    """{product_id: 可賣量}（下架 / 不存在的商品不會出現）"""
+    ids = list(set(product_ids))
+    if not ids:
+        return {}
+    now = _now()
+    rows = db.execute(
+        select(Product.id, Product.stock_qty - held_qty(Product.id, now, exclude_token))
+        .where(Product.id.in_(ids), Product.is_active == True)
+    ).all()
+    return {pid: max(int(avail or 0), 0) for pid, avail in rows}
+
+
+def reserve(
+    db: Session,
+    items: dict[int, int],
+    token: str | None = None,
+    ttl_seconds: int | None = None,
+) -> Reservation:
+    """
+    保留一台購物車（同一個 token 再呼叫 = 購物車改了，整組換掉）。
+    會 commit；不夠就 rollback 並丟 400。
+    """
+    token = token or secrets.token_hex(16)
+    ttl = ttl_seconds if ttl_seconds is not None else settings.stock_reservation_ttl_seconds
+    expires_at = _now() + timedelta(seconds=ttl)
+
+    lock_products(db, items)
+    # 換掉同 token 的舊保留（在鎖裡做，不會短暫放出去被別人搶走）
+    db.execute(delete(StockReservation).where(StockReservation.token == token))
+
+    avail = available_stock(db, items)
+    for pid, qty in sorted(items.items()):
+        if pid not in avail:
+            db.rollback()
+            raise HTTPException(status_code=400, detail=f"Invalid product_id: {pid}")
+        if qty > avail[pid]:
+            db.rollback()
+            raise HTTPException(
+                status_code=400,
+                detail=f"Insufficient stock: product_id={pid}, available={avail[pid]}, requested={qty}",
+            )
+        db.add(StockReservation(token=token, product_id=pid, qty=qty, expires_at=expires_at))
+
+    db.commit()
+    return Reservation(token=token, expires_at=expires_at, items=dict(items))
+
+
+def consume(db: Session, token: str) -> None:
+    """下單成功：保留轉成真的扣庫存（跟訂單同一個 transaction，不 commit）"""
+    db.execute(delete(StockReservation).where(StockReservation.token == token))
+
+
+def release(db: Session, token: str) -> int:
+    res = db.execute(delete(StockReservation).where(StockReservation.token == token))
+    db.commit()
+    return res.rowcount or 0
+
+
+def sweep_expired(db: Session) -> int:
+    res = db.execute(
+        delete(StockReservation)
+        .where(StockReservation.expires_at <= _now())
+        .execution_options(synchronize_session=False)
+    )
+    db.commit()
+    return res.rowcount or 0
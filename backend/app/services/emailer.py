@@ -9,22 +9,41 @@ logger = logging.getLogger(__name__)
 RESEND_ENDPOINT = "https://api.resend.com/emails"
 
 
-def _api_send_resend(to_email: str, subject: str, body: str) -> None:
+def resend_request(warn: bool = True) -> tuple[dict, dict] | None:
+    """
+    組 Resend 的 headers / 共用 payload（不含 to / subject / text）。
+    設定不齊就回 None（同步寄信和 outbox sender 共用同一套檢查）；warn=False 不記 log（outbox 輪詢用）
+    """
     api_key = getattr(settings, "resend_api_key", None)  # 對應環境變數 RESEND_API_KEY
     from_email = (getattr(settings, "smtp_from_email", None) or "").strip()  # 你沿用原本變數名
     from_name = (getattr(settings, "smtp_from_name", None) or "A-kâu Shop").strip()
 
     if not api_key:
-        logger.warning("[email] RESEND_API_KEY missing")
-        return
+        if warn:
+            logger.warning("[email] RESEND_API_KEY missing")
+        return None
 
     # Resend 多數情況會要求 From 網域已驗證；不要用假的預設值硬送
     if not from_email:
-        logger.warning("[email] SMTP_FROM_EMAIL missing (used as From)")
+        if warn:
+            logger.warning("[email] SMTP_FROM_EMAIL missing (used as From)")
+        return None
+
+    return {"Authorization": f"Bearer {api_key}"}, {"from": f"{from_name} <{from_email}>"}
+
+
+def resend_endpoint() -> str:
+    return (getattr(settings, "resend_endpoint", None) or RESEND_ENDPOINT).strip()
+
+
+def _api_send_resend(to_email: str, subject: str, body: str) -> None:
+    req = resend_request()
+    if req is None:
         return
+    headers, base = req
 
     payload = {
-        "from": f"{from_name} <{from_email}>",
+        **base,
         "to": [to_email],
         "subject": subject,
         "text": body,
@@ -32,8 +51,8 @@ def _api_send_resend(to_email: str, subject: str, body: str) -> None:
 
     with httpx.Client(timeout=15) as client:
         r = client.post(
-            RESEND_ENDPOINT,
-            headers={"Authorization": f"Bearer {api_key}"},
+            resend_endpoint(),
+            headers=headers,
             json=payload,
         )
 
@@ -0,0 +1,33 @@
+# backend/app/services/fast_json.py
+"""
+列表 API 的快速序列化（FAST_JSON_LISTS=1 才開，預設走原本的路）。
+
+原本：ORM 物件 → Pydantic model（from_attributes，一筆一筆驗證，含巢狀的運送選項）
+      → jsonable_encoder → json.dumps
+快速：只 select 需要的欄位（row tuple）→ 組成 dict → 事先建好的 TypeAdapter.dump_json（pydantic-core）
+      → 直接回 Response(bytes)，FastAPI 不再驗證 / 轉換一次
+輸出的 JSON 跟原本逐 byte 相同（tests/test_fast_json.py 比對），前端不用改。
+
+⚠️ 資料是 DB 讀出來的，不是使用者輸入：跳過驗證是安全的；欄位型別以 TypedDict 為準，
+   改 schema 時兩邊要一起改（測試會抓到不一致）。
+"""
+from __future__ import annotations
+
+from typing import Any, Mapping
+
+from fastapi import Response
+from pydantic import TypeAdapter
+
+from ..config import settings
+
+
+def enabled() -> bool:
+    return int(getattr(settings, "fast_json_lists", 0) or 0) == 1
+
+
+def json_response(adapter: TypeAdapter, data: Any, headers: Mapping[str, str] | None = None) -> Response:
+    """
+    不經過 response_model 直接回 bytes。
+    ⚠️ 回傳 Response 時 FastAPI 不會合併路由參數 response 上設的 header，要自己帶進來
+    """
+    return Response(content=adapter.dump_json(data), media_type="application/json", headers=dict(headers or {}))
@@ -0,0 +1,45 @@
+# backend/app/services/housekeeping.py
+"""
+定期清理（跟 API 同行程跑；多個 worker 一起跑也沒關係，都是條件式 DELETE）：
+- 過期的 Idempotency-Key
+- 過期的結帳保留（過期的本來就不算進可賣量，這裡只是把列刪掉）
+- 庫存快照往前推（快照用條件式 upsert，只會前進）
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+from typing import Callable
+
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from ..config import settings
+from ..db import SessionLocal
+from . import checkout_service, idempotency_service, inventory_service
+
+logger = logging.getLogger(__name__)
+
+
+def run_once(session_factory: Callable[[], Session] = SessionLocal) -> dict[str, int]:
+    with session_factory() as db:
+        return {
+            "idempotency_keys": idempotency_service.purge_expired(db),
+            "stock_reservations": checkout_service.sweep_expired(db),
+            "stock_snapshots": inventory_service.compact(db),
+        }
+
+
+async def run_forever(stop: asyncio.Event, interval: float | None = None) -> None:
+    interval = interval if interval is not None else settings.housekeeping_interval_seconds
+    while not stop.is_set():
+        try:
+            removed = await run_in_threadpool(run_once)
+            if any(removed.values()):
+                logger.info("[housekeeping] %s", removed)
+        except Exception:
+            logger.exception("[housekeeping] run failed")
+        try:
+            await asyncio.wait_for(stop.wait(), timeout=interval)
+        except asyncio.TimeoutError:
+            pass
@@ -0,0 +1,173 @@
+# backend/app/services/idempotency_service.py
+"""
+Idempotency-Key（目前給 POST /orders 用）。
+
+流程：
+1. begin()：插一列 in_progress 佔位（立刻 commit，別的請求才看得到）
+   - 插不進去 = 這把 key 已經有人用過：
+     done → 直接回存好的回應；in_progress → 等它做完（最多 IDEMPOTENCY_WAIT_SECONDS）
+   - 處理中的 worker 當掉（租約過期）→ 用條件式 UPDATE 搶租約，搶到的人接手
+2. complete()：跟訂單同一個 transaction 把結果寫回 → 訂單成立 = 結果一定存在
+3. 4xx（庫存不足等）也存起來，同一把 key 重送拿到一樣的答案；5xx / 非預期錯誤則 release() 讓客戶端重試
+4. 過期的 key 由 housekeeping 定期 purge_expired()
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any
+
+from fastapi import HTTPException
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+from sqlalchemy import delete, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from ..config import settings
+from ..models.idempotency_key import IdempotencyKey
+
+IN_PROGRESS = "in_progress"
+DONE = "done"
+
+HEADER = "Idempotency-Key"
+REPLAYED_HEADER = "Idempotent-Replayed"
+
+LEASE_SECONDS = 30
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def request_hash(payload: BaseModel) -> str:
+    raw = json.dumps(payload.model_dump(mode="json"), sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+
+def _replay(row: IdempotencyKey) -> JSONResponse:
+    return JSONResponse(
+        status_code=row.response_code or 200,
+        content=json.loads(row.response_body or "null"),
+        headers={REPLAYED_HEADER: "true"},
+    )
+
+
+def _try_insert(db: Session, scope: str, key: str, req_hash: str) -> bool:
+    """
+    插佔位列（會 commit）；False = 這把 key 已經有了。
+    ⚠️ 用 Core insert，不用 db.add()：重試時 session 裡可能已經有上一輪讀到的同一把 key，
+       再 add 一個同主鍵的物件會撞 identity map（SAWarning）
+    """
+    now = _now()
+    row = {
+        "scope": scope,
+        "key": key,
+        "request_hash": req_hash,
+        "status": IN_PROGRESS,
+        "locked_until": now + timedelta(seconds=LEASE_SECONDS),
+        "expires_at": now + timedelta(seconds=settings.idempotency_ttl_seconds),
+    }
+    table = IdempotencyKey.__table__
+    dialect = db.get_bind().dialect.name
+    if dialect in ("sqlite", "postgresql"):
+        stmt = (sqlite_insert if dialect == "sqlite" else pg_insert)(table).values(**row)
+        res = db.execute(stmt.on_conflict_do_nothing(index_elements=["scope", "key"]))
+        db.commit()
+        return res.rowcount == 1
+    try:
+        db.execute(table.insert().values(**row))
+        db.commit()
+        return True
+    except IntegrityError:
+        db.rollback()
+        return False
+
+
+def _take_over(db: Session, scope: str, key: str) -> bool:
+    now = _now()
+    res = db.execute(
+        update(IdempotencyKey)
+        .where(
+            IdempotencyKey.scope == scope,
+            IdempotencyKey.key == key,
+            IdempotencyKey.status == IN_PROGRESS,
+            IdempotencyKey.locked_until < now,
+        )
+        .values(locked_until=now + timedelta(seconds=LEASE_SECONDS))
+        .execution_options(synchronize_session=False)
+    )
+    db.commit()
+    return res.rowcount == 1
+
+
+def begin(db: Session, scope: str, key: str, req_hash: str) -> JSONResponse | None:
+    """
+    None = 你是這把 key 的處理者，去做事（做完記得 complete / release）；
+    否則回傳要直接給客戶端的回應（重播）。
+    """
+    deadline = time.monotonic() + settings.idempotency_wait_seconds
+    delay = 0.02
+    while True:
+        if _try_insert(db, scope, key, req_hash):
+            return None
+
+        row = (
+            db.query(IdempotencyKey)
+            .filter(IdempotencyKey.scope == scope, IdempotencyKey.key == key)
+            .populate_existing()
+            .first()
+        )
+        # ⚠️ 結束這次讀取的 transaction：下一輪才看得到別人剛 commit 的結果（SQLite 會固定 snapshot）
+        db.rollback()
+
+        if row is not None:
+            if row.request_hash != req_hash:
+                raise HTTPException(status_code=422, detail=f"{HEADER} was already used with a different request")
+            if row.status == DONE:
+                return _replay(row)
+            if _take_over(db, scope, key):
+                return None
+
+        if time.monotonic() >= deadline:
+            raise HTTPException(
+                status_code=409,
+                detail=f"A request with this {HEADER} is still in progress",
+                headers={"Retry-After": "1"},
+            )
+        time.sleep(delay)
+        delay = min(delay * 2, 0.25)
+
+
+def complete(db: Session, scope: str, key: str, status_code: int, body: Any) -> None:
+    """把結果寫回（不 commit：呼叫端跟自己的資料一起 commit）"""
+    db.execute(
+        update(IdempotencyKey)
+        .where(IdempotencyKey.scope == scope, IdempotencyKey.key == key)
+        .values(
+            status=DONE,
+            response_code=status_code,
+            response_body=json.dumps(body, ensure_ascii=False),
+        )
+        .execution_options(synchronize_session=False)
+    )
+
+
+def release(db: Session, scope: str, key: str) -> None:
+    """處理失敗（非預期錯誤）：刪掉佔位，客戶端用同一把 key 重試會重新處理"""
+    db.execute(delete(IdempotencyKey).where(IdempotencyKey.scope == scope, IdempotencyKey.key == key))
+    db.commit()
+
+
+def purge_expired(db: Session) -> int:
+    res = db.execute(
+        delete(IdempotencyKey)
+        .where(IdempotencyKey.expires_at < _now())
+        .execution_options(synchronize_session=False)
+    )
+    db.commit()
+    return res.rowcount or 0
@@ -0,0 +1,154 @@
+# backend/app/services/image_service.py
+"""
+商品圖片：內容定址（sha256 檔名）+ 預先產生縮圖（WebP）。
+
+- 檔名 = 內容 sha256：同一張圖重傳不會多一份
+- MIME 看檔頭 magic bytes，不信任瀏覽器送來的 Content-Type
+- 縮圖在 thread pool 跑（Pillow 解碼 / 縮放 / 編碼時會放掉 GIL），不卡 event loop
+- Pillow 沒裝也能上傳，只是不產縮圖
+- 回給前端的縮圖網址只列磁碟上真的有的檔（縮圖失敗 / 舊圖不會給出 404 的網址）
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from ..config import UPLOAD_DIR
+
+try:
+    from PIL import Image
+except ImportError:  # pragma: no cover - 沒裝 Pillow 時只存原圖
+    Image = None
+
+logger = logging.getLogger(__name__)
+
+HAS_PIL = Image is not None
+
+# 名稱 -> 最長邊（px）；只縮不放大
+VARIANTS: dict[str, int] = {
+    "thumb": 160,
+    "list": 480,
+    "detail": 1200,
+}
+VARIANT_QUALITY = 82
+
+EXT = {
+    "image/jpeg": ".jpg",
+    "image/png": ".png",
+    "image/webp": ".webp",
+    "image/gif": ".gif",
+}
+
+_CONTENT_NAME = re.compile(r"^/uploads/([0-9a-f]{64})\.(?:jpg|png|webp|gif)$")
+
+# ✅ 第一次產縮圖時才建 thread pool：import app / 跑 migrate / 跑 worker 不會多開執行緒
+_pool: ThreadPoolExecutor | None = None
+
+# digest -> (存在的縮圖網址 or None, 檢查時間)；檔名是內容雜湊，有了就不會變
+_variant_cache: dict[str, tuple[dict[str, str] | None, float]] = {}
+# 缺縮圖的結果隔一陣子再看一次磁碟（別的 worker 可能剛補產）
+MISSING_RECHECK_SECONDS = 60.0
+_VARIANT_CACHE_MAX = 10_000
+
+
+def _executor() -> ThreadPoolExecutor:
+    global _pool
+    if _pool is None:
+        _pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix="image-variants")
+    return _pool
+
+
+def sniff_mime(head: bytes) -> str | None:
+    """用檔頭判斷圖片格式（只認我們允許的四種）"""
+    if head.startswith(b"\xff\xd8\xff"):
+        return "image/jpeg"
+    if head.startswith(b"\x89PNG\r\n\x1a\n"):
+        return "image/png"
+    if head[:6] in (b"GIF87a", b"GIF89a"):
+        return "image/gif"
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return "image/webp"
+    return None
+
+
+def variant_name(digest: str, variant: str) -> str:
+    return f"{digest}_{variant}.webp"
+
+
+def _scan_variants(digest: str) -> dict[str, str] | None:
+    found = {
+        v: f"/uploads/{variant_name(digest, v)}"
+        for v in VARIANTS
+        if (UPLOAD_DIR / variant_name(digest, v)).is_file()
+    }
+    return found or None
+
+
+def _remember(digest: str, urls: dict[str, str] | None) -> None:
+    if len(_variant_cache) >= _VARIANT_CACHE_MAX:
+        _variant_cache.clear()
+    _variant_cache[digest] = (urls, time.monotonic())
+
+
+def variant_urls(image_url: str | None) -> dict[str, str] | None:
+    """
+    內容定址的上傳圖（/uploads/<sha256>.<ext>）回傳磁碟上已產生的縮圖網址；
+    舊的 uuid 檔名 / 外部網址 / 縮圖產生失敗的圖回 None，前端退回用原圖
+    """
+    if not image_url:
+        return None
+    m = _CONTENT_NAME.match(image_url)
+    if not m:
+        return None
+    digest = m.group(1)
+
+    hit = _variant_cache.get(digest)
+    if hit is not None:
+        urls, checked_at = hit
+        # ⚠️ 三種都齊了才永久快取；缺的過一段時間重查
+        if (urls is not None and len(urls) == len(VARIANTS)) or time.monotonic() - checked_at < MISSING_RECHECK_SECONDS:
+            return urls
+
+    urls = _scan_variants(digest)
+    _remember(digest, urls)
+    return urls
+
+
+def make_variants(src: Path, digest: str) -> dict[str, str]:
+    """產生（或沿用已存在的）各尺寸 WebP，回傳 variant -> 檔名"""
+    if not HAS_PIL:
+        return {}
+
+    out: dict[str, str] = {}
+    missing = {v: size for v, size in VARIANTS.items() if not (src.parent / variant_name(digest, v)).exists()}
+
+    if missing:
+        with Image.open(src) as im:
+            im.seek(0)  # GIF 動圖取第一格
+            im = im.convert("RGBA" if im.mode in ("RGBA", "LA", "P") else "RGB")
+            # 由大到小縮：每次從上一個尺寸縮，省時間
+            for v, size in sorted(missing.items(), key=lambda kv: -kv[1]):
+                im.thumbnail((size, size), Image.Resampling.LANCZOS)
+                tmp = src.parent / f".{variant_name(digest, v)}.tmp"
+                im.save(tmp, "WEBP", quality=VARIANT_QUALITY, method=4)
+                tmp.replace(src.parent / variant_name(digest, v))
+
+    for v in VARIANTS:
+        out[v] = variant_name(digest, v)
+    _remember(digest, {v: f"/uploads/{name}" for v, name in out.items()})
+    return out
+
+
+async def make_variants_async(src: Path, digest: str) -> dict[str, str]:
+    loop = asyncio.get_running_loop()
+    try:
+        return await loop.run_in_executor(_executor(), make_variants, src, digest)
+    except Exception:
+        # 縮圖失敗（壞檔 / 特殊格式）不擋上傳，前端退回用原圖
+        logger.exception("[upload] variant generation failed: %s", src.name)
+        _remember(digest, _scan_variants(digest))  # 可能留下部分尺寸
+        return {}
@@ -0,0 +1,238 @@
+# backend/app/services/inventory_service.py
+"""
+庫存異動帳（stock_movements）+ 快照（stock_snapshots）。
+
+- 每次改 products.stock_qty 都在同一個 transaction 記一筆異動：
+    sale（下單扣）、restock（取消訂單補回）、adjustment（後台改數量）、import（批次匯入）
+  ref 記來源（order:123 / admin / import），對不起來時查得到是誰動的
+- 帳上庫存 = 最近快照 + 快照之後的異動；compact()（housekeeping 定期跑）把快照往前推，
+  查帳永遠只加總一小段。STOCK_MOVEMENT_RETENTION_DAYS > 0 時，已進快照又夠舊的異動會刪掉
+- products.stock_qty 還是下單時條件式扣庫存的那個數字（超賣保護不變）；drift() 可以比對兩邊
+
+⚠️ 改成「設定成某個數量」（後台 / 匯入）時先 lock_products 再讀現值，delta 才不會跟同時的下單算錯。
+"""
+from __future__ import annotations
+
+from datetime import datetime, timedelta, timezone
+from typing import Iterable
+
+from fastapi import HTTPException
+from sqlalchemy import delete, func, select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+
+from ..config import settings
+from ..models.product import Product
+from ..models.stock_movement import StockMovement, StockSnapshot
+from .checkout_service import held_qty, lock_products
+
+SALE = "sale"
+RESTOCK = "restock"
+ADJUSTMENT = "adjustment"
+IMPORT = "import"
+
+# 還沒 commit 的異動不能進快照：只壓縮「這麼久以前」的（transaction 都比這短）
+SNAPSHOT_GRACE_SECONDS = 60
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def order_ref(order_id: int) -> str:
+    return f"order:{order_id}"
+
+
+def record(db: Session, movements: Iterable[tuple[int, int, str, str]]) -> None:
+    """記異動 [(product_id, delta, reason, ref)]（不 commit；delta = 0 的略過）"""
+    now = _now()
+    rows = [
+        {"product_id": pid, "delta": delta, "reason": reason, "ref": ref, "created_at": now}
+        for pid, delta, reason, ref in movements
+        if delta
+    ]
+    if rows:
+        db.execute(StockMovement.__table__.insert(), rows)
+
+
+def set_stock(db: Session, targets: dict[int, int], reason: str, ref: str) -> None:
+    """
+    把商品庫存「設成」指定數量（後台修改 / 匯入），差額記成異動。
+    先鎖商品列再讀現值，跟同時的下單不會互相覆蓋；不 commit。
+    """
+    if not targets:
+        return
+    lock_products(db, targets)
+    current = dict(db.execute(select(Product.id, Product.stock_qty).where(Product.id.in_(list(targets)))).all())
+    changes = [(pid, qty - (current[pid] or 0)) for pid, qty in sorted(targets.items()) if pid in current]
+    for pid, _ in changes:
+        db.execute(
+            update(Product)
+            .where(Product.id == pid)
+            .values(stock_qty=targets[pid])
+            .execution_options(synchronize_session=False)
+        )
+    record(db, ((pid, delta, reason, ref) for pid, delta in changes))
+
+
+def restock(db: Session, order_id: int, lines: Iterable[tuple[int, int]]) -> None:
+    """取消訂單：把件數加回庫存（lines = [(product_id, qty)]）"""
+    lines = sorted(lines)
+    lock_products(db, [pid for pid, _ in lines])
+    for pid, qty in lines:
+        db.execute(
+            update(Product)
+            .where(Product.id == pid)
+            .values(stock_qty=Product.stock_qty + qty)
+            .execution_options(synchronize_session=False)
+        )
+    record(db, ((pid, qty, RESTOCK, order_ref(order_id)) for pid, qty in lines))
+
+
+def deduct(db: Session, order_id: int, lines: Iterable[tuple[int, int]]) -> None:
+    """取消的訂單又改回有效：重新扣庫存（跟下單同一套條件式 UPDATE，不夠就 400）"""
+    lines = sorted(lines)
+    now = _now()
+    lock_products(db, [pid for pid, _ in lines])
+    for pid, qty in lines:
+        res = db.execute(
+            update(Product)
+            .where(Product.id == pid, Product.stock_qty - held_qty(Product.id, now) >= qty)
+            .values(stock_qty=Product.stock_qty - qty)
+            .execution_options(synchronize_session=False)
+        )
+        if res.rowcount != 1:
+            db.rollback()
+            raise HTTPException(
+                status_code=400,
+                detail=f"Insufficient stock to reopen order: product_id={pid}, requested={qty}",
+            )
+    record(db, ((pid, -qty, SALE, order_ref(order_id)) for pid, qty in lines))
+
+
+def forget_product(db: Session, product_id: int) -> None:
+    """刪商品前呼叫（只有沒出現在訂單裡的商品能刪，帳上只會有後台 / 匯入的異動）"""
+    db.execute(delete(StockMovement).where(StockMovement.product_id == product_id))
+    db.execute(delete(StockSnapshot).where(StockSnapshot.product_id == product_id))
+
+
+# ===== 帳上庫存 =====
+
+def ledger_stock(db: Session, product_ids: Iterable[int]) -> dict[int, int]:
+    """{product_id: 快照 + 之後異動}；只加總快照之後那一段（走 product_id, id 的 index）"""
+    ids = list(set(product_ids))
+    if not ids:
+        return {}
+    snaps = {
+        pid: (qty, mid)
+        for pid, qty, mid in db.query(StockSnapshot.product_id, StockSnapshot.qty, StockSnapshot.movement_id)
+        .filter(StockSnapshot.product_id.in_(ids))
+    }
+    out: dict[int, int] = {}
+    for pid in ids:
+        qty, after = snaps.get(pid, (0, 0))
+        recent = (
+            db.query(func.coalesce(func.sum(StockMovement.delta), 0))
+            .filter(StockMovement.product_id == pid, StockMovement.id > after)
+            .scalar()
+        )
+        out[pid] = qty + int(recent or 0)
+    return out
+
+
+def drift(db: Session, product_id: int) -> dict[str, int] | None:
+    row = db.query(Product.stock_qty).filter(Product.id == product_id).first()
+    if row is None:
+        return None
+    ledger = ledger_stock(db, [product_id])[product_id]
+    return {"stock_qty": row.stock_qty, "ledger_qty": ledger, "drift": row.stock_qty - ledger}
+
+
+def history(db: Session, product_id: int, limit: int, cursor: int | None = None) -> list[StockMovement]:
+    """新到舊；cursor = 上一頁最後一筆的 movement id"""
+    q = db.query(StockMovement).filter(StockMovement.product_id == product_id)
+    if cursor is not None:
+        q = q.filter(StockMovement.id < cursor)
+    return q.order_by(StockMovement.id.desc()).limit(limit).all()
+
+
+# ===== 快照 =====
+
+def _upsert_snapshots(db: Session, rows: list[dict]) -> None:
+    table = StockSnapshot.__table__
+    dialect = db.get_bind().dialect.name
+    if dialect in ("sqlite", "postgresql"):
+        stmt = (sqlite_insert if dialect == "sqlite" else pg_insert)(table)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["product_id"],
+            set_={"qty": stmt.excluded.qty, "movement_id": stmt.excluded.movement_id, "taken_at": stmt.excluded.taken_at},
+            # 多個 worker 同時壓縮：只往前推，不會用舊的蓋掉新的
+            where=table.c.movement_id < stmt.excluded.movement_id,
+        )
+        db.execute(stmt, rows)
+        return
+    for r in rows:
+        res = db.execute(
+            update(table)
+            .where(table.c.product_id == r["product_id"], table.c.movement_id < r["movement_id"])
+            .values(qty=r["qty"], movement_id=r["movement_id"], taken_at=r["taken_at"])
+        )
+        if res.rowcount == 0 and db.get(StockSnapshot, r["product_id"]) is None:
+            db.execute(table.insert().values(**r))
+
+
+def compact(db: Session, batch_size: int = 1000) -> int:
+    """
+    把有新異動的商品快照往前推（會 commit），回傳更新了幾個商品的快照。
+    只收「比 SNAPSHOT_GRACE_SECONDS 舊、而且比它小的 id 全都夠舊」的異動：
+    id 比邊界小、但還沒 commit 的異動不會被快照跳過。
+    """
+    now = _now()
+    cutoff = now - timedelta(seconds=SNAPSHOT_GRACE_SECONDS)
+    first_recent = db.query(func.min(StockMovement.id)).filter(StockMovement.created_at >= cutoff).scalar()
+    boundary = first_recent - 1 if first_recent is not None else db.query(func.max(StockMovement.id)).scalar()
+
+    n = 0
+    if boundary:
+        S, M = StockSnapshot, StockMovement
+        after = func.coalesce(S.movement_id, 0)
+        last_pid = 0
+        while True:
+            rows = (
+                db.query(M.product_id, func.coalesce(S.qty, 0), func.sum(M.delta), func.max(M.id))
+                .outerjoin(S, S.product_id == M.product_id)
+                .filter(M.product_id > last_pid, M.id > after, M.id <= boundary)
+                .group_by(M.product_id, S.qty)
+                .order_by(M.product_id)
+                .limit(batch_size)
+                .all()
+            )
+            if not rows:
+                break
+            _upsert_snapshots(
+                db,
+                [
+                    {"product_id": pid, "qty": int(base) + int(delta or 0), "movement_id": mid, "taken_at": now}
+                    for pid, base, delta, mid in rows
+                ],
+            )
+            db.commit()
+            n += len(rows)
+            last_pid = rows[-1][0]
+
+    if settings.stock_movement_retention_days > 0:
+        # 已經進快照、又超過保留天數的異動才刪（帳上庫存不受影響）
+        old = now - timedelta(days=settings.stock_movement_retention_days)
+        covered = (
+            select(StockSnapshot.movement_id)
+            .where(StockSnapshot.product_id == StockMovement.product_id)
+            .scalar_subquery()
+        )
+        db.execute(
+            delete(StockMovement)
+            .where(StockMovement.created_at < old, StockMovement.id <= covered)
+            .execution_options(synchronize_session=False)
+        )
+        db.commit()
+    return n
@@ -0,0 +1,257 @@
+# backend/app/services/metrics.py
+"""
+每個 route 的延遲 / 狀態碼 / 進行中請求數，加上每個 request 打了幾次 DB、花多少時間。
+
+- MetricsMiddleware：純 ASGI middleware（不用 BaseHTTPMiddleware，少一層 task / copy）
+- install_db_listeners(engine)：SQLAlchemy engine events 計算 query 數與 DB 時間，
+  透過 contextvar 記到「目前這個 request」身上（sync handler 在 threadpool 跑，context 會一起帶過去）
+- render_prometheus()：Prometheus text format，給 GET /metrics
+- startup：import 時間 / lifespan 跑完（ready）/ 第一個 request 花多久，追蹤冷啟動有沒有變慢
+- Server-Timing header：瀏覽器 DevTools 的 Timing 分頁直接看得到 app / db 時間和 query 數，N+1 一眼就看出來
+"""
+from __future__ import annotations
+
+import threading
+import time
+from collections import defaultdict
+from contextvars import ContextVar
+from dataclasses import dataclass
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+
+@dataclass
+class _RequestDb:
+    queries: int = 0
+    seconds: float = 0.0
+
+
+_current: ContextVar[_RequestDb | None] = ContextVar("request_db_stats", default=None)
+
+
+class _Histogram:
+    __slots__ = ("buckets", "counts", "total", "n")
+
+    def __init__(self, buckets: tuple[float, ...]) -> None:
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.total = 0.0
+        self.n = 0
+
+    def observe(self, v: float) -> None:
+        for i, b in enumerate(self.buckets):
+            if v <= b:
+                self.counts[i] += 1
+                break
+        self.total += v
+        self.n += 1
+
+
+class Registry:
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        self.latency: dict[tuple[str, str], _Histogram] = {}
+        self.db_queries: dict[tuple[str, str], _Histogram] = {}
+        self.db_seconds: dict[tuple[str, str], float] = defaultdict(float)
+        self.status: dict[tuple[str, str, str], int] = defaultdict(int)
+        self.in_flight = 0
+
+    def started(self) -> None:
+        with self._lock:
+            self.in_flight += 1
+
+    def finished(self, method: str, route: str, status: int, seconds: float, db: _RequestDb) -> None:
+        key = (method, route)
+        with self._lock:
+            self.in_flight -= 1
+            self.latency.setdefault(key, _Histogram(LATENCY_BUCKETS)).observe(seconds)
+            self.db_queries.setdefault(key, _Histogram(QUERY_COUNT_BUCKETS)).observe(db.queries)
+            self.db_seconds[key] += db.seconds
+            self.status[(method, route, str(status))] += 1
+
+
+registry = Registry()
+
+
+class Startup:
+    """冷啟動時間（秒）；每個 worker 各自一份，只記第一次"""
+
+    def __init__(self) -> None:
+        self.import_seconds: float | None = None
+        self.ready_seconds: float | None = None
+        self.first_request_seconds: float | None = None
+
+    def imported(self, seconds: float) -> None:
+        self.import_seconds = seconds
+
+    def ready(self, seconds: float) -> None:
+        if self.ready_seconds is None:
+            self.ready_seconds = seconds
+
+    def first_request(self, seconds: float) -> None:
+        if self.first_request_seconds is None:
+            self.first_request_seconds = seconds
+
+
+startup = Startup()
+
+
+# ===== DB =====
+
+def _before(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+
+def _finish(conn) -> None:
+    start = conn.info["query_start"].pop()
+    stats = _current.get()
+    if stats is not None:
+        stats.queries += 1
+        stats.seconds += time.perf_counter() - start
+
+
+def _after(conn, cursor, statement, parameters, context, executemany):
+    _finish(conn)
+
+
+def _on_error(ctx) -> None:
+    # ⚠️ 失敗的 statement 不會觸發 after_cursor_execute：不在這裡 pop 的話，
+    #    連線回池後 query_start 會越積越多，下一個 query 也會拿到錯的開始時間
+    #    （沒有 execution_context = 還沒走到 before_cursor_execute，例如連線失敗 / 編譯失敗）
+    conn = ctx.connection
+    if conn is None or ctx.execution_context is None or not conn.info.get("query_start"):
+        return
+    _finish(conn)  # 失敗的也算一個 query（時間也花了）
+
+
+def install_db_listeners(engine: Engine) -> None:
+    if not event.contains(engine, "before_cursor_execute", _before):
+        event.listen(engine, "before_cursor_execute", _before)
+        event.listen(engine, "after_cursor_execute", _after)
+        event.listen(engine, "handle_error", _on_error)
+
+
+# ===== HTTP =====
+
+def _route_label(scope: Scope, root_path: str) -> str:
+    route = scope.get("route")
+    if route is not None and getattr(route, "path", None):
+        return route.path
+    # Mount（例如 /uploads）：只記掛載點，不記檔名，避免 label 爆量
+    mounted = scope.get("root_path", "")
+    if mounted and mounted != root_path:
+        return f"{mounted[len(root_path):]}/{{path}}"
+    return "unmatched"
+
+
+class MetricsMiddleware:
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        db = _RequestDb()
+        token = _current.set(db)
+        root_path = scope.get("root_path", "")
+        start = time.perf_counter()
+        status = 500
+        registry.started()
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                app_ms = (time.perf_counter() - start) * 1000
+                timing = f'app;dur={app_ms:.1f}, db;dur={db.seconds * 1000:.1f};desc="{db.queries} queries"'
+                headers = list(message.get("headers", []))
+                headers.append((b"server-timing", timing.encode("latin-1")))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            startup.first_request(time.perf_counter() - start)
+            registry.finished(
+                scope["method"],
+                _route_label(scope, root_path),
+                status,
+                time.perf_counter() - start,
+                db,
+            )
+            _current.reset(token)
+
+
+# ===== Prometheus =====
+
+def _labels(**kw: str) -> str:
+    def esc(v: str) -> str:
+        return v.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+    return "{" + ",".join(f'{k}="{esc(v)}"' for k, v in kw.items()) + "}"
+
+
+def _histogram_lines(name: str, hists: dict[tuple[str, str], _Histogram]) -> list[str]:
+    lines = []
+    for (method, route), h in sorted(hists.items()):
+        cum = 0
+        for b, c in zip(h.buckets, h.counts):
+            cum += c
+            lines.append(f"{name}_bucket{_labels(method=method, route=route, le=repr(float(b)))} {cum}")
+        lines.append(f"{name}_bucket{_labels(method=method, route=route, le='+Inf')} {h.n}")
+        lines.append(f"{name}_sum{_labels(method=method, route=route)} {h.total}")
+        lines.append(f"{name}_count{_labels(method=method, route=route)} {h.n}")
+    return lines
+
+
+def _startup_lines() -> list[str]:
+    lines = []
+    for name, value, help_ in (
+        ("app_startup_import_seconds", startup.import_seconds, "Time to import app.main and build the app."),
+        ("app_startup_ready_seconds", startup.ready_seconds, "Time from import start until lifespan startup finished."),
+        ("app_first_request_seconds", startup.first_request_seconds, "Latency of the first request served."),
+    ):
+        if value is None:
+            continue
+        lines += [f"# HELP {name} {help_}", f"# TYPE {name} gauge", f"{name} {value}"]
+    return lines
+
+
+def render_prometheus() -> str:
+    with registry._lock:
+        lines = [
+            "# HELP http_request_duration_seconds Request latency by route.",
+            "# TYPE http_request_duration_seconds histogram",
+            *_histogram_lines("http_request_duration_seconds", registry.latency),
+            "# HELP http_requests_total Requests by route and status code.",
+            "# TYPE http_requests_total counter",
+            *[
+                f"http_requests_total{_labels(method=m, route=r, status=s)} {n}"
+                for (m, r, s), n in sorted(registry.status.items())
+            ],
+            "# HELP http_requests_in_flight Requests currently being served.",
+            "# TYPE http_requests_in_flight gauge",
+            f"http_requests_in_flight {registry.in_flight}",
+            "# HELP db_queries_per_request SQL statements executed per request.",
+            "# TYPE db_queries_per_request histogram",
+            *_histogram_lines("db_queries_per_request", registry.db_queries),
+            "# HELP db_query_seconds_total Time spent in SQL statements by route.",
+            "# TYPE db_query_seconds_total counter",
+            *[
+                f"db_query_seconds_total{_labels(method=m, route=r)} {v}"
+                for (m, r), v in sorted(registry.db_seconds.items())
+            ],
+            *_startup_lines(),
+        ]
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,229 @@
+# backend/app/services/notification_service.py
+"""
+Email outbox：寫信 / 寄信分開。
+
+- enqueue_*：只在目前 session 加一筆 EmailOutbox（不 commit），跟訂單一起 commit
+- OutboxSender：另外的 async loop 把 outbox 寄掉
+  - 一個長壽的 httpx.AsyncClient（連線池 / keep-alive，不用每封信重做 TLS handshake）
+  - Semaphore 限制同時寄送數
+  - 失敗指數退避重試；重試用完或 4xx（非 429）→ dead
+  - 用「條件式 UPDATE 搶租約」認領信件：多個 sender 同時跑也不會重寄；sender 當掉，租約到期別人接手
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+
+import httpx
+from sqlalchemy import update
+from sqlalchemy.orm import Session, sessionmaker
+
+from ..config import settings
+from ..db import SessionLocal
+from ..models.email_outbox import EmailOutbox
+from .emailer import resend_endpoint, resend_request
+
+logger = logging.getLogger(__name__)
+
+PENDING = "pending"
+SENDING = "sending"
+SENT = "sent"
+DEAD = "dead"
+
+# 認領後多久沒回報就當 sender 掛了，可被重新認領
+LEASE_SECONDS = 120
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def _enabled() -> bool:
+    # 跟 send_email 一樣：沒開通知就不排信
+    return int(getattr(settings, "enable_email_notify", 0) or 0) == 1
+
+
+def enqueue_email(db: Session, to_email: str, subject: str, body: str) -> None:
+    if not _enabled() or not to_email:
+        return
+    db.add(
+        EmailOutbox(
+            to_email=to_email,
+            subject=subject[:300],
+            body=body,
+            status=PENDING,
+            attempts=0,
+            next_attempt_at=_now(),
+        )
+    )
+
+
+def enqueue_admin_email(db: Session, subject: str, body: str) -> None:
+    admin_email = (getattr(settings, "admin_notify_email", None) or "").strip()
+    if not admin_email:
+        return
+    enqueue_email(db, admin_email, subject, body)
+
+
+@dataclass(frozen=True)
+class _Mail:
+    id: int
+    to_email: str
+    subject: str
+    body: str
+    attempts: int
+
+
+class _Permanent(Exception):
+    """對方明確拒收（例如 422 格式錯）：重試也沒用，直接 dead"""
+
+
+class OutboxSender:
+    def __init__(
+        self,
+        session_factory: sessionmaker = SessionLocal,
+        client: httpx.AsyncClient | None = None,
+        concurrency: int | None = None,
+        batch_size: int | None = None,
+        max_attempts: int | None = None,
+        backoff_base: float = 30.0,
+        backoff_max: float = 3600.0,
+    ) -> None:
+        self.session_factory = session_factory
+        self.concurrency = concurrency or settings.email_outbox_concurrency
+        self.batch_size = batch_size or settings.email_outbox_batch_size
+        self.max_attempts = max_attempts or settings.email_outbox_max_attempts
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self._own_client = client is None
+        self.client = client or httpx.AsyncClient(
+            timeout=15,
+            limits=httpx.Limits(
+                max_connections=self.concurrency,
+                max_keepalive_connections=self.concurrency,
+            ),
+        )
+        self._sem = asyncio.Semaphore(self.concurrency)
+        # 設定不齊時只警告一次（不然每次輪詢，約 2 秒，就一條 log）
+        self._unconfigured_warned = False
+
+    async def aclose(self) -> None:
+        if self._own_client:
+            await self.client.aclose()
+
+    # ===== DB（同步 session，丟到 thread 跑，不卡 event loop） =====
+
+    def _claim(self) -> list[_Mail]:
+        now = _now()
+        with self.session_factory() as db:
+            candidates = (
+                db.query(EmailOutbox.id)
+                .filter(
+                    EmailOutbox.status.in_((PENDING, SENDING)),
+                    EmailOutbox.next_attempt_at <= now,
+                )
+                .order_by(EmailOutbox.next_attempt_at.asc(), EmailOutbox.id.asc())
+                .limit(self.batch_size)
+                .all()
+            )
+            claimed: list[int] = []
+            for (mail_id,) in candidates:
+                res = db.execute(
+                    update(EmailOutbox)
+                    .where(
+                        EmailOutbox.id == mail_id,
+                        EmailOutbox.status.in_((PENDING, SENDING)),
+                        EmailOutbox.next_attempt_at <= now,
+                    )
+                    .values(status=SENDING, next_attempt_at=now + timedelta(seconds=LEASE_SECONDS))
+                    .execution_options(synchronize_session=False)
+                )
+                if res.rowcount == 1:
+                    claimed.append(mail_id)
+            db.commit()
+
+            if not claimed:
+                return []
+            rows = db.query(EmailOutbox).filter(EmailOutbox.id.in_(claimed)).all()
+            return [_Mail(r.id, r.to_email, r.subject, r.body, r.attempts) for r in rows]
+
+    def _finish(self, mail: _Mail, provider_id: str | None, error: str | None, permanent: bool) -> None:
+        now = _now()
+        attempts = mail.attempts + 1
+        values: dict = {"attempts": attempts}
+        if error is None:
+            values.update(status=SENT, sent_at=now, provider_id=provider_id, last_error=None)
+        elif permanent or attempts >= self.max_attempts:
+            values.update(status=DEAD, last_error=error[:1000])
+            logger.error("[email] outbox id=%s dead after %s attempts: %s", mail.id, attempts, error)
+        else:
+            delay = min(self.backoff_base * (2 ** (attempts - 1)), self.backoff_max)
+            values.update(status=PENDING, next_attempt_at=now + timedelta(seconds=delay), last_error=error[:1000])
+            logger.warning("[email] outbox id=%s retry in %ss: %s", mail.id, delay, error)
+
+        with self.session_factory() as db:
+            db.execute(update(EmailOutbox).where(EmailOutbox.id == mail.id).values(**values))
+            db.commit()
+
+    # ===== 寄送 =====
+
+    async def _post(self, mail: _Mail, headers: dict, base: dict) -> str | None:
+        r = await self.client.post(
+            resend_endpoint(),
+            headers=headers,
+            json={**base, "to": [mail.to_email], "subject": mail.subject, "text": mail.body},
+        )
+        if r.status_code >= 400:
+            msg = f"status={r.status_code} body={r.text[:500]}"
+            if 400 <= r.status_code < 500 and r.status_code not in (408, 429):
+                raise _Permanent(msg)
+            raise RuntimeError(msg)
+        try:
+            return (r.json() or {}).get("id")
+        except ValueError:
+            return None
+
+    async def _send_one(self, mail: _Mail, headers: dict, base: dict) -> None:
+        async with self._sem:
+            provider_id, error, permanent = None, None, False
+            try:
+                provider_id = await self._post(mail, headers, base)
+            except _Permanent as e:
+                error, permanent = str(e), True
+            except Exception as e:  # 網路錯誤 / 5xx / timeout：之後重試
+                error = f"{type(e).__name__}: {e}"
+            await asyncio.to_thread(self._finish, mail, provider_id, error, permanent)
+
+    async def run_once(self) -> int:
+        """認領一批、寄完、回報結果；回傳這批處理了幾封"""
+        req = resend_request(warn=not self._unconfigured_warned)
+        if req is None:
+            # 設定不齊：不認領，信留在 outbox（pending），設好之後再寄
+            if not self._unconfigured_warned:
+                logger.warning("[email] outbox sender idle until RESEND_API_KEY / SMTP_FROM_EMAIL are set")
+                self._unconfigured_warned = True
+            return 0
+        self._unconfigured_warned = False
+        headers, base = req
+
+        batch = await asyncio.to_thread(self._claim)
+        if batch:
+            await asyncio.gather(*(self._send_one(m, headers, base) for m in batch))
+        return len(batch)
+
+    async def run_forever(self, stop: asyncio.Event, poll_seconds: float | None = None) -> None:
+        poll = poll_seconds if poll_seconds is not None else settings.email_outbox_poll_seconds
+        while not stop.is_set():
+            try:
+                n = await self.run_once()
+            except Exception:
+                logger.exception("[email] outbox sender loop error")
+                n = 0
+            if n < self.batch_size:
+                # 這批沒滿 = 暫時寄完了，等一下再看
+                try:
+                    await asyncio.wait_for(stop.wait(), timeout=poll)
+                except asyncio.TimeoutError:
+                    pass
@@ -0,0 +1,210 @@
+# backend/app/services/order_query.py
+"""
+訂單讀取共用：一次把「一批訂單」的明細 / 件數撈回來，避免逐筆查（N+1）。
+不管一頁幾張訂單，都是固定 1 個 query。
+
+匯出（月底對帳）另外走 stream_export()：訂單 JOIN 明細 JOIN 商品一個 query，
+stream_results + yield_per 邊讀邊輸出，幾十萬列記憶體也不會長。
+"""
+from __future__ import annotations
+
+import csv
+import io
+import json
+import re
+from collections import defaultdict
+from typing import Iterator
+
+from fastapi import HTTPException
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from ..models.order import Order
+from ..models.order_item import OrderItem
+from ..models.product import Product
+
+INCLUDE_OPTIONS = {"items"}
+
+
+def parse_include(include: str | None) -> set[str]:
+    """?include=items（逗號分隔，之後可再加別的）"""
+    if not include:
+        return set()
+    parts = {p.strip() for p in include.split(",") if p.strip()}
+    unknown = parts - INCLUDE_OPTIONS
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Invalid include: {','.join(sorted(unknown))}")
+    return parts
+
+
+def load_items(db: Session, order_ids: list[int]) -> dict[int, list[dict]]:
+    """order_id -> 明細（含商品名稱）；只撈需要的欄位，不建 ORM 物件"""
+    out: dict[int, list[dict]] = defaultdict(list)
+    if not order_ids:
+        return out
+
+    rows = (
+        db.query(
+            OrderItem.order_id,
+            OrderItem.product_id,
+            Product.name,
+            OrderItem.qty,
+            OrderItem.unit_price,
+        )
+        .join(Product, Product.id == OrderItem.product_id)
+        .filter(OrderItem.order_id.in_(order_ids))
+        .order_by(OrderItem.order_id, OrderItem.id)
+        .all()
+    )
+    for order_id, product_id, name, qty, unit_price in rows:
+        out[order_id].append(
+            {
+                "product_id": product_id,
+                "name": name,
+                "qty": qty,
+                "unit_price": unit_price,
+                "line_total": qty * unit_price,
+            }
+        )
+    return out
+
+
+def load_item_counts(db: Session, order_ids: list[int]) -> dict[int, tuple[int, int]]:
+    """order_id -> (明細行數, 總件數)"""
+    if not order_ids:
+        return {}
+    rows = (
+        db.query(OrderItem.order_id, func.count(OrderItem.id), func.sum(OrderItem.qty))
+        .filter(OrderItem.order_id.in_(order_ids))
+        .group_by(OrderItem.order_id)
+        .all()
+    )
+    return {oid: (int(lines), int(qty or 0)) for oid, lines, qty in rows}
+
+
+# ===== 匯出 =====
+
+_ORDER_COLUMNS = (
+    Order.id,
+    Order.created_at,
+    Order.status,
+    Order.customer_name,
+    Order.customer_email,
+    Order.customer_phone,
+    Order.shipping_method,
+    Order.recipient_name,
+    Order.recipient_phone,
+    Order.shipping_post_address,
+    Order.cvs_brand,
+    Order.cvs_store_id,
+    Order.cvs_store_name,
+    Order.shipping_fee,
+    Order.total_amount,
+)
+_ORDER_FIELDS = ["order_id"] + [c.key for c in _ORDER_COLUMNS[1:]]
+_ITEM_FIELDS = ["product_id", "product_name", "qty", "unit_price", "line_total"]
+CSV_FIELDS = _ORDER_FIELDS + _ITEM_FIELDS
+
+_FLUSH_ROWS = 500
+
+# ⚠️ 買家自己填的欄位：開頭是 = + - @（或 tab / CR）時 Excel 會當公式執行（CSV injection），
+#    匯出時前面補一個 ' 讓它變純文字。只有「一個 + 開頭、後面只有數字 / 空白 / 括號」的電話號碼
+#    （+886 912 345 678）照原樣輸出；-1-1、+1-2-3 這種 Excel 會當算式，一樣要補
+_CSV_ESCAPE_FIELDS = (
+    "customer_name",
+    "customer_email",
+    "customer_phone",
+    "recipient_name",
+    "recipient_phone",
+    "shipping_post_address",
+    "cvs_brand",
+    "cvs_store_id",
+    "cvs_store_name",
+)
+_FORMULA_PREFIXES = ("=", "+", "-", "@", "\t", "\r")
+_PHONE_NUMBER = re.compile(r"\+[0-9 ()]+")
+
+
+def _csv_safe(value):
+    if isinstance(value, str) and value.startswith(_FORMULA_PREFIXES) and not _PHONE_NUMBER.fullmatch(value):
+        return "'" + value
+    return value
+
+
+def _export_rows(q, yield_per: int):
+    """q = 已套好篩選條件的 db.query(Order)；一列 = 一個明細（沒明細的訂單也會有一列）"""
+    return (
+        q.outerjoin(OrderItem, OrderItem.order_id == Order.id)
+        .outerjoin(Product, Product.id == OrderItem.product_id)
+        .with_entities(*_ORDER_COLUMNS, OrderItem.product_id, Product.name, OrderItem.qty, OrderItem.unit_price)
+        .order_by(Order.id.asc(), OrderItem.id.asc())
+        .execution_options(stream_results=True, yield_per=yield_per)
+    )
+
+
+def _split(row) -> tuple[dict, dict | None]:
+    values = list(row)
+    order = dict(zip(_ORDER_FIELDS, values[: len(_ORDER_FIELDS)]))
+    if order["created_at"] is not None:
+        order["created_at"] = order["created_at"].isoformat()
+    product_id, name, qty, unit_price = values[len(_ORDER_FIELDS):]
+    if product_id is None:
+        return order, None
+    return order, {
+        "product_id": product_id,
+        "product_name": name,
+        "qty": qty,
+        "unit_price": unit_price,
+        "line_total": qty * unit_price,
+    }
+
+
+def _csv_chunks(rows) -> Iterator[str]:
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    writer.writerow(CSV_FIELDS)
+    yield buf.getvalue()  # ✅ 先送表頭：query 還在跑，客戶端已經開始收
+
+    buf.seek(0)
+    buf.truncate()
+    pending = 0
+    for row in rows:
+        order, item = _split(row)
+        item = item or dict.fromkeys(_ITEM_FIELDS)
+        for k in _CSV_ESCAPE_FIELDS:
+            order[k] = _csv_safe(order[k])
+        writer.writerow([order[k] for k in _ORDER_FIELDS] + [item[k] for k in _ITEM_FIELDS])
+        pending += 1
+        if pending >= _FLUSH_ROWS:
+            yield buf.getvalue()
+            buf.seek(0)
+            buf.truncate()
+            pending = 0
+    if pending:
+        yield buf.getvalue()
+
+
+def _jsonl_chunks(rows) -> Iterator[str]:
+    # 一行一張訂單（明細放 items）；結果依 order id 排好，相鄰的列收成同一張
+    lines: list[str] = []
+    current: dict | None = None
+    for row in rows:
+        order, item = _split(row)
+        if current is None or current["order_id"] != order["order_id"]:
+            if current is not None:
+                lines.append(json.dumps(current, ensure_ascii=False))
+            current = {**order, "items": []}
+        if item is not None:
+            current["items"].append(item)
+        if len(lines) >= _FLUSH_ROWS:
+            yield "\n".join(lines) + "\n"
+            lines = []
+    if current is not None:
+        lines.append(json.dumps(current, ensure_ascii=False))
+    if lines:
+        yield "\n".join(lines) + "\n"
+
+
+def stream_export(q, fmt: str, yield_per: int = 1000) -> Iterator[str]:
+    rows = _export_rows(q, yield_per)
+    return _csv_chunks(rows) if fmt == "csv" else _jsonl_chunks(rows)
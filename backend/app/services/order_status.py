@@ -0,0 +1,48 @@
+# backend/app/services/order_status.py
+"""
+改訂單狀態（後台改狀態、出貨都走這裡），順便處理跟狀態連動的資料：
+- 進 cancelled：庫存補回（記 restock 異動）、銷售彙總扣掉
+- 從 cancelled 改回有效狀態：重新扣庫存（不夠就 400）、銷售彙總加回
+"""
+from __future__ import annotations
+
+from typing import Any
+
+from fastapi import HTTPException
+from sqlalchemy import update
+from sqlalchemy.orm import Session
+
+from ..models.order import Order
+from ..models.order_item import OrderItem
+from . import analytics_service, inventory_service
+
+
+def change_status(db: Session, order: Order, new_status: str, **values: Any) -> str:
+    """
+    改訂單狀態（不 commit），回傳舊狀態。
+    ⚠️ 條件式 UPDATE（WHERE status = 讀到的舊狀態）：兩個請求同時改同一張，
+       只有一個會成功，庫存 / 彙總不會被加減兩次；搶輸的回 409。
+    """
+    old = order.status
+    same = Order.status == old if old is not None else Order.status.is_(None)
+    res = db.execute(
+        update(Order).where(Order.id == order.id, same).values(status=new_status, **values)
+    )
+    if res.rowcount != 1:
+        db.rollback()
+        raise HTTPException(status_code=409, detail="Order status was changed by another request, please reload")
+
+    was, now = analytics_service.counted(old), analytics_service.counted(new_status)
+    if was != now:
+        lines = (
+            db.query(OrderItem.product_id, OrderItem.qty, OrderItem.unit_price)
+            .filter(OrderItem.order_id == order.id)
+            .all()
+        )
+        qtys = [(pid, qty) for pid, qty, _ in lines]
+        if now:
+            inventory_service.deduct(db, order.id, qtys)
+        else:
+            inventory_service.restock(db, order.id, qtys)
+        analytics_service.record_order(db, order, lines, sign=1 if now else -1)
+    return old
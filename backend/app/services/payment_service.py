@@ -0,0 +1,284 @@
+# backend/app/services/payment_service.py
+"""
+金流 webhook：收事件 → 存起來 → 背景分批套用到訂單狀態。
+
+收（POST /payments/webhook，要幾毫秒內回 200，不然金流會一直重送）：
+- 驗 HMAC 簽章：header  X-Payment-Signature: t=<unix 秒>,v1=<hex>
+  v1 = HMAC-SHA256(PAYMENT_WEBHOOK_SECRET, "<t>.<原始 body>")；t 超過容許誤差就拒收（防重放）
+- 原始 body 寫進 payment_events，(provider, event_id) 唯一 → 重送的事件 INSERT 不進去，直接回 duplicate
+- 不碰訂單：存完就回
+
+套用（process_batch，背景 loop；多個 worker 一起跑也不會套兩次）：
+- payment.succeeded：pending → paid，一批一句條件式 UPDATE（WHERE status = 'pending'）
+  金額對不上 / 訂單已取消 → failed 留給人看；已經付過 → ignored
+- payment.refunded：paid / shipped / done → cancelled（走 order_status：庫存補回、彙總扣掉）
+- 其他類型：ignored
+事件本身也是條件式標記（WHERE status = 'pending'），同一個事件只會有一個結果。
+"""
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import hmac
+import json
+import logging
+import time
+from datetime import datetime, timezone
+from typing import Any, Callable
+
+from fastapi import HTTPException
+from sqlalchemy import bindparam, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from ..config import settings
+from ..db import SessionLocal
+from ..models.order import Order
+from ..models.payment_event import PaymentEvent
+from . import order_status
+
+logger = logging.getLogger(__name__)
+
+SIGNATURE_HEADER = "X-Payment-Signature"
+
+SUCCEEDED = "payment.succeeded"
+REFUNDED = "payment.refunded"
+
+PENDING = "pending"
+APPLIED = "applied"
+IGNORED = "ignored"
+FAILED = "failed"
+
+# 付款之後的狀態（再收到 succeeded 就是重複，不用改）
+PAID_STATES = {"paid", "shipped", "done"}
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+# ===== 簽章 =====
+
+def sign(secret: str, body: bytes, timestamp: int | None = None) -> str:
+    """產生簽章 header 值（測試 / 壓測的假金流用；正式環境是金流那邊簽）"""
+    t = int(timestamp if timestamp is not None else time.time())
+    mac = hmac.new(secret.encode(), f"{t}.".encode() + body, hashlib.sha256).hexdigest()
+    return f"t={t},v1={mac}"
+
+
+def verify_signature(body: bytes, header: str | None, now: float | None = None) -> None:
+    secret = settings.payment_webhook_secret
+    if not secret:
+        raise HTTPException(status_code=503, detail="Payment webhook is not configured")
+
+    parts = dict(p.split("=", 1) for p in (header or "").split(",") if "=" in p)
+    try:
+        t = int(parts.get("t", ""))
+    except ValueError:
+        raise HTTPException(status_code=401, detail="Invalid signature") from None
+    now = time.time() if now is None else now
+    if abs(now - t) > settings.payment_webhook_tolerance_seconds:
+        raise HTTPException(status_code=401, detail="Signature timestamp out of tolerance")
+
+    expected = sign(secret, body, t).split("v1=", 1)[1]
+    if not hmac.compare_digest(expected, parts.get("v1", "")):
+        raise HTTPException(status_code=401, detail="Invalid signature")
+
+
+# ===== 收 =====
+
+def parse_event(body: bytes) -> dict[str, Any]:
+    """{"id": "evt_...", "type": "payment.succeeded", "data": {"order_id": 1, "amount": 560}}"""
+    try:
+        event = json.loads(body)
+        data = event.get("data") or {}
+        out = {
+            "event_id": str(event["id"]),
+            "type": str(event["type"]),
+            "order_id": int(data["order_id"]) if data.get("order_id") is not None else None,
+            "amount": int(data["amount"]) if data.get("amount") is not None else None,
+        }
+    except (ValueError, KeyError, TypeError, AttributeError):
+        raise HTTPException(status_code=400, detail="Malformed payment event") from None
+    if not out["event_id"] or len(out["event_id"]) > 100 or len(out["type"]) > 50:
+        raise HTTPException(status_code=400, detail="Malformed payment event")
+    return out
+
+
+def store_event(db: Session, event: dict[str, Any], body: bytes) -> bool:
+    """存事件（會 commit）；False = 這個 event_id 已經收過"""
+    row = {
+        "provider": settings.payment_provider,
+        "payload": body.decode("utf-8", errors="replace"),
+        "status": PENDING,
+        "result": "",
+        **event,
+    }
+    table = PaymentEvent.__table__
+    dialect = db.get_bind().dialect.name
+    if dialect in ("sqlite", "postgresql"):
+        stmt = (sqlite_insert if dialect == "sqlite" else pg_insert)(table).values(**row)
+        res = db.execute(stmt.on_conflict_do_nothing(index_elements=["provider", "event_id"]))
+        db.commit()
+        return res.rowcount == 1
+    try:
+        db.execute(table.insert().values(**row))
+        db.commit()
+        return True
+    except IntegrityError:
+        db.rollback()
+        return False
+
+
+# 背景 loop 在等的 event：webhook 存完就叫醒它，不用等到下一輪 poll
+_wakeup: asyncio.Event | None = None
+
+
+def notify() -> None:
+    if _wakeup is not None:
+        _wakeup.set()
+
+
+# ===== 套用 =====
+
+def _mark(db: Session, outcomes: dict[int, tuple[str, str]]) -> None:
+    if not outcomes:
+        return
+    t = PaymentEvent.__table__
+    db.execute(
+        update(t)
+        .where(t.c.id == bindparam("b_id"), t.c.status == PENDING)
+        .values(status=bindparam("b_status"), result=bindparam("b_result"), processed_at=_now()),
+        [{"b_id": eid, "b_status": st, "b_result": res[:200]} for eid, (st, res) in outcomes.items()],
+    )
+
+
+def _pay(db: Session, order_ids: list[int]) -> set[int]:
+    """pending → paid，回傳真的有改到的訂單 id"""
+    cond = (Order.id.in_(order_ids), Order.status == "pending")
+    if db.get_bind().dialect.update_returning:
+        res = db.execute(
+            update(Order).where(*cond).values(status="paid").returning(Order.id)
+            .execution_options(synchronize_session=False)
+        )
+        return set(res.scalars())
+    paid = set()
+    for oid in order_ids:
+        res = db.execute(update(Order).where(Order.id == oid, Order.status == "pending").values(status="paid"))
+        if res.rowcount == 1:
+            paid.add(oid)
+    return paid
+
+
+def _refund(db: Session, ev) -> tuple[str, str]:
+    o = db.get(Order, ev.order_id) if ev.order_id is not None else None
+    if o is None:
+        return FAILED, "order not found"
+    if o.status == "cancelled":
+        return IGNORED, "already cancelled"
+    if o.status not in PAID_STATES:
+        return FAILED, f"order is {o.status}, not paid"
+    try:
+        order_status.change_status(db, o, "cancelled")
+    except HTTPException as e:  # change_status 已經 rollback
+        return FAILED, str(e.detail)
+    return APPLIED, "paid -> cancelled"
+
+
+def process_batch(db: Session, batch_size: int | None = None) -> dict[str, int]:
+    """套用一批 pending 事件（依收到順序），回傳各結果的數量"""
+    batch_size = batch_size or settings.payment_processor_batch_size
+    events = (
+        db.query(PaymentEvent.id, PaymentEvent.type, PaymentEvent.order_id, PaymentEvent.amount)
+        .filter(PaymentEvent.status == PENDING)
+        .order_by(PaymentEvent.id)
+        .limit(batch_size)
+        .all()
+    )
+    if not events:
+        return {}
+
+    outcomes: dict[int, tuple[str, str]] = {}
+    refunds = []
+
+    # 1) 付款成功：整批一起檢查、一句 UPDATE 改狀態
+    order_ids = {e.order_id for e in events if e.type == SUCCEEDED and e.order_id is not None}
+    orders = {
+        oid: (status, total)
+        for oid, status, total in db.query(Order.id, Order.status, Order.total_amount).filter(Order.id.in_(order_ids))
+    } if order_ids else {}
+    to_pay: dict[int, int] = {}  # order_id -> 負責改狀態的 event id
+    for e in events:
+        if e.type == REFUNDED:
+            refunds.append(e)
+            continue
+        if e.type != SUCCEEDED:
+            outcomes[e.id] = (IGNORED, f"unhandled event type: {e.type}")
+            continue
+        o = orders.get(e.order_id)
+        if o is None:
+            outcomes[e.id] = (FAILED, "order not found")
+        elif e.amount is not None and e.amount != o[1]:
+            outcomes[e.id] = (FAILED, f"amount mismatch: order {o[1]}, paid {e.amount}")
+        elif e.order_id in to_pay or o[0] in PAID_STATES:
+            outcomes[e.id] = (IGNORED, "already paid")
+        elif o[0] != "pending":
+            outcomes[e.id] = (FAILED, f"order is {o[0]}")
+        else:
+            to_pay[e.order_id] = e.id
+
+    paid = _pay(db, list(to_pay)) if to_pay else set()
+    for oid, eid in to_pay.items():
+        # 沒改到 = 讀完之後被別人改了（另一個 processor / 後台）
+        outcomes[eid] = (APPLIED, "pending -> paid") if oid in paid else (IGNORED, "status changed concurrently")
+    _mark(db, outcomes)
+    db.commit()
+
+    # 2) 退款：少見，一筆一個 transaction（要補庫存 / 改彙總，衝突時只影響自己）
+    for e in refunds:
+        outcome = _refund(db, e)
+        _mark(db, {e.id: outcome})
+        db.commit()
+        outcomes[e.id] = outcome
+
+    counts: dict[str, int] = {}
+    for status, _ in outcomes.values():
+        counts[status] = counts.get(status, 0) + 1
+    return counts
+
+
+def drain(session_factory: Callable[[], Session] = SessionLocal, batch_size: int | None = None) -> dict[str, int]:
+    """一直處理到沒有 pending 為止"""
+    total: dict[str, int] = {}
+    with session_factory() as db:
+        while True:
+            counts = process_batch(db, batch_size)
+            if not counts:
+                return total
+            for k, v in counts.items():
+                total[k] = total.get(k, 0) + v
+
+
+async def run_forever(stop: asyncio.Event, interval: float | None = None) -> None:
+    global _wakeup
+    interval = interval if interval is not None else settings.payment_processor_interval_seconds
+    _wakeup = asyncio.Event()
+    try:
+        while not stop.is_set():
+            _wakeup.clear()
+            try:
+                counts = await run_in_threadpool(drain)
+                if counts:
+                    logger.info("[payments] %s", counts)
+            except Exception:
+                logger.exception("[payments] processing failed")
+            # 等：新事件進來（notify）、到下一輪、或要關機
+            waiters = [asyncio.ensure_future(_wakeup.wait()), asyncio.ensure_future(stop.wait())]
+            _, pending = await asyncio.wait(waiters, timeout=interval, return_when=asyncio.FIRST_COMPLETED)
+            for w in pending:
+                w.cancel()
+    finally:
+        _wakeup = None
@@ -0,0 +1,300 @@
+# backend/app/services/product_io_service.py
+"""
+後台商品批次匯入 / 匯出（CSV、JSONL）。
+
+匯入（供應商型錄一次幾百～幾千筆）：
+- 一列一個商品：有 id = 更新那個商品（只改有給的欄位），沒 id = 新增
+- 分類：category_id 或 category（分類名稱），開頭一次把分類表載成 dict，之後不再逐列查
+- shipping_options：有給就整組替換；CSV 的格式是 JSON 陣列或簡寫 "post:60;cvs_711:45"
+- 每 batch_size 列一個 transaction（一次查回這批要更新的商品），不是一列一個 commit
+- 單列驗證失敗只記在 errors，不影響其他列；整批寫入失敗則這批每列都記錯
+匯出：依 id keyset 分批讀（欄位直接 select，不建 ORM 物件），邊讀邊輸出，不會整張表放進記憶體。
+"""
+from __future__ import annotations
+
+import codecs
+import csv
+import io
+import json
+from typing import IO, Any, Iterable, Iterator
+
+from fastapi import HTTPException
+from pydantic import ValidationError
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+
+from ..models.category import Category
+from ..models.product import Product
+from ..models.product_shipping_option import ProductShippingOption
+from ..schemas.admin_product import AdminProductCreate, AdminProductUpdate
+from . import inventory_service
+from .search_service import index_products
+
+FORMATS = ("csv", "jsonl")
+CSV_COLUMNS = (
+    "id",
+    "name",
+    "category_id",
+    "price",
+    "stock_qty",
+    "is_active",
+    "description",
+    "description_text",
+    "image_url",
+    "shipping_options",
+)
+_FIELDS = set(CSV_COLUMNS) | {"category"}
+
+MAX_ERRORS = 1000
+
+
+def _row_error(e: Exception) -> str:
+    if isinstance(e, ValidationError):
+        return "; ".join(f"{'.'.join(str(x) for x in err['loc'])}: {err['msg']}" for err in e.errors())
+    if isinstance(e, HTTPException):
+        return str(e.detail)
+    return str(e)
+
+
+# ===== 讀檔 =====
+
+def _shipping_cell(value: str) -> Any:
+    value = value.strip()
+    if value.startswith("["):
+        return json.loads(value)
+    out = []
+    for part in filter(None, (s.strip() for s in value.split(";"))):
+        method, _, fee = part.partition(":")
+        out.append({"method": method.strip(), "fee": fee.strip() or 0})
+    return out
+
+
+def _csv_rows(fp: IO[bytes]) -> Iterator[tuple[int, dict | Exception]]:
+    text = io.TextIOWrapper(fp, encoding="utf-8-sig", newline="")
+    reader = csv.DictReader(text)
+    unknown = set(reader.fieldnames or ()) - _FIELDS
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown CSV columns: {', '.join(sorted(unknown))}")
+    for row in reader:
+        # ✅ CSV 空格 = 沒給（更新時不動、新增時用預設值）
+        data = {k: v for k, v in row.items() if k and v not in (None, "")}
+        try:
+            if "shipping_options" in data:
+                data["shipping_options"] = _shipping_cell(data["shipping_options"])
+            yield reader.line_num, data
+        except ValueError as e:
+            yield reader.line_num, ValueError(f"shipping_options: {e}")
+
+
+def _jsonl_rows(fp: IO[bytes]) -> Iterator[tuple[int, dict | Exception]]:
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    for line_no, raw in enumerate(fp, start=1):
+        line = decoder.decode(raw).strip()
+        if not line:
+            continue
+        try:
+            data = json.loads(line)
+        except ValueError as e:
+            yield line_no, ValueError(f"Invalid JSON: {e}")
+            continue
+        if not isinstance(data, dict):
+            yield line_no, ValueError("Each line must be a JSON object")
+            continue
+        unknown = set(data) - _FIELDS
+        yield line_no, (ValueError(f"Unknown fields: {', '.join(sorted(unknown))}") if unknown else data)
+
+
+def read_rows(fp: IO[bytes], fmt: str) -> Iterator[tuple[int, dict | Exception]]:
+    """(行號, 欄位 dict 或錯誤)；fp 是二進位檔（上傳內容先落到暫存檔）"""
+    return _csv_rows(fp) if fmt == "csv" else _jsonl_rows(fp)
+
+
+# ===== 匯入 =====
+
+class _Importer:
+    def __init__(self, db: Session) -> None:
+        self.db = db
+        self.category_ids: set[int] = set()
+        self.category_by_name: dict[str, int] = {}
+        for cid, name in db.query(Category.id, Category.name):
+            self.category_ids.add(cid)
+            self.category_by_name[name] = cid
+        self.report: dict[str, Any] = {"created": 0, "updated": 0, "failed": 0, "errors": []}
+        self.touched: list[int] = []
+
+    def fail(self, line_no: int, message: str) -> None:
+        self.report["failed"] += 1
+        if len(self.report["errors"]) < MAX_ERRORS:
+            self.report["errors"].append({"row": line_no, "error": message})
+
+    def validate(self, data: dict) -> tuple[int | None, dict]:
+        data = dict(data)
+        product_id = data.pop("id", None)
+        if product_id is not None:
+            try:
+                product_id = int(product_id)
+            except (TypeError, ValueError):
+                raise ValueError(f"Invalid id: {product_id}") from None
+
+        name = data.pop("category", None)
+        if name is not None:
+            if name not in self.category_by_name:
+                raise ValueError(f"Invalid category: {name}")
+            data["category_id"] = self.category_by_name[name]
+
+        if product_id is None:
+            fields = AdminProductCreate.model_validate(data).model_dump()
+        else:
+            fields = AdminProductUpdate.model_validate(data).model_dump(exclude_unset=True)
+
+        if fields.get("category_id") is not None and fields["category_id"] not in self.category_ids:
+            raise ValueError(f"Invalid category_id: {fields['category_id']}")
+        methods = [o["method"] for o in fields.get("shipping_options") or ()]
+        if len(methods) != len(set(methods)):
+            raise ValueError(f"Duplicate shipping method: {methods}")
+        return product_id, fields
+
+    def apply_batch(self, batch: list[tuple[int, int | None, dict]]) -> None:
+        db = self.db
+        ids = [pid for _, pid, _ in batch if pid is not None]
+        existing = {p.id: p for p in db.query(Product).filter(Product.id.in_(ids)).all()} if ids else {}
+
+        written: list[tuple[int, Product, bool]] = []
+        stock_targets: dict[int, int] = {}
+        for line_no, pid, fields in batch:
+            options = fields.pop("shipping_options", None)
+            if pid is None:
+                p = Product(**fields)
+                db.add(p)
+            else:
+                p = existing.get(pid)
+                if p is None:
+                    self.fail(line_no, f"Product not found: {pid}")
+                    continue
+                # 庫存不直接蓋：鎖住再改、差額記異動帳（見 inventory_service.set_stock）
+                qty = fields.pop("stock_qty", None)
+                if qty is not None:
+                    stock_targets[pid] = qty
+                for k, v in fields.items():
+                    setattr(p, k, v)
+            if options is not None:
+                p.shipping_options.clear()
+                for o in options:
+                    p.shipping_options.append(
+                        ProductShippingOption(method=o["method"], fee=o["fee"], region_note=o.get("region_note") or "")
+                    )
+            written.append((line_no, p, pid is None))
+
+        try:
+            db.flush()
+            index_products(db, [p for _, p, _ in written])  # ✅ 搜尋索引跟商品同一個 transaction
+            inventory_service.set_stock(db, stock_targets, inventory_service.IMPORT, "import")
+            inventory_service.record(
+                db, [(p.id, p.stock_qty, inventory_service.IMPORT, "import") for _, p, created in written if created]
+            )
+            done = [(p.id, created) for _, p, created in written]
+            db.commit()
+        except SQLAlchemyError as e:
+            db.rollback()
+            for line_no, _, _ in written:
+                self.fail(line_no, f"Batch write failed: {getattr(e, 'orig', None) or e.__class__.__name__}")
+            return
+        finally:
+            db.expunge_all()
+
+        for product_id, created in done:
+            self.report["created" if created else "updated"] += 1
+            self.touched.append(product_id)
+
+
+def import_products(
+    db: Session,
+    rows: Iterable[tuple[int, dict | Exception]],
+    batch_size: int = 500,
+) -> tuple[dict[str, Any], list[int]]:
+    """回傳 (報告, 有寫入的 product id)"""
+    imp = _Importer(db)
+    batch: list[tuple[int, int | None, dict]] = []
+    for line_no, data in rows:
+        if isinstance(data, Exception):
+            imp.fail(line_no, _row_error(data))
+            continue
+        try:
+            product_id, fields = imp.validate(data)
+        except (ValueError, ValidationError) as e:
+            imp.fail(line_no, _row_error(e))
+            continue
+        batch.append((line_no, product_id, fields))
+        if len(batch) >= batch_size:
+            imp.apply_batch(batch)
+            batch = []
+    if batch:
+        imp.apply_batch(batch)
+    return imp.report, imp.touched
+
+
+# ===== 匯出 =====
+
+_EXPORT_COLUMNS = (
+    Product.id,
+    Product.name,
+    Product.category_id,
+    Product.price,
+    Product.stock_qty,
+    Product.is_active,
+    Product.description,
+    Product.description_text,
+    Product.image_url,
+)
+
+
+def _export_batches(db: Session, batch_size: int) -> Iterator[list[dict]]:
+    last_id = 0
+    while True:
+        rows = (
+            db.query(*_EXPORT_COLUMNS)
+            .filter(Product.id > last_id)
+            .order_by(Product.id.asc())
+            .limit(batch_size)
+            .all()
+        )
+        if not rows:
+            return
+        ids = [r.id for r in rows]
+        options: dict[int, list[dict]] = {pid: [] for pid in ids}
+        for o in (
+            db.query(
+                ProductShippingOption.product_id,
+                ProductShippingOption.method,
+                ProductShippingOption.fee,
+                ProductShippingOption.region_note,
+            )
+            .filter(ProductShippingOption.product_id.in_(ids))
+            .order_by(ProductShippingOption.product_id, ProductShippingOption.id)
+        ):
+            options[o.product_id].append({"method": o.method, "fee": o.fee, "region_note": o.region_note or ""})
+
+        yield [dict(r._mapping, shipping_options=options[r.id]) for r in rows]
+        last_id = ids[-1]
+
+
+def export_products(db: Session, fmt: str, batch_size: int = 1000) -> Iterator[str]:
+    """一批一段字串；CSV 的 shipping_options 用 JSON 放在一格（匯入吃得回去）"""
+    if fmt == "csv":
+        buf = io.StringIO()
+        writer = csv.DictWriter(buf, fieldnames=CSV_COLUMNS)
+        writer.writeheader()
+        for batch in _export_batches(db, batch_size):
+            for item in batch:
+                item["is_active"] = int(item["is_active"])
+                item["shipping_options"] = json.dumps(item["shipping_options"], ensure_ascii=False)
+                writer.writerow(item)
+            yield buf.getvalue()
+            buf.seek(0)
+            buf.truncate()
+        if buf.tell():
+            yield buf.getvalue()
+        return
+
+    for batch in _export_batches(db, batch_size):
+        yield "".join(json.dumps(item, ensure_ascii=False) + "\n" for item in batch)
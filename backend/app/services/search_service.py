@@ -0,0 +1,238 @@
+# backend/app/services/search_service.py
+"""
+商品全文搜尋（名稱 / 短描述 / 長描述）。
+
+中文沒有空白斷詞，所以先在 Python 這邊把文字切成 token 再交給 DB：
+- 中日韓連續字 → 重疊的二字組（bigram），外加每段最後一個字（單字查詢用 prefix 找得到）
+  「白兔馬克杯」→ 白兔 兔馬 馬克 克杯 杯
+- 英數 → 小寫單字
+查詢用同一套切法：「馬克杯」→ 相鄰片語 "馬克 克杯"；最後一個英文字當 prefix（邊打邊搜）。
+
+索引放在旁邊的表，依 DB 選：
+- SQLite：FTS5 虛擬表 products_fts（rowid = product id），bm25 排序，名稱權重最高
+- Postgres：product_search(product_id, document tsvector) + GIN，ts_rank_cd 排序
+  （用 'simple' 設定吃上面切好的 token，跟 DB locale 無關；pg_trgm 對中文要看 locale，不用）
+
+同步：後台新增 / 修改 / 刪除商品時，跟商品同一個 transaction 呼叫 index_product / remove_product。
+"""
+from __future__ import annotations
+
+import html
+import re
+from typing import Sequence
+
+from sqlalchemy import event, text
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session, noload
+
+from ..models.product import Product
+
+SQLITE_TABLE = "products_fts"
+PG_TABLE = "product_search"
+
+# bm25 欄位權重：name, description, body
+_BM25_WEIGHTS = "10.0, 4.0, 1.0"
+
+# 假名、CJK 統一漢字（含擴充 A）、諺文、相容漢字
+_CJK = "\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uac00-\ud7af\uf900-\ufaff"
+_TOKEN = re.compile(f"[{_CJK}]+|[^\\W_{_CJK}]+")
+_IS_CJK = re.compile(f"[{_CJK}]")
+_TAG = re.compile(r"<[^>]+>")
+
+
+def _strip_html(value: str) -> str:
+    return html.unescape(_TAG.sub(" ", value or ""))
+
+
+def tokenize(value: str) -> list[str]:
+    out: list[str] = []
+    for m in _TOKEN.finditer((value or "").lower()):
+        run = m.group()
+        if _IS_CJK.match(run) and len(run) > 1:
+            out += [run[i:i + 2] for i in range(len(run) - 1)]
+            out.append(run[-1])
+        else:
+            out.append(run)
+    return out
+
+
+def _doc(value: str) -> str:
+    return " ".join(tokenize(value))
+
+
+def _query_terms(q: str) -> list[tuple[str, list[str]]]:
+    """
+    回傳 [(kind, tokens)]：
+    - ("phrase", [bigram...])：兩個字以上的中文 → 相鄰片語
+    - ("prefix", [token])：單一中文字 / 英數字 → prefix
+    """
+    terms: list[tuple[str, list[str]]] = []
+    for m in _TOKEN.finditer((q or "").lower()):
+        run = m.group()
+        if _IS_CJK.match(run) and len(run) > 1:
+            terms.append(("phrase", [run[i:i + 2] for i in range(len(run) - 1)]))
+        else:
+            terms.append(("prefix", [run]))
+    return terms
+
+
+def _fts5_query(terms) -> str:
+    # token 只會有文字 / 數字，不會有引號
+    parts = []
+    for kind, toks in terms:
+        parts.append(f'"{" ".join(toks)}"' if kind == "phrase" else f'"{toks[0]}"*')
+    return " AND ".join(parts)
+
+
+def _tsquery(terms) -> str:
+    parts = []
+    for kind, toks in terms:
+        parts.append(" <-> ".join(f"'{t}'" for t in toks) if kind == "phrase" else f"'{toks[0]}':*")
+    return " & ".join(f"({p})" for p in parts)
+
+
+# ===== schema（create_all / migration 共用） =====
+
+def create_index(conn: Connection) -> None:
+    if conn.dialect.name == "sqlite":
+        conn.exec_driver_sql(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {SQLITE_TABLE} "
+            "USING fts5(name, description, body, tokenize='unicode61 remove_diacritics 2')"
+        )
+    elif conn.dialect.name == "postgresql":
+        conn.exec_driver_sql(
+            f"CREATE TABLE IF NOT EXISTS {PG_TABLE} ("
+            "product_id INTEGER PRIMARY KEY, document TSVECTOR NOT NULL)"
+        )
+        conn.exec_driver_sql(
+            f"CREATE INDEX IF NOT EXISTS ix_{PG_TABLE}_document ON {PG_TABLE} USING GIN (document)"
+        )
+
+
+def drop_index(conn: Connection) -> None:
+    if conn.dialect.name == "sqlite":
+        conn.exec_driver_sql(f"DROP TABLE IF EXISTS {SQLITE_TABLE}")
+    elif conn.dialect.name == "postgresql":
+        conn.exec_driver_sql(f"DROP TABLE IF EXISTS {PG_TABLE}")
+
+
+def is_index_table(name: str) -> bool:
+    """alembic autogenerate 要忽略的表（FTS5 會另外建 products_fts_data 等影子表）"""
+    return name == PG_TABLE or name.startswith(SQLITE_TABLE)
+
+
+# ✅ create_all / drop_all（測試、壓測）時一起建 / 刪；正式環境走 migration
+event.listen(Product.__table__, "after_create", lambda _t, conn, **kw: create_index(conn))
+event.listen(Product.__table__, "before_drop", lambda _t, conn, **kw: drop_index(conn))
+
+
+# ===== 同步 =====
+
+def index_product(db: Session, p: Product) -> None:
+    """新增 / 修改商品後呼叫（p.id 要已經有值：新增時先 flush）"""
+    index_products(db, [p])
+
+
+def index_products(db: Session, products: list[Product]) -> None:
+    """一次索引多個商品（批次匯入用：每種語句一次 executemany）"""
+    if not products:
+        return
+    params = [
+        {
+            "id": p.id,
+            "name": _doc(p.name),
+            "desc": _doc(p.description or ""),
+            "body": _doc(_strip_html(p.description_text or "")),
+        }
+        for p in products
+    ]
+    if db.get_bind().dialect.name == "postgresql":
+        db.execute(
+            text(
+                f"INSERT INTO {PG_TABLE} (product_id, document) VALUES (:id, "
+                "setweight(to_tsvector('simple', :name), 'A') || "
+                "setweight(to_tsvector('simple', :desc), 'B') || "
+                "setweight(to_tsvector('simple', :body), 'C')) "
+                "ON CONFLICT (product_id) DO UPDATE SET document = EXCLUDED.document"
+            ),
+            params,
+        )
+        return
+
+    db.execute(text(f"DELETE FROM {SQLITE_TABLE} WHERE rowid = :id"), [{"id": x["id"]} for x in params])
+    db.execute(
+        text(f"INSERT INTO {SQLITE_TABLE} (rowid, name, description, body) VALUES (:id, :name, :desc, :body)"),
+        params,
+    )
+
+
+def remove_product(db: Session, product_id: int) -> None:
+    if db.get_bind().dialect.name == "postgresql":
+        db.execute(text(f"DELETE FROM {PG_TABLE} WHERE product_id = :id"), {"id": product_id})
+    else:
+        db.execute(text(f"DELETE FROM {SQLITE_TABLE} WHERE rowid = :id"), {"id": product_id})
+
+
+def rebuild(db: Session, batch_size: int = 1000) -> int:
+    """整個重建（migration 第一次建索引、或切詞規則改了之後）"""
+    if db.get_bind().dialect.name == "postgresql":
+        db.execute(text(f"DELETE FROM {PG_TABLE}"))
+    else:
+        db.execute(text(f"DELETE FROM {SQLITE_TABLE}"))
+
+    n = 0
+    last_id = 0
+    while True:
+        rows = (
+            db.query(Product)
+            .filter(Product.id > last_id)
+            .order_by(Product.id.asc())
+            .limit(batch_size)
+            .all()
+        )
+        if not rows:
+            break
+        index_products(db, rows)
+        n += len(rows)
+        last_id = rows[-1].id
+        db.expunge_all()
+    return n
+
+
+# ===== 查詢 =====
+
+def search_ids(db: Session, q: str, limit: int, offset: int = 0) -> list[int]:
+    """回傳上架中、符合 q 的商品 id（相關度高的在前；同分用 id 排，分頁才穩定）"""
+    terms = _query_terms(q)
+    if not terms:
+        return []
+
+    if db.get_bind().dialect.name == "postgresql":
+        stmt = text(
+            f"SELECT s.product_id FROM {PG_TABLE} s "
+            "JOIN products p ON p.id = s.product_id, to_tsquery('simple', :q) query "
+            "WHERE s.document @@ query AND p.is_active "
+            "ORDER BY ts_rank_cd(s.document, query) DESC, s.product_id "
+            "LIMIT :limit OFFSET :offset"
+        )
+        params = {"q": _tsquery(terms), "limit": limit, "offset": offset}
+    else:
+        stmt = text(
+            f"SELECT {SQLITE_TABLE}.rowid FROM {SQLITE_TABLE} JOIN products p ON p.id = {SQLITE_TABLE}.rowid "
+            f"WHERE {SQLITE_TABLE} MATCH :q AND p.is_active = 1 "
+            f"ORDER BY bm25({SQLITE_TABLE}, {_BM25_WEIGHTS}), {SQLITE_TABLE}.rowid "
+            "LIMIT :limit OFFSET :offset"
+        )
+        params = {"q": _fts5_query(terms), "limit": limit, "offset": offset}
+
+    return [r[0] for r in db.execute(stmt, params)]
+
+
+def search(db: Session, q: str, limit: int, offset: int = 0, *, columns: Sequence | None = None) -> list:
+    """相關度排序的商品；給 columns 就只 select 那些欄位（row tuple，要含 Product.id），不建 ORM 物件"""
+    ids = search_ids(db, q, limit, offset)
+    if not ids:
+        return []
+    query = db.query(*columns) if columns else db.query(Product).options(noload(Product.shipping_options))
+    by_id = {p.id: p for p in query.filter(Product.id.in_(ids)).all()}
+    return [by_id[i] for i in ids if i in by_id]
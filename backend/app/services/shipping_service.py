@@ -0,0 +1,156 @@
+# backend/app/services/shipping_service.py
+"""
+運費引擎：每個商品可用哪些運送方式、各多少運費。
+
+- 每個商品預先整理成一筆精簡資料：可用方式的 bitmask + 各方式運費（+ 前台要顯示的 options）
+- 一台購物車：把各品項的 bitmask AND 起來就是「每件都能寄」的方式，O(品項數)
+- 運費規則（SHIPPING_FEE_RULE）：
+    max = 取各品項該方式運費的最高值（預設，一箱寄出）
+    sum = 各品項運費相加（每個商品分開寄）
+- 快取：行程內，以 product_id 為單位；缺的一次查回來。後台改商品時 forget(product_id)，
+  另有 TTL（跟商品列表快取同一個設定），多 worker 最晚 TTL 秒後一致
+"""
+from __future__ import annotations
+
+import threading
+import time
+from dataclasses import dataclass
+from typing import Iterable, Literal
+
+from sqlalchemy.orm import Session
+
+from ..config import settings
+from ..models.product_shipping_option import ProductShippingOption
+
+# 順序 = bit 位置 = 前台顯示順序
+METHODS = ("post", "courier", "cvs_711", "cvs_family")
+_BIT = {m: 1 << i for i, m in enumerate(METHODS)}
+ALL_METHODS = (1 << len(METHODS)) - 1
+
+_MAX_PRODUCTS = 50_000
+
+
+@dataclass(frozen=True, slots=True)
+class ProductShipping:
+    mask: int
+    fees: tuple[int, ...]               # 依 METHODS 順序；不支援的方式是 0（看 mask）
+    options: tuple[dict, ...]           # 前台用：[{method, fee, region_note}]
+    expires_at: float = 0.0
+
+    def allows(self, method: str) -> bool:
+        return bool(self.mask & _BIT.get(method, 0))
+
+
+@dataclass(frozen=True)
+class CartShipping:
+    methods: dict[str, int]             # 每件都支援的方式 → 運費（依 METHODS 順序）
+
+    def fee(self, method: str) -> int | None:
+        return self.methods.get(method)
+
+
+def _combine(rule: Literal["max", "sum"], a: int, b: int) -> int:
+    return a + b if rule == "sum" else max(a, b)
+
+
+class ShippingEngine:
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._entries: dict[int, ProductShipping] = {}
+        self._generation = 0
+
+    def forget(self, *product_ids: int) -> None:
+        with self._lock:
+            for pid in product_ids:
+                self._entries.pop(pid, None)
+            self._generation += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._generation += 1
+
+    def lookup(self, db: Session, product_ids: Iterable[int]) -> dict[int, ProductShipping]:
+        now = time.monotonic()
+        out: dict[int, ProductShipping] = {}
+        missing: list[int] = []
+        for pid in product_ids:
+            e = self._entries.get(pid)
+            if e is not None and e.expires_at > now:
+                out[pid] = e
+            else:
+                missing.append(pid)
+        if not missing:
+            return out
+
+        # ⚠️ 先記下 generation：查詢途中若被 forget，這批結果就不存（下次重查）
+        generation = self._generation
+        rows = (
+            db.query(
+                ProductShippingOption.product_id,
+                ProductShippingOption.method,
+                ProductShippingOption.fee,
+                ProductShippingOption.region_note,
+            )
+            .filter(ProductShippingOption.product_id.in_(missing))
+            .order_by(ProductShippingOption.product_id, ProductShippingOption.id)
+            .all()
+        )
+        grouped: dict[int, list] = {pid: [] for pid in missing}
+        for r in rows:
+            grouped[r.product_id].append(r)
+
+        expires_at = now + max(int(getattr(settings, "catalog_cache_ttl_seconds", 30) or 0), 0)
+        loaded: dict[int, ProductShipping] = {}
+        for pid, opts in grouped.items():
+            mask = 0
+            fees = [0] * len(METHODS)
+            for o in opts:
+                bit = _BIT.get(o.method)
+                if bit is None:
+                    continue
+                mask |= bit
+                fees[METHODS.index(o.method)] = o.fee
+            loaded[pid] = ProductShipping(
+                mask,
+                tuple(fees),
+                tuple({"method": o.method, "fee": o.fee, "region_note": o.region_note or ""} for o in opts),
+                expires_at,
+            )
+
+        with self._lock:
+            if generation == self._generation:
+                if len(self._entries) + len(loaded) > _MAX_PRODUCTS:
+                    self._entries.clear()
+                self._entries.update(loaded)
+        out.update(loaded)
+        return out
+
+    def quote(self, db: Session, product_ids: Iterable[int], rule: Literal["max", "sum"] | None = None) -> CartShipping:
+        """購物車可用的運送方式與運費（product_ids 只放買得到的品項）"""
+        rule = rule or settings.shipping_fee_rule
+        entries = self.lookup(db, list(product_ids))
+        if not entries:
+            return CartShipping({})
+
+        mask = ALL_METHODS
+        for e in entries.values():
+            mask &= e.mask
+
+        methods: dict[str, int] = {}
+        for i, m in enumerate(METHODS):
+            if not mask & (1 << i):
+                continue
+            fee = None
+            for e in entries.values():
+                fee = e.fees[i] if fee is None else _combine(rule, fee, e.fees[i])
+            methods[m] = fee or 0
+        return CartShipping(methods)
+
+
+shipping_engine = ShippingEngine()
+
+
+def product_options(db: Session, product_ids: Iterable[int]) -> dict[int, tuple[dict, ...]]:
+    """商品列表用：{product_id: shipping_options}（不用 ORM relationship 另外 selectin 一次）"""
+    return {pid: e.options for pid, e in shipping_engine.lookup(db, product_ids).items()}
@@ -3,6 +3,10 @@ import os
 import uvicorn
 
 def main():
+    from . import migrate
+
+    # ✅ 先升級 schema（只跑一次），再開 uvicorn；跟 python -m app.migrate 同一套（含 dev 的 SEED_DEMO_DATA）
+    migrate.main([])
     port = int(os.getenv("PORT", "8000"))
     uvicorn.run("app.main:app", host="0.0.0.0", port=port)
 
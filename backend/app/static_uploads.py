@@ -0,0 +1,98 @@
+# backend/app/static_uploads.py
+"""
+/uploads 專用的靜態檔 handler。
+
+上傳檔名都是唯一的（sha256 內容定址；舊檔是 uuid），同一個網址內容永遠不會變，所以：
+- Cache-Control: public, max-age=31536000, immutable → 瀏覽器一年內連 revalidate 都不用
+- 內容定址檔名直接拿 hash 當強 ETag
+- Range（斷點續傳 / 影片拖拉）沿用 Starlette FileResponse
+- 若旁邊有預先壓好的 .br / .gz（例如 SVG），且瀏覽器支援，就直接送壓縮檔
+"""
+from __future__ import annotations
+
+import mimetypes
+import os
+import re
+import stat
+
+from starlette.datastructures import Headers
+from starlette.exceptions import HTTPException
+from starlette.responses import FileResponse, Response
+from starlette.staticfiles import NotModifiedResponse, StaticFiles
+from starlette.types import Scope
+
+IMMUTABLE = "public, max-age=31536000, immutable"
+
+# <sha256>.<ext> 或 <sha256>_<variant>.webp
+_CONTENT_ADDRESSED = re.compile(r"^([0-9a-f]{64}(?:_[a-z]+)?)\.[a-z0-9]+$")
+
+# 偏好順序：br 比 gzip 小
+_PRECOMPRESSED = (("br", ".br"), ("gzip", ".gz"))
+
+
+def _accepts(accept_encoding: str, coding: str) -> bool:
+    """Accept-Encoding 有列出這個 coding 且 q > 0"""
+    for part in accept_encoding.split(","):
+        name, *params = [x.strip() for x in part.split(";")]
+        if name.lower() != coding:
+            continue
+        for param in params:
+            key, _, value = param.partition("=")
+            if key.strip().lower() == "q":
+                try:
+                    return float(value) > 0
+                except ValueError:
+                    return False
+        return True
+    return False
+
+
+class UploadsStaticFiles(StaticFiles):
+    async def get_response(self, path: str, scope: Scope) -> Response:
+        # 上傳中的暫存檔（.upload-xxx.tmp）/ 壓縮副本不直接對外
+        name = os.path.basename(path)
+        if name.startswith(".") or name.endswith((".br", ".gz")):
+            raise HTTPException(status_code=404)
+        return await super().get_response(path, scope)
+
+    def file_response(
+        self,
+        full_path,
+        stat_result: os.stat_result,
+        scope: Scope,
+        status_code: int = 200,
+    ) -> Response:
+        request_headers = Headers(scope=scope)
+        full_path = str(full_path)
+        name = os.path.basename(full_path)
+
+        serve_path, encoding, serve_stat = full_path, None, stat_result
+        accept = request_headers.get("accept-encoding", "")
+        for coding, suffix in _PRECOMPRESSED:
+            if not _accepts(accept, coding):
+                continue
+            try:
+                st = os.stat(full_path + suffix)
+            except OSError:
+                continue
+            if stat.S_ISREG(st.st_mode):
+                serve_path, encoding, serve_stat = full_path + suffix, coding, st
+                break
+
+        response = FileResponse(
+            serve_path,
+            status_code=status_code,
+            stat_result=serve_stat,
+            media_type=mimetypes.guess_type(name)[0] or "application/octet-stream",
+        )
+        m = _CONTENT_ADDRESSED.match(name)
+        if m:
+            response.headers["etag"] = f'"{m.group(1)}{"-" + encoding if encoding else ""}"'
+        response.headers["cache-control"] = IMMUTABLE
+        if encoding:
+            response.headers["content-encoding"] = encoding
+        response.headers["vary"] = "Accept-Encoding"
+
+        if self.is_not_modified(response.headers, request_headers):
+            return NotModifiedResponse(response.headers)
+        return response
@@ -0,0 +1,234 @@
+# backend/bench/bench_async_reads.py
+"""
+前台讀取路由：sync（改版前）vs async（AsyncSession + run_sync），每個 worker 能同時服務多少 request。
+
+    cd backend
+    python -m bench.bench_async_reads [--rtt-ms 5] [--concurrency 40 --concurrency 200] [--requests 3000]
+
+- 同一份資料（bench.harness.build_dataset）、同樣的查詢，只差路由是 def + Session（threadpool）
+  還是 async def + AsyncSession（event loop）。商品列表快取關掉，每個 request 都查 DB
+- --rtt-ms：每個 SQL statement 多等幾毫秒，模擬 DB 在網路另一端（Postgres / 雲端 DB）；
+  在 driver 的執行緒裡 sleep（sync 是 request thread，aiosqlite 是連線自己的 thread），不擋 event loop
+- 情境：GET /products?limit=50、/categories、/orders/{id}?include=items 輪流打
+輸出 JSON：每種模式 × 併發數的 rps / p50 / p99（ms）；rps × 平均延遲 ≈ 實際同時在處理的 request 數。
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import random
+import statistics
+import time
+from pathlib import Path
+
+from bench.harness import _TMP, build_dataset  # 先 import：它會把 DB / uploads 指到暫存區
+
+import httpx
+from fastapi import Depends, FastAPI, HTTPException
+from sqlalchemy import create_engine, event
+from sqlalchemy.ext.asyncio import AsyncEngine, async_sessionmaker
+from sqlalchemy.orm import Session, noload, sessionmaker
+
+from app.config import settings
+from app.db import Base, build_async_engines, get_async_db, get_async_read_db
+from app.main import app as _main_app  # noqa: F401 — 註冊所有 model / 搜尋索引 DDL
+from app.models.category import Category
+from app.models.order import Order
+from app.models.order_item import OrderItem
+from app.models.product import Product
+from app.routers import categories, orders, products
+from app.schemas.category import CategoryOut
+from app.services.order_query import load_items
+from app.services.shipping_service import product_options
+
+
+# ===== 模擬 DB 往返延遲 =====
+
+def _add_rtt(sync_engine, rtt: float, is_async: bool) -> None:
+    if rtt <= 0:
+        return
+
+    def on_connect(dbapi_conn, _record):
+        def slow(_sql):
+            time.sleep(rtt)
+
+        if is_async:
+            # aiosqlite：callback 在連線自己的 thread 執行
+            dbapi_conn.await_(dbapi_conn._connection.set_trace_callback(slow))
+        else:
+            dbapi_conn.set_trace_callback(slow)
+
+    event.listen(sync_engine, "connect", on_connect)
+
+
+# ===== 改版前的 sync 路由（同樣的查詢） =====
+
+def _sync_app(factory: sessionmaker) -> FastAPI:
+    app = FastAPI()
+
+    def get_db():
+        db = factory()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    @app.get("/products")
+    def list_products(limit: int = 50, db: Session = Depends(get_db)):
+        rows = (
+            db.query(Product)
+            .options(noload(Product.shipping_options))
+            .filter(Product.is_active == True)  # noqa: E712
+            .order_by(Product.id.asc())
+            .limit(limit + 1)
+            .all()
+        )[:limit]
+        return products._dump_public(rows, product_options(db, [p.id for p in rows]))
+
+    @app.get("/categories")
+    def list_categories(db: Session = Depends(get_db)):
+        rows = db.query(Category).filter(Category.is_active == True).order_by(Category.sort_order, Category.id).all()  # noqa: E712
+        return [CategoryOut.model_validate(c) for c in rows]
+
+    @app.get("/orders/{order_id}")
+    def get_order(order_id: int, include: str | None = None, db: Session = Depends(get_db)):
+        o = db.query(Order).filter(Order.id == order_id).first()
+        if not o:
+            raise HTTPException(status_code=404)
+        data = {"id": o.id, "customer_name": o.customer_name, "total_amount": o.total_amount}
+        if include == "items":
+            data["items"] = load_items(db, [o.id]).get(o.id, [])
+        return data
+
+    return app
+
+
+def _async_app(async_engine: AsyncEngine) -> FastAPI:
+    """正式的 async 路由（products / categories / orders），跟 sync 版一樣不掛 middleware"""
+    app = FastAPI()
+    for r in (products.router, categories.router, orders.router):
+        app.include_router(r)
+    factory = async_sessionmaker(bind=async_engine, autoflush=False, expire_on_commit=False)
+
+    async def get_db():
+        async with factory() as db:
+            yield db
+
+    app.dependency_overrides[get_async_db] = get_db
+    app.dependency_overrides[get_async_read_db] = get_db
+    return app
+
+
+# ===== 壓測 =====
+
+def _paths(order_ids: list[int], n: int, seed: int) -> list[str]:
+    rnd = random.Random(seed)
+    choices = ["/products?limit=50", "/categories", None]
+    out = []
+    for i in range(n):
+        path = choices[i % 3]
+        out.append(path or f"/orders/{rnd.choice(order_ids)}?include=items")
+    return out
+
+
+async def _drive(app: FastAPI, paths: list[str], concurrency: int) -> dict:
+    transport = httpx.ASGITransport(app=app)
+    latencies: list[float] = []
+    errors = 0
+    it = iter(paths)
+
+    async def worker(c: httpx.AsyncClient) -> None:
+        nonlocal errors
+        for path in it:
+            t0 = time.perf_counter()
+            r = await c.get(path)
+            latencies.append(time.perf_counter() - t0)
+            errors += r.status_code != 200
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=120) as c:
+        await worker_warmup(c, paths)
+        t0 = time.perf_counter()
+        await asyncio.gather(*(worker(c) for _ in range(concurrency)))
+        elapsed = time.perf_counter() - t0
+
+    lat = sorted(latencies)
+    rps = len(lat) / elapsed
+    mean = statistics.fmean(lat)
+    return {
+        "requests": len(lat),
+        "errors": errors,
+        "rps": round(rps, 1),
+        "p50_ms": round(lat[len(lat) // 2] * 1000, 2),
+        "p99_ms": round(lat[min(int(len(lat) * 0.99), len(lat) - 1)] * 1000, 2),
+        # Little's law：平均同時在系統裡（含排隊）的 request 數
+        "in_flight": round(rps * mean, 1),
+    }
+
+
+async def worker_warmup(c: httpx.AsyncClient, paths: list[str]) -> None:
+    for path in paths[:30]:
+        await c.get(path)
+
+
+async def _run(args) -> dict:
+    url = f"sqlite:///{_TMP / 'async_reads.db'}"
+    sync_engine = create_engine(
+        url,
+        connect_args={"check_same_thread": False, "timeout": 30},
+        pool_size=128,  # 連線池不是瓶頸：sync 的上限是 threadpool（40）
+        max_overflow=0,
+    )
+    Base.metadata.drop_all(bind=sync_engine)
+    Base.metadata.create_all(bind=sync_engine)
+    factory = sessionmaker(bind=sync_engine, autocommit=False, autoflush=False)
+    build_dataset(factory, args.products, 10, args.orders, args.seed)
+    with factory() as db:
+        order_ids = [oid for (oid,) in db.query(Order.id)]
+
+    rtt = args.rtt_ms / 1000
+    _add_rtt(sync_engine, rtt, is_async=False)
+    sync_engine.dispose()  # 建資料時開的連線沒有掛延遲，丟掉重開
+    async_engine, _ = build_async_engines(url, sqlite_production=False)
+    _add_rtt(async_engine.sync_engine, rtt, is_async=True)
+
+    settings.enable_catalog_cache = 0  # 每個 request 都查 DB
+    apps = {"sync": _sync_app(factory), "async": _async_app(async_engine)}
+    report: dict = {
+        "rtt_ms": args.rtt_ms,
+        "async_pool": settings.async_db_pool_size + settings.async_db_max_overflow,
+        "results": {},
+    }
+    try:
+        for concurrency in args.concurrency:
+            paths = _paths(order_ids, args.requests, args.seed)
+            for mode, app in apps.items():
+                report["results"][f"{mode}@{concurrency}"] = await _drive(app, paths, concurrency)
+    finally:
+        await async_engine.dispose()
+        sync_engine.dispose()
+    return report
+
+
+def main(argv: list[str] | None = None) -> dict:
+    parser = argparse.ArgumentParser(description="Sync vs async storefront read routes")
+    parser.add_argument("--rtt-ms", type=float, default=5.0)
+    parser.add_argument("--concurrency", type=int, action="append")
+    parser.add_argument("--requests", type=int, default=3000)
+    parser.add_argument("--products", type=int, default=2000)
+    parser.add_argument("--orders", type=int, default=500)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--out")
+    args = parser.parse_args(argv)
+    args.concurrency = args.concurrency or [40, 200]
+
+    report = asyncio.run(_run(args))
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.out:
+        Path(args.out).write_text(text, encoding="utf-8")
+    print(text)
+    return report
+
+
+if __name__ == "__main__":
+    main()
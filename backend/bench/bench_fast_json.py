@@ -0,0 +1,103 @@
+# backend/bench/bench_fast_json.py
+"""
+列表 API 序列化的 microbenchmark：FAST_JSON_LISTS=0（ORM + Pydantic 驗證）vs 1（row tuple + TypeAdapter）。
+
+    cd backend
+    python -m bench.bench_fast_json [--products 5000] [--orders 2000] [--repeat 20]
+
+每個端點依序打 --repeat 次（單一連線、商品列表快取關掉），量整個 request 的延遲；
+兩種模式打的是同一份資料，並確認回應 bytes 相同。
+輸出 JSON：每個端點 × 模式的 p50 / mean（ms）、回應大小，外加 speedup（p50 比值）。
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import statistics
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+from bench.harness import _TMP, bind, build_dataset  # 先 import：它會把 DB / uploads 指到暫存區
+
+import httpx
+
+from app.config import settings
+from app.main import app
+from app.routers import admin_auth
+
+ENDPOINTS = {
+    "products_all": "/products",
+    "products_page": "/products?limit=50",
+    "admin_products": "/admin/products",
+    "admin_orders": "/admin/orders?limit=200",
+    "admin_orders_items": "/admin/orders?limit=200&include=items",
+}
+
+
+async def _measure(c: httpx.AsyncClient, path: str, repeat: int) -> tuple[dict, bytes]:
+    headers = {"X-Admin-Token": settings.admin_token or ""}
+    body = b""
+    samples = []
+    for i in range(repeat + 2):
+        t0 = time.perf_counter()
+        r = await c.get(path, headers=headers)
+        dt = time.perf_counter() - t0
+        r.raise_for_status()
+        body = r.content
+        if i >= 2:  # 前兩次暖身（運費引擎快取、SQLite page cache）
+            samples.append(dt * 1000)
+    return {
+        "p50_ms": round(statistics.median(samples), 2),
+        "mean_ms": round(statistics.fmean(samples), 2),
+        "bytes": len(body),
+    }, body
+
+
+async def _run(args) -> dict:
+    factory, async_engine = bind(f"sqlite:///{_TMP / 'fast_json.db'}")
+    build_dataset(factory, args.products, 20, args.orders, args.seed)
+    admin_auth.ADMIN_EXPIRES_AT = datetime.now(timezone.utc) + timedelta(days=1)
+    settings.enable_catalog_cache = 0
+
+    report: dict = {"products": args.products, "orders": args.orders, "repeat": args.repeat, "endpoints": {}}
+    transport = httpx.ASGITransport(app=app)
+    try:
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=120) as c:
+            for name, path in ENDPOINTS.items():
+                out: dict = {}
+                bodies = []
+                for mode, flag in (("orm", 0), ("fast", 1)):
+                    settings.fast_json_lists = flag
+                    out[mode], body = await _measure(c, path, args.repeat)
+                    bodies.append(body)
+                out["same_bytes"] = bodies[0] == bodies[1]
+                out["speedup"] = round(out["orm"]["p50_ms"] / out["fast"]["p50_ms"], 2)
+                report["endpoints"][name] = out
+    finally:
+        settings.fast_json_lists = 0
+        app.dependency_overrides.clear()
+        await async_engine.dispose()
+    return report
+
+
+def main(argv: list[str] | None = None) -> dict:
+    parser = argparse.ArgumentParser(description="ORM + Pydantic vs row tuples + TypeAdapter for list endpoints")
+    parser.add_argument("--products", type=int, default=5000)
+    parser.add_argument("--orders", type=int, default=2000)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--out")
+    args = parser.parse_args(argv)
+
+    report = asyncio.run(_run(args))
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.out:
+        Path(args.out).write_text(text, encoding="utf-8")
+    print(text)
+    return report
+
+
+if __name__ == "__main__":
+    main()
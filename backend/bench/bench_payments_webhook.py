@@ -0,0 +1,236 @@
+# backend/bench/bench_payments_webhook.py
+"""
+假金流：對 /payments/webhook 重放幾千個簽好章的事件，量 ack 延遲，並驗證每個事件只套用一次。
+
+    cd backend
+    python -m bench.bench_payments_webhook [--orders 3000] [--duplicates 0.3] [--refunds 0.05]
+                                           [--concurrency 8] [--processors 2] [--db sqlite|postgres]
+
+流程（in-process ASGI，不含網路）：
+1. 建 N 張 pending 訂單
+2. 每張一個 payment.succeeded；一部分重送（同 event_id，模擬金流 timeout 重試）；
+   一部分之後再來 payment.refunded。全部打散後併發送出
+3. 送的同時跑 --processors 個背景 processor（跟 API 行程裡的 loop 一樣呼叫 drain）
+4. 檢查：每個 event_id 只存一筆、每張訂單最後狀態正確、applied 數 = 事件數（沒有套兩次）
+輸出 JSON：ack p50 / p95 / p99（ms）、webhook rps、全部套用完的時間、檢查結果。
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import statistics
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+_TMP = Path(tempfile.mkdtemp(prefix="mini-shop-payments-"))
+os.environ.setdefault("ENV", "test")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{_TMP / 'import.db'}")
+os.environ.setdefault("UPLOAD_DIR", str(_TMP / "uploads"))
+
+import httpx  # noqa: E402
+from sqlalchemy import func, insert  # noqa: E402
+from sqlalchemy.orm import sessionmaker  # noqa: E402
+
+from app.config import settings  # noqa: E402
+from app.db import Base, build_engines, get_db  # noqa: E402
+from app.main import app  # noqa: E402
+from app.models.order import Order  # noqa: E402
+from app.models.payment_event import PaymentEvent  # noqa: E402
+from app.services import payment_service  # noqa: E402
+
+SECRET = "whsec_bench"
+
+
+def _setup(url: str, n_orders: int) -> sessionmaker:
+    engine, _ = build_engines(url, sqlite_production=url.startswith("sqlite"))
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    with engine.begin() as conn:
+        conn.execute(
+            insert(Order),
+            [
+                {
+                    "customer_name": "Bench",
+                    "customer_email": "bench@example.com",
+                    "customer_phone": "",
+                    "shipping_method": "post",
+                    "shipping_address": "",
+                    "total_amount": 100 + i,
+                    "status": "pending",
+                }
+                for i in range(n_orders)
+            ],
+        )
+    factory = sessionmaker(bind=engine, autocommit=False, autoflush=False)
+
+    def _get_db():
+        db = factory()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    app.dependency_overrides[get_db] = _get_db
+    return factory
+
+
+def _events(order_ids: list[int], totals: dict[int, int], duplicates: float, refunds: float, seed: int):
+    rnd = random.Random(seed)
+    first, later = [], []
+    refunded = set()
+    for oid in order_ids:
+        ev = {"id": f"evt_pay_{oid}", "type": "payment.succeeded", "data": {"order_id": oid, "amount": totals[oid]}}
+        first.append(ev)
+        if rnd.random() < duplicates:
+            first.append(ev)  # 金流沒收到 2xx 就重送
+        if rnd.random() < refunds:
+            refunded.add(oid)
+            later.append({"id": f"evt_refund_{oid}", "type": "payment.refunded", "data": {"order_id": oid}})
+    rnd.shuffle(first)
+    return first, later, refunded
+
+
+async def _send_all(events: list[dict], concurrency: int) -> tuple[list[float], int]:
+    transport = httpx.ASGITransport(app=app)
+    latencies: list[float] = []
+    duplicates = 0
+    queue: asyncio.Queue = asyncio.Queue()
+    for ev in events:
+        queue.put_nowait(ev)
+
+    async def worker(client: httpx.AsyncClient) -> None:
+        nonlocal duplicates
+        while not queue.empty():
+            ev = queue.get_nowait()
+            body = json.dumps(ev).encode()
+            t0 = time.perf_counter()
+            r = await client.post(
+                "/payments/webhook",
+                content=body,
+                headers={payment_service.SIGNATURE_HEADER: payment_service.sign(SECRET, body)},
+            )
+            latencies.append((time.perf_counter() - t0) * 1000)
+            if r.status_code != 200:
+                raise RuntimeError(f"webhook returned {r.status_code}: {r.text}")
+            duplicates += r.json()["duplicate"]
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        await asyncio.gather(*(worker(client) for _ in range(concurrency)))
+    return latencies, duplicates
+
+
+def _pct(samples: list[float], p: float) -> float:
+    s = sorted(samples)
+    return round(s[min(int(len(s) * p), len(s) - 1)], 2)
+
+
+def run(url: str, n_orders: int, duplicates: float, refunds: float, concurrency: int, processors: int) -> dict:
+    settings.payment_webhook_secret = SECRET
+    factory = _setup(url, n_orders)
+    with factory() as db:
+        totals = dict(db.query(Order.id, Order.total_amount))
+    first, later, refunded = _events(sorted(totals), totals, duplicates, refunds, seed=42)
+
+    # 背景 processor：跟 API 行程裡的 loop 一樣，一直 drain 直到送完而且沒有 pending
+    sending = threading.Event()
+    sending.set()
+    applied: dict[str, int] = {}
+    lock = threading.Lock()
+
+    def processor() -> None:
+        while True:
+            counts = payment_service.drain(factory)
+            with lock:
+                for k, v in counts.items():
+                    applied[k] = applied.get(k, 0) + v
+            if not counts:
+                if not sending.is_set():
+                    return
+                time.sleep(0.01)
+
+    threads = [threading.Thread(target=processor) for _ in range(processors)]
+    for t in threads:
+        t.start()
+
+    t0 = time.perf_counter()
+    lat1, dup1 = asyncio.run(_send_all(first, concurrency))
+    lat2, dup2 = asyncio.run(_send_all(later, concurrency)) if later else ([], 0)
+    send_seconds = time.perf_counter() - t0
+    sending.clear()
+    for t in threads:
+        t.join()
+    total_seconds = time.perf_counter() - t0
+
+    latencies = lat1 + lat2
+    with factory() as db:
+        stored = db.query(func.count(PaymentEvent.id)).scalar()
+        statuses = dict(db.query(Order.id, Order.status))
+        by_result = dict(
+            db.query(PaymentEvent.status, func.count(PaymentEvent.id)).group_by(PaymentEvent.status).all()
+        )
+    app.dependency_overrides.clear()
+
+    # 退款在付款全部收完之後才送；processor 依收到順序（id）處理，所以付款一定先套用
+    expected = {oid: ("cancelled" if oid in refunded else "paid") for oid in totals}
+    checks = {
+        "each_event_stored_once": stored == n_orders + len(later),
+        "duplicates_acknowledged": dup1 + dup2 == len(first) + len(later) - stored,
+        "orders_in_expected_state": statuses == expected,
+        "applied_exactly_once": by_result.get("applied", 0) == n_orders + len(refunded)
+        and applied.get("applied", 0) == n_orders + len(refunded),
+        "nothing_left_pending": by_result.get("pending", 0) == 0,
+    }
+    return {
+        "requests": len(latencies),
+        "unique_events": stored,
+        "ack_ms": {
+            "p50": round(statistics.median(latencies), 2),
+            "p95": _pct(latencies, 0.95),
+            "p99": _pct(latencies, 0.99),
+        },
+        "webhook_rps": round(len(latencies) / send_seconds, 1),
+        "all_applied_seconds": round(total_seconds, 2),
+        "events": by_result,
+        "checks": checks,
+        "ok": all(checks.values()),
+    }
+
+
+def main(argv: list[str] | None = None) -> dict:
+    parser = argparse.ArgumentParser(description="Replay signed payment events against the webhook")
+    parser.add_argument("--db", choices=["sqlite", "postgres"], default="sqlite")
+    parser.add_argument("--postgres-url", default=os.getenv("BENCH_POSTGRES_URL"))
+    parser.add_argument("--orders", type=int, default=3000)
+    parser.add_argument("--duplicates", type=float, default=0.3)
+    parser.add_argument("--refunds", type=float, default=0.05)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--processors", type=int, default=2)
+    parser.add_argument("--out")
+    args = parser.parse_args(argv)
+
+    if args.db == "postgres":
+        if not args.postgres_url:
+            parser.error("--postgres-url (or BENCH_POSTGRES_URL) is required for --db postgres")
+        url = args.postgres_url
+    else:
+        url = f"sqlite:///{_TMP / 'payments.db'}"
+
+    report = {
+        "db": args.db,
+        "orders": args.orders,
+        **run(url, args.orders, args.duplicates, args.refunds, args.concurrency, args.processors),
+    }
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.out:
+        Path(args.out).write_text(text, encoding="utf-8")
+    print(text)
+    return report
+
+
+if __name__ == "__main__":
+    main()
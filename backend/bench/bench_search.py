@@ -0,0 +1,112 @@
+# backend/bench/bench_search.py
+"""
+商品搜尋延遲：灌 N 筆（預設 10 萬）中文商品 → 建索引 → 打一組常見查詢，看 p50 / p95。
+
+用法（在 backend/ 底下）：
+  python -m bench.bench_search --products 100000
+  python -m bench.bench_search --db postgres --postgres-url postgresql+psycopg://...
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import random
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+_TMP = Path(tempfile.mkdtemp(prefix="mini-shop-search-"))
+os.environ.setdefault("ENV", "test")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{_TMP / 'import.db'}")
+
+from sqlalchemy import create_engine, insert  # noqa: E402
+from sqlalchemy.orm import Session  # noqa: E402
+
+from app.db import Base  # noqa: E402
+from app.models.category import Category  # noqa: E402,F401  （FK 目標，create_all 需要）
+from app.models.product import Product  # noqa: E402
+from app.services import search_service  # noqa: E402
+
+ADJ = ["白兔", "手工", "復古", "北歐", "可愛", "透明", "日系", "陶瓷", "木製", "限量", "迷你", "經典"]
+NOUN = ["馬克杯", "保溫瓶", "帆布袋", "筆記本", "貼紙", "吊飾", "木盤", "鑰匙圈", "明信片", "抱枕", "香氛蠟燭"]
+WORDS = ["gift", "mug", "handmade", "limited", "sticker", "note"]
+QUERIES = ["馬克杯", "白兔", "手工 木盤", "限量貼紙", "兔", "mug", "北歐抱枕", "香氛", "不存在的東西"]
+
+
+def _seed(engine, n: int) -> None:
+    rnd = random.Random(42)
+    rows = []
+    for i in range(n):
+        name = f"{rnd.choice(ADJ)}{rnd.choice(NOUN)} {rnd.choice(WORDS)} {i}"
+        rows.append({
+            "name": name,
+            "price": rnd.randint(50, 2000),
+            "description": f"{rnd.choice(ADJ)}風格，{rnd.choice(NOUN)}",
+            "description_text": f"<p>{rnd.choice(ADJ)}{rnd.choice(NOUN)}，送禮自用兩相宜。</p>",
+            "stock_qty": 10,
+            "is_active": True,
+            "image_url": "",
+        })
+    with Session(engine) as db:
+        for i in range(0, n, 5000):
+            db.execute(insert(Product), rows[i:i + 5000])
+        t0 = time.perf_counter()
+        search_service.rebuild(db, batch_size=5000)
+        db.commit()
+        print(f"[search] indexed {n} products in {time.perf_counter() - t0:.1f}s")
+
+
+def run(url: str, n: int, rounds: int, limit: int) -> dict:
+    engine = create_engine(url)
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    _seed(engine, n)
+
+    out: dict[str, dict] = {}
+    with Session(engine) as db:
+        for q in QUERIES:
+            search_service.search_ids(db, q, limit)  # warm
+            samples = []
+            for _ in range(rounds):
+                t0 = time.perf_counter()
+                ids = search_service.search_ids(db, q, limit)
+                samples.append((time.perf_counter() - t0) * 1000)
+            samples.sort()
+            out[q] = {
+                "hits": len(ids),
+                "p50_ms": round(statistics.median(samples), 2),
+                "p95_ms": round(samples[int(len(samples) * 0.95) - 1], 2),
+            }
+    engine.dispose()
+    return out
+
+
+def main(argv: list[str] | None = None) -> dict:
+    parser = argparse.ArgumentParser(description="Product search latency benchmark")
+    parser.add_argument("--db", choices=["sqlite", "postgres"], default="sqlite")
+    parser.add_argument("--postgres-url", default=os.getenv("BENCH_POSTGRES_URL"))
+    parser.add_argument("--products", type=int, default=100_000)
+    parser.add_argument("--rounds", type=int, default=50)
+    parser.add_argument("--limit", type=int, default=20)
+    parser.add_argument("--out")
+    args = parser.parse_args(argv)
+
+    if args.db == "postgres":
+        if not args.postgres_url:
+            parser.error("--postgres-url (or BENCH_POSTGRES_URL) is required for --db postgres")
+        url = args.postgres_url
+    else:
+        url = f"sqlite:///{_TMP / 'search.db'}"
+
+    report = {"db": args.db, "products": args.products, "queries": run(url, args.products, args.rounds, args.limit)}
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.out:
+        Path(args.out).write_text(text, encoding="utf-8")
+    print(text)
+    return report
+
+
+if __name__ == "__main__":
+    main()
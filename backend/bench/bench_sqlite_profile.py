@@ -0,0 +1,138 @@
+# backend/bench/bench_sqlite_profile.py
+"""
+SQLite：預設設定 vs 正式環境模式（SQLITE_PRODUCTION=1），在「下單寫入爆量」時的讀取延遲。
+
+    cd backend
+    python -m bench.bench_sqlite_profile [--seconds 5] [--writers 4] [--readers 8]
+
+writer threads 不停模擬下單（扣庫存 + 建訂單 + 明細，一筆一個 transaction），
+reader threads 同時查商品列表；比較兩種設定下讀取的 p50 / p95 / p99 與錯誤數（database is locked）。
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+from sqlalchemy import update
+from sqlalchemy.orm import sessionmaker
+
+from app.db import Base, build_engines
+from app.models.category import Category  # noqa: F401  （FK 目標，create_all 需要）
+from app.models.order import Order
+from app.models.order_item import OrderItem
+from app.models.product import Product
+from app.models.product_shipping_option import ProductShippingOption
+
+
+def _pct(lat: list[float], p: float) -> float | None:
+    if not lat:
+        return None
+    lat = sorted(lat)
+    idx = max(0, min(len(lat) - 1, -(-len(lat) * p // 100) - 1))
+    return round(lat[int(idx)] * 1000, 3)
+
+
+def run_profile(production: bool, args) -> dict:
+    with tempfile.TemporaryDirectory() as d:
+        url = f"sqlite:///{Path(d) / 'bench.db'}"
+        writer, reader = build_engines(url, sqlite_production=production)
+        Base.metadata.create_all(bind=writer)
+        W = sessionmaker(bind=writer, autoflush=False)
+        R = sessionmaker(bind=reader, autoflush=False)
+
+        with W() as db:
+            for i in range(args.products):
+                p = Product(name=f"商品 {i}", price=100 + i, stock_qty=10**9, is_active=True,
+                            description="", description_text="", image_url="")
+                p.shipping_options.append(ProductShippingOption(method="post", fee=60, region_note=""))
+                db.add(p)
+            db.commit()
+
+        stop = threading.Event()
+        read_lat: list[float] = []
+        read_errors = 0
+        writes = 0
+        write_errors = 0
+        lock = threading.Lock()
+
+        def write_loop(seed: int) -> None:
+            nonlocal writes, write_errors
+            i = seed
+            while not stop.is_set():
+                pid = i % args.products + 1
+                i += 7
+                try:
+                    with W() as db:
+                        db.execute(update(Product).where(Product.id == pid).values(stock_qty=Product.stock_qty - 1))
+                        o = Order(customer_name="b", customer_email="b@example.com", customer_phone="0912345678",
+                                  shipping_method="post", shipping_address="", total_amount=100)
+                        db.add(o)
+                        db.flush()
+                        db.add(OrderItem(order_id=o.id, product_id=pid, qty=1, unit_price=100))
+                        db.commit()
+                    with lock:
+                        writes += 1
+                except Exception:
+                    with lock:
+                        write_errors += 1
+
+        def read_loop() -> None:
+            nonlocal read_errors
+            while not stop.is_set():
+                t = time.perf_counter()
+                try:
+                    with R() as db:
+                        rows = db.query(Product).filter(Product.is_active == True).order_by(Product.id).limit(100).all()
+                        _ = [len(p.shipping_options) for p in rows]
+                    dt = time.perf_counter() - t
+                    with lock:
+                        read_lat.append(dt)
+                except Exception:
+                    with lock:
+                        read_errors += 1
+
+        threads = [threading.Thread(target=write_loop, args=(n,)) for n in range(args.writers)]
+        threads += [threading.Thread(target=read_loop) for _ in range(args.readers)]
+        for t in threads:
+            t.start()
+        time.sleep(args.seconds)
+        stop.set()
+        for t in threads:
+            t.join()
+        writer.dispose()
+        reader.dispose()
+
+        return {
+            "reads": len(read_lat),
+            "reads_per_s": round(len(read_lat) / args.seconds, 1),
+            "read_p50_ms": _pct(read_lat, 50),
+            "read_p95_ms": _pct(read_lat, 95),
+            "read_p99_ms": _pct(read_lat, 99),
+            "read_errors": read_errors,
+            "writes_per_s": round(writes / args.seconds, 1),
+            "write_errors": write_errors,
+        }
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--seconds", type=float, default=5.0)
+    ap.add_argument("--writers", type=int, default=4)
+    ap.add_argument("--readers", type=int, default=8)
+    ap.add_argument("--products", type=int, default=500)
+    args = ap.parse_args()
+
+    out = {
+        "default": run_profile(False, args),
+        "sqlite_production": run_profile(True, args),
+        "params": vars(args),
+    }
+    print(json.dumps(out, indent=2))
+
+
+if __name__ == "__main__":
+    main()
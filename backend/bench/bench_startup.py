@@ -0,0 +1,87 @@
+# backend/bench/bench_startup.py
+"""
+冷啟動時間：每一輪開一個全新的 python 行程，量
+- import_ms：import app.main（含建 app）
+- ready_ms：lifespan startup 跑完（從 import 開始算）
+- first_request_ms：第一個 GET /products（連線池第一次連線、快取第一次建立）
+DB schema 先用 app.migrate 建好（跟正式部署一樣），不算在啟動時間裡。
+
+用法（在 backend/ 底下）：
+  python -m bench.bench_startup --runs 5 --out startup.json
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+_CHILD = r"""
+import json, time
+t0 = time.perf_counter()
+from app.main import app
+from app.services.metrics import startup
+from fastapi.testclient import TestClient
+with TestClient(app) as c:
+    r = c.get("/products")
+    assert r.status_code == 200, r.text
+print(json.dumps({
+    "import_ms": startup.import_seconds * 1000,
+    "ready_ms": startup.ready_seconds * 1000,
+    "first_request_ms": startup.first_request_seconds * 1000,
+    "total_ms": (time.perf_counter() - t0) * 1000,
+}))
+"""
+
+
+def _env(tmp: Path) -> dict[str, str]:
+    env = dict(os.environ)
+    env.setdefault("ENV", "test")
+    env["DATABASE_URL"] = env.get("BENCH_DATABASE_URL") or f"sqlite:///{tmp / 'startup.db'}"
+    env["UPLOAD_DIR"] = str(tmp / "uploads")
+    env["ENABLE_EMAIL_NOTIFY"] = "0"
+    return env
+
+
+def run(runs: int) -> dict:
+    with tempfile.TemporaryDirectory(prefix="mini-shop-startup-") as d:
+        tmp = Path(d)
+        env = _env(tmp)
+        subprocess.run([sys.executable, "-m", "app.migrate", "--no-seed"], cwd=BACKEND_DIR, env=env,
+                       check=True, capture_output=True)
+        samples = []
+        for _ in range(runs):
+            out = subprocess.run([sys.executable, "-c", _CHILD], cwd=BACKEND_DIR, env=env,
+                                 check=True, capture_output=True, text=True)
+            samples.append(json.loads(out.stdout.strip().splitlines()[-1]))
+
+    keys = ("import_ms", "ready_ms", "first_request_ms", "total_ms")
+    return {
+        "runs": runs,
+        "median": {k: round(statistics.median(s[k] for s in samples), 1) for k in keys},
+        "max": {k: round(max(s[k] for s in samples), 1) for k in keys},
+    }
+
+
+def main(argv: list[str] | None = None) -> dict:
+    parser = argparse.ArgumentParser(description="Measure cold start of app.main")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--out")
+    args = parser.parse_args(argv)
+
+    report = run(args.runs)
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.out:
+        Path(args.out).write_text(text, encoding="utf-8")
+    print(text)
+    return report
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+# backend/bench/bench_uploads_static.py
+"""
+/uploads 靜態檔：舊的 StaticFiles vs UploadsStaticFiles。
+
+    cd backend
+    python -m bench.bench_uploads_static [--seconds 3] [--images 20] [--views 50]
+
+量兩件事（in-process ASGI，不含網路）：
+1. handler 本身的 requests/sec（首次載入 200、revalidate 304）
+2. 模擬同一位訪客看 N 頁、每頁 M 張圖，瀏覽器實際要打幾個 request 到 server：
+   - 舊：沒有 Cache-Control，瀏覽器每頁都要 revalidate 每張圖（304）
+   - 新：immutable，第一次之後完全不用問 server
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import tempfile
+import time
+from pathlib import Path
+
+import httpx
+from fastapi import FastAPI
+from starlette.staticfiles import StaticFiles
+
+from app.static_uploads import UploadsStaticFiles
+
+
+def _app(cls, directory: Path) -> FastAPI:
+    app = FastAPI()
+    app.mount("/uploads", cls(directory=str(directory)), name="uploads")
+    return app
+
+
+async def _rps(app: FastAPI, paths: list[str], seconds: float, conditional: bool) -> float:
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as c:
+        etags = {p: (await c.get(p)).headers["etag"] for p in paths}
+        n = 0
+        deadline = time.perf_counter() + seconds
+        start = time.perf_counter()
+        while time.perf_counter() < deadline:
+            p = paths[n % len(paths)]
+            headers = {"If-None-Match": etags[p]} if conditional else {}
+            await c.get(p, headers=headers)
+            n += 1
+        return n / (time.perf_counter() - start)
+
+
+async def _page_views(app: FastAPI, paths: list[str], views: int) -> int:
+    """照 response 的 Cache-Control 決定瀏覽器要不要再打 server；回傳總 request 數"""
+    transport = httpx.ASGITransport(app=app)
+    fresh: set[str] = set()
+    etags: dict[str, str] = {}
+    sent = 0
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as c:
+        for _ in range(views):
+            for p in paths:
+                if p in fresh:
+                    continue
+                headers = {"If-None-Match": etags[p]} if p in etags else {}
+                r = await c.get(p, headers=headers)
+                sent += 1
+                etags[p] = r.headers.get("etag", etags.get(p, ""))
+                if "immutable" in r.headers.get("cache-control", ""):
+                    fresh.add(p)
+    return sent
+
+
+async def main_async(args) -> dict:
+    with tempfile.TemporaryDirectory() as d:
+        directory = Path(d)
+        paths = []
+        for i in range(args.images):
+            name = f"{i:064x}.webp"
+            (directory / name).write_bytes(b"RIFF\0\0\0\0WEBP" + bytes(args.size))
+            paths.append(f"/uploads/{name}")
+
+        out = {}
+        for label, cls in (("before_staticfiles", StaticFiles), ("after_uploads_static", UploadsStaticFiles)):
+            app = _app(cls, directory)
+            out[label] = {
+                "rps_200": round(await _rps(app, paths, args.seconds, conditional=False), 1),
+                "rps_304": round(await _rps(app, paths, args.seconds, conditional=True), 1),
+                "requests_for_page_views": await _page_views(app, paths, args.views),
+            }
+        out["params"] = vars(args)
+        return out
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--seconds", type=float, default=3.0)
+    ap.add_argument("--images", type=int, default=20)
+    ap.add_argument("--views", type=int, default=50)
+    ap.add_argument("--size", type=int, default=40_000, help="每張圖大小（bytes）")
+    args = ap.parse_args()
+    print(json.dumps(asyncio.run(main_async(args)), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+# backend/migrations/env.py
+from logging.config import fileConfig
+
+from alembic import context
+from sqlalchemy import create_engine
+
+from app.config import settings
+from app.db import Base
+from app.services import search_service
+
+# ✅ autogenerate 要看到所有 model
+from app.models import (  # noqa: F401
+    category,
+    email_outbox,
+    idempotency_key,
+    order,
+    order_item,
+    payment_event,
+    product,
+    product_shipping_option,
+    sales_rollup,
+    stock_movement,
+    stock_reservation,
+)
+
+config = context.config
+if config.config_file_name is not None and config.attributes.get("configure_logger", True):
+    fileConfig(config.config_file_name, disable_existing_loggers=False)
+
+target_metadata = Base.metadata
+
+
+def include_name(name, type_, parent_names) -> bool:
+    # 搜尋索引表（FTS5 / tsvector）不是 model，用 raw SQL 管理
+    if type_ == "table":
+        return not search_service.is_index_table(name)
+    return True
+
+
+def _url() -> str:
+    return config.get_main_option("sqlalchemy.url") or settings.database_url
+
+
+def run_migrations_offline() -> None:
+    context.configure(
+        url=_url(),
+        target_metadata=target_metadata,
+        literal_binds=True,
+        render_as_batch=True,
+        include_name=include_name,
+    )
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+def _run(connection) -> None:
+    context.configure(
+        connection=connection,
+        target_metadata=target_metadata,
+        include_name=include_name,
+        # SQLite 不支援大部分 ALTER TABLE：用 batch 模式（複製表）
+        render_as_batch=connection.dialect.name == "sqlite",
+    )
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+def run_migrations_online() -> None:
+    # app.migrate 會把已經拿到 lock 的連線傳進來
+    connection = config.attributes.get("connection")
+    if connection is not None:
+        _run(connection)
+        return
+
+    engine = create_engine(_url())
+    try:
+        with engine.connect() as connection:
+            _run(connection)
+    finally:
+        engine.dispose()
+
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
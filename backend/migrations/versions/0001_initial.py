@@ -0,0 +1,135 @@
+"""initial schema
+
+以前是 app 啟動時跑 Base.metadata.create_all；已經在跑的 DB 表都在，
+但 create_all 不會幫舊表補新加的 index（商品列表 / 後台訂單列表那幾個）。
+所以這一版：表不存在才建、index 不存在才補 → 新 DB、舊 DB 都能直接 upgrade head。
+
+Revision ID: 0001_initial
+Revises:
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0001_initial"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def _create_table(inspector, name: str, *columns, **kw) -> None:
+    if not inspector.has_table(name):
+        op.create_table(name, *columns, **kw)
+
+
+def _create_index(inspector, table: str, name: str, columns: list[str], unique: bool = False) -> None:
+    existing = {ix["name"] for ix in inspector.get_indexes(table)}
+    if name not in existing:
+        op.create_index(name, table, columns, unique=unique)
+
+
+def upgrade() -> None:
+    inspector = sa.inspect(op.get_bind())
+
+    _create_table(
+        inspector,
+        "categories",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("name", sa.String(50), nullable=False, unique=True),
+        sa.Column("sort_order", sa.Integer(), nullable=False),
+        sa.Column("is_active", sa.Boolean(), nullable=False),
+    )
+    _create_table(
+        inspector,
+        "products",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("name", sa.String(200), nullable=False),
+        sa.Column("price", sa.Integer(), nullable=False),
+        sa.Column("description", sa.String(1000), nullable=False),
+        sa.Column("category_id", sa.Integer(), sa.ForeignKey("categories.id"), nullable=True),
+        sa.Column("stock_qty", sa.Integer(), nullable=False),
+        sa.Column("is_active", sa.Boolean(), nullable=False),
+        sa.Column("image_url", sa.String(500), nullable=False),
+        sa.Column("description_text", sa.String(4000), nullable=False),
+    )
+    _create_table(
+        inspector,
+        "product_shipping_options",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("product_id", sa.Integer(), sa.ForeignKey("products.id"), nullable=False),
+        sa.Column("method", sa.String(30), nullable=False),
+        sa.Column("fee", sa.Integer(), nullable=False),
+        sa.Column("region_note", sa.String(200), nullable=False),
+    )
+    _create_table(
+        inspector,
+        "orders",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("customer_name", sa.String(100), nullable=False),
+        sa.Column("customer_email", sa.String(200), nullable=False),
+        sa.Column("customer_phone", sa.String(30), nullable=False),
+        sa.Column("total_amount", sa.Integer(), nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+        sa.Column("shipping_method", sa.String(50), nullable=False),
+        sa.Column("shipping_address", sa.String(300), server_default=sa.text("''"), nullable=False),
+        sa.Column("recipient_name", sa.String(80), nullable=True),
+        sa.Column("recipient_phone", sa.String(40), nullable=True),
+        sa.Column("shipping_post_address", sa.String(255), nullable=True),
+        sa.Column("cvs_brand", sa.String(20), nullable=True),
+        sa.Column("cvs_store_id", sa.String(40), nullable=True),
+        sa.Column("cvs_store_name", sa.String(120), nullable=True),
+        sa.Column("status", sa.String(20), nullable=False),
+        sa.Column("shipped_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("tracking_no", sa.String(80), nullable=True),
+    )
+    _create_table(
+        inspector,
+        "order_items",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("order_id", sa.Integer(), sa.ForeignKey("orders.id"), nullable=False),
+        sa.Column("product_id", sa.Integer(), sa.ForeignKey("products.id"), nullable=False),
+        sa.Column("qty", sa.Integer(), nullable=False),
+        sa.Column("unit_price", sa.Integer(), nullable=False),
+    )
+    _create_table(
+        inspector,
+        "email_outbox",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("to_email", sa.String(200), nullable=False),
+        sa.Column("subject", sa.String(300), nullable=False),
+        sa.Column("body", sa.Text(), nullable=False),
+        sa.Column("status", sa.String(20), nullable=False),
+        sa.Column("attempts", sa.Integer(), nullable=False),
+        sa.Column("next_attempt_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("last_error", sa.String(1000), nullable=True),
+        sa.Column("provider_id", sa.String(100), nullable=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+        sa.Column("sent_at", sa.DateTime(timezone=True), nullable=True),
+    )
+
+    # 建完表要重新 inspect，才看得到剛建的表
+    inspector = sa.inspect(op.get_bind())
+    _create_index(inspector, "categories", "ix_categories_id", ["id"])
+    _create_index(inspector, "products", "ix_products_id", ["id"])
+    _create_index(inspector, "products", "ix_products_active_category_id", ["is_active", "category_id", "id"])
+    _create_index(inspector, "products", "ix_products_active_price_id", ["is_active", "price", "id"])
+    _create_index(inspector, "product_shipping_options", "ix_product_shipping_options_id", ["id"])
+    _create_index(inspector, "product_shipping_options", "ix_product_shipping_options_product_id", ["product_id"])
+    _create_index(inspector, "orders", "ix_orders_id", ["id"])
+    _create_index(inspector, "orders", "ix_orders_status_id", ["status", "id"])
+    _create_index(inspector, "orders", "ix_orders_shipping_method_id", ["shipping_method", "id"])
+    _create_index(inspector, "orders", "ix_orders_created_at", ["created_at"])
+    _create_index(inspector, "order_items", "ix_order_items_order_id", ["order_id"])
+    _create_index(inspector, "email_outbox", "ix_email_outbox_status_next_attempt", ["status", "next_attempt_at"])
+
+
+def downgrade() -> None:
+    for table in (
+        "email_outbox",
+        "order_items",
+        "orders",
+        "product_shipping_options",
+        "products",
+        "categories",
+    ):
+        op.drop_table(table)
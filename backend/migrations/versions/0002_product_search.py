@@ -0,0 +1,28 @@
+"""product full-text search index
+
+SQLite：FTS5 虛擬表 products_fts；Postgres：product_search(tsvector) + GIN。
+建好後把現有商品全部灌進去（切詞在 app.services.search_service）。
+
+Revision ID: 0002_product_search
+Revises: 0001_initial
+Create Date: 2026-10-17
+"""
+from alembic import op
+from sqlalchemy.orm import Session
+
+from app.services import search_service
+
+revision = "0002_product_search"
+down_revision = "0001_initial"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    search_service.create_index(bind)
+    search_service.rebuild(Session(bind=bind))
+
+
+def downgrade() -> None:
+    search_service.drop_index(op.get_bind())
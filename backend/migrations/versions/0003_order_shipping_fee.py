@@ -0,0 +1,26 @@
+"""orders.shipping_fee
+
+Revision ID: 0003_order_shipping_fee
+Revises: 0002_product_search
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0003_order_shipping_fee"
+down_revision = "0002_product_search"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    columns = {c["name"] for c in sa.inspect(op.get_bind()).get_columns("orders")}
+    if "shipping_fee" in columns:  # 用新版 model create_all 建的 DB
+        return
+    with op.batch_alter_table("orders") as batch:
+        batch.add_column(sa.Column("shipping_fee", sa.Integer(), nullable=False, server_default=sa.text("0")))
+
+
+def downgrade() -> None:
+    with op.batch_alter_table("orders") as batch:
+        batch.drop_column("shipping_fee")
@@ -0,0 +1,34 @@
+"""stock_reservations
+
+Revision ID: 0005_stock_reservations
+Revises: 0004_idempotency_keys
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0005_stock_reservations"
+down_revision = "0004_idempotency_keys"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    if sa.inspect(op.get_bind()).has_table("stock_reservations"):
+        return
+    op.create_table(
+        "stock_reservations",
+        sa.Column("token", sa.String(64), primary_key=True),
+        sa.Column("product_id", sa.Integer(), sa.ForeignKey("products.id"), primary_key=True),
+        sa.Column("qty", sa.Integer(), nullable=False),
+        sa.Column("expires_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+    )
+    op.create_index(
+        "ix_stock_reservations_product_expires", "stock_reservations", ["product_id", "expires_at", "qty"]
+    )
+    op.create_index("ix_stock_reservations_expires_at", "stock_reservations", ["expires_at"])
+
+
+def downgrade() -> None:
+    op.drop_table("stock_reservations")
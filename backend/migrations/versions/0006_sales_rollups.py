@@ -0,0 +1,41 @@
+"""sales rollups
+
+Revision ID: 0006_sales_rollups
+Revises: 0005_stock_reservations
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0006_sales_rollups"
+down_revision = "0005_stock_reservations"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    inspector = sa.inspect(op.get_bind())
+    if not inspector.has_table("sales_daily_product"):
+        op.create_table(
+            "sales_daily_product",
+            sa.Column("day", sa.Date(), primary_key=True),
+            sa.Column("product_id", sa.Integer(), primary_key=True),
+            sa.Column("orders", sa.Integer(), nullable=False),
+            sa.Column("qty", sa.Integer(), nullable=False),
+            sa.Column("revenue", sa.Integer(), nullable=False),
+        )
+    if not inspector.has_table("sales_daily_shipping"):
+        op.create_table(
+            "sales_daily_shipping",
+            sa.Column("day", sa.Date(), primary_key=True),
+            sa.Column("shipping_method", sa.String(50), primary_key=True),
+            sa.Column("orders", sa.Integer(), nullable=False),
+            sa.Column("revenue", sa.Integer(), nullable=False),
+            sa.Column("shipping_fee", sa.Integer(), nullable=False),
+        )
+    # ⚠️ 既有訂單的彙總：部署後跑一次 python -m app.rebuild_analytics（資料量大時不要卡在 migration 裡）
+
+
+def downgrade() -> None:
+    op.drop_table("sales_daily_shipping")
+    op.drop_table("sales_daily_product")
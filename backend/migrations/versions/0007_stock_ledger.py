@@ -0,0 +1,49 @@
+"""stock movements ledger + snapshots
+
+Revision ID: 0007_stock_ledger
+Revises: 0006_sales_rollups
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0007_stock_ledger"
+down_revision = "0006_sales_rollups"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    inspector = sa.inspect(op.get_bind())
+    if not inspector.has_table("stock_movements"):
+        op.create_table(
+            "stock_movements",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("product_id", sa.Integer(), sa.ForeignKey("products.id"), nullable=False),
+            sa.Column("delta", sa.Integer(), nullable=False),
+            sa.Column("reason", sa.String(20), nullable=False),
+            sa.Column("ref", sa.String(100), nullable=False),
+            sa.Column("created_at", sa.DateTime(timezone=True), nullable=False),
+            sqlite_autoincrement=True,  # 快照靠 id 判斷先後，刪掉舊異動後 id 不能重用
+        )
+        op.create_index("ix_stock_movements_product_id_id", "stock_movements", ["product_id", "id"])
+        op.create_index("ix_stock_movements_created_at", "stock_movements", ["created_at"])
+
+    if not inspector.has_table("stock_snapshots"):
+        op.create_table(
+            "stock_snapshots",
+            sa.Column("product_id", sa.Integer(), sa.ForeignKey("products.id"), primary_key=True),
+            sa.Column("qty", sa.Integer(), nullable=False),
+            sa.Column("movement_id", sa.Integer(), nullable=False),
+            sa.Column("taken_at", sa.DateTime(timezone=True), nullable=False),
+        )
+        # ✅ 起始快照 = 現有庫存（帳從這裡開始記）
+        op.execute(
+            "INSERT INTO stock_snapshots (product_id, qty, movement_id, taken_at) "
+            "SELECT id, stock_qty, 0, CURRENT_TIMESTAMP FROM products"
+        )
+
+
+def downgrade() -> None:
+    op.drop_table("stock_snapshots")
+    op.drop_table("stock_movements")
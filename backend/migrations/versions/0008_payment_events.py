@@ -0,0 +1,39 @@
+"""payment webhook events
+
+Revision ID: 0008_payment_events
+Revises: 0007_stock_ledger
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0008_payment_events"
+down_revision = "0007_stock_ledger"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    if sa.inspect(op.get_bind()).has_table("payment_events"):
+        return
+    op.create_table(
+        "payment_events",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("provider", sa.String(30), nullable=False),
+        sa.Column("event_id", sa.String(100), nullable=False),
+        sa.Column("type", sa.String(50), nullable=False),
+        sa.Column("order_id", sa.Integer(), nullable=True),
+        sa.Column("amount", sa.Integer(), nullable=True),
+        sa.Column("payload", sa.Text(), nullable=False),
+        sa.Column("status", sa.String(20), nullable=False),
+        sa.Column("result", sa.String(200), nullable=False),
+        sa.Column("received_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+        sa.Column("processed_at", sa.DateTime(timezone=True), nullable=True),
+        sa.UniqueConstraint("provider", "event_id", name="uq_payment_events_provider_event_id"),
+    )
+    op.create_index("ix_payment_events_status_id", "payment_events", ["status", "id"])
+    op.create_index("ix_payment_events_order_id", "payment_events", ["order_id"])
+
+
+def downgrade() -> None:
+    op.drop_table("payment_events")
@@ -0,0 +1,169 @@
+# backend/tests/conftest.py
+import os
+import tempfile
+from pathlib import Path
+
+import pytest
+
+# ✅ 一定要在 import app 之前設好：app.db 在 import 時就建立 engine
+_TMP = Path(tempfile.mkdtemp(prefix="mini-shop-test-"))
+os.environ.setdefault("ENV", "test")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{_TMP / 'test.db'}")
+os.environ.setdefault("UPLOAD_DIR", str(_TMP / "uploads"))
+os.environ.setdefault("ADMIN_TOKEN", "test-admin-token")
+os.environ.setdefault("ADMIN_PASSWORD", "test-admin-password")
+
+from fastapi.testclient import TestClient  # noqa: E402
+from sqlalchemy import create_engine  # noqa: E402
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine  # noqa: E402
+from sqlalchemy.orm import sessionmaker  # noqa: E402
+from sqlalchemy.pool import NullPool  # noqa: E402
+
+from app.db import (  # noqa: E402
+    Base,
+    async_url,
+    get_async_db,
+    get_async_read_db,
+    get_db,
+    get_read_db,
+)
+from app.main import app  # noqa: E402
+from app.models.product import Product  # noqa: E402
+from app.models.product_shipping_option import ProductShippingOption  # noqa: E402
+from app.services.catalog_cache import catalog_cache  # noqa: E402
+from app.services.metrics import install_db_listeners  # noqa: E402
+from app.services.shipping_service import shipping_engine  # noqa: E402
+
+ADMIN_TOKEN = os.environ["ADMIN_TOKEN"]
+
+
+def make_engine(url: str):
+    """測試用 engine：sqlite 給足 timeout，讓併發寫入排隊而不是直接 locked"""
+    if url.startswith("sqlite"):
+        return create_engine(url, connect_args={"check_same_thread": False, "timeout": 30})
+    return create_engine(url, pool_size=20, max_overflow=20, pool_pre_ping=True)
+
+
+def make_async_sessions(engine) -> async_sessionmaker:
+    """
+    同一個 DB 的 async session（async 讀取路由用）。
+    NullPool：TestClient 每個 request 可能是不同的 event loop，連線不跨 loop 重用
+    """
+    url = async_url(engine.url.render_as_string(hide_password=False))
+    async_engine = create_async_engine(url, poolclass=NullPool)
+    install_db_listeners(async_engine.sync_engine)  # 跟 create_app 一樣：async 路由的 query 也算進 /metrics
+    return async_sessionmaker(bind=async_engine, expire_on_commit=False)
+
+
+def bind_app(engine) -> sessionmaker:
+    """把 app 的 get_db（含 async 版）換成指定 engine（每個測試一個乾淨 DB）"""
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    TestingSession = sessionmaker(bind=engine, autocommit=False, autoflush=False)
+
+    def _get_db():
+        db = TestingSession()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    AsyncTestingSession = make_async_sessions(engine)
+
+    async def _get_async_db():
+        async with AsyncTestingSession() as db:
+            yield db
+
+    app.dependency_overrides[get_db] = _get_db
+    app.dependency_overrides[get_read_db] = _get_db
+    app.dependency_overrides[get_async_db] = _get_async_db
+    app.dependency_overrides[get_async_read_db] = _get_async_db
+    catalog_cache.clear()
+    shipping_engine.clear()
+    return TestingSession
+
+
+@pytest.fixture()
+def session_factory(tmp_path):
+    engine = make_engine(f"sqlite:///{tmp_path / 'app.db'}")
+    factory = bind_app(engine)
+    yield factory
+    app.dependency_overrides.clear()
+    engine.dispose()
+
+
+@pytest.fixture()
+def client(session_factory):
+    return TestClient(app)
+
+
+@pytest.fixture()
+def admin_headers():
+    from datetime import datetime, timedelta, timezone
+    from app.routers import admin_auth
+
+    admin_auth.ADMIN_EXPIRES_AT = datetime.now(timezone.utc) + timedelta(hours=1)
+    return {"X-Admin-Token": ADMIN_TOKEN}
+
+
+def add_product(factory, **kw) -> int:
+    """直接寫 DB 建一個可下單的商品，回傳 product_id"""
+    methods = kw.pop("shipping", [("post", 60), ("cvs_711", 45)])
+    data = {
+        "name": "測試商品",
+        "price": 100,
+        "stock_qty": 10,
+        "is_active": True,
+        "description": "",
+        "description_text": "",
+        "image_url": "",
+    }
+    data.update(kw)
+    with factory() as db:
+        p = Product(**data)
+        for m, fee in methods:
+            p.shipping_options.append(ProductShippingOption(method=m, fee=fee, region_note=""))
+        db.add(p)
+        db.commit()
+        return p.id
+
+
+def order_payload(items: list[tuple[int, int]], **kw) -> dict:
+    data = {
+        "customer_name": "Test",
+        "customer_email": "test@example.com",
+        "customer_phone": "0912345678",
+        "shipping_method": "post",
+        "shipping_address": "台北市中正區測試路 1 號",
+        "recipient_name": "Test",
+        "recipient_phone": "0912345678",
+        "items": [{"product_id": pid, "qty": qty} for pid, qty in items],
+    }
+    data.update(kw)
+    return data
+
+
+def add_order(factory, **kw) -> int:
+    """直接寫 DB 建一張訂單（不扣庫存、不寄信），回傳 order_id"""
+    from app.models.order import Order
+    from app.models.order_item import OrderItem
+
+    items = kw.pop("items", [])
+    data = {
+        "customer_name": "Test",
+        "customer_email": "test@example.com",
+        "customer_phone": "0912345678",
+        "shipping_method": "post",
+        "shipping_address": "",
+        "total_amount": sum(qty * price for _, qty, price in items),
+        "status": "pending",
+    }
+    data.update(kw)
+    with factory() as db:
+        o = Order(**data)
+        db.add(o)
+        db.flush()
+        for pid, qty, price in items:
+            db.add(OrderItem(order_id=o.id, product_id=pid, qty=qty, unit_price=price))
+        db.commit()
+        return o.id
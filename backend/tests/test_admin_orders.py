@@ -0,0 +1,151 @@
+# backend/tests/test_admin_orders.py
+from datetime import datetime, timezone
+
+from .conftest import add_order
+
+
+def test_cursor_pagination_and_total(client, session_factory, admin_headers):
+    ids = [add_order(session_factory) for _ in range(7)]
+
+    seen: list[int] = []
+    params = {"limit": 3, "with_total": "true"}
+    while True:
+        r = client.get("/admin/orders", params=params, headers=admin_headers)
+        assert r.status_code == 200
+        assert r.headers["x-total-count"] == "7"
+        seen += [o["id"] for o in r.json()]
+        if "x-next-cursor" not in r.headers:
+            break
+        params["cursor"] = r.headers["x-next-cursor"]
+
+    assert seen == ids[::-1]
+
+
+def test_total_count_off_by_default(client, session_factory, admin_headers):
+    add_order(session_factory)
+    r = client.get("/admin/orders", headers=admin_headers)
+    assert "x-total-count" not in r.headers
+
+
+def test_status_shipping_and_date_filters(client, session_factory, admin_headers):
+    add_order(session_factory, status="pending", created_at=datetime(2026, 1, 5, tzinfo=timezone.utc))
+    want = add_order(
+        session_factory,
+        status="pending",
+        shipping_method="cvs_711",
+        created_at=datetime(2026, 2, 5, tzinfo=timezone.utc),
+    )
+    add_order(session_factory, status="paid", shipping_method="cvs_711")
+
+    r = client.get(
+        "/admin/orders",
+        params={"status": "pending", "shipping_method": "cvs_711", "from": "2026-02-01", "to": "2026-03-01"},
+        headers=admin_headers,
+    )
+    assert [o["id"] for o in r.json()] == [want]
+
+    assert client.get("/admin/orders", params={"status": "lost"}, headers=admin_headers).status_code == 400
+
+
+def test_include_items_uses_fixed_query_count(client, session_factory, admin_headers):
+    from sqlalchemy import event
+
+    from .conftest import add_product
+
+    a = add_product(session_factory, name="兔兔")
+    b = add_product(session_factory, name="貓貓")
+    for _ in range(12):
+        add_order(session_factory, items=[(a, 2, 100), (b, 1, 50)])
+
+    queries: list[str] = []
+    engine = session_factory.kw["bind"]
+    listener = lambda *args, **kw: queries.append(args[2])  # noqa: E731
+    event.listen(engine, "before_cursor_execute", listener)
+    try:
+        r = client.get("/admin/orders", params={"include": "items"}, headers=admin_headers)
+    finally:
+        event.remove(engine, "before_cursor_execute", listener)
+
+    rows = r.json()
+    assert len(rows) == 12
+    assert len(queries) == 2  # 訂單一次 + 明細一次，跟頁大小無關
+    assert rows[0]["line_count"] == 2 and rows[0]["item_count"] == 3
+    assert [it["name"] for it in rows[0]["items"]] == ["兔兔", "貓貓"]
+
+    plain = client.get("/admin/orders", headers=admin_headers).json()
+    assert "items" not in plain[0] and plain[0]["item_count"] == 3
+
+
+def test_public_order_include_items(client, session_factory):
+    from .conftest import add_product
+
+    pid = add_product(session_factory, name="兔兔")
+    oid = add_order(session_factory, items=[(pid, 2, 100)])
+
+    r = client.get(f"/orders/{oid}", params={"include": "items"})
+    assert r.json()["items"] == [
+        {"product_id": pid, "name": "兔兔", "qty": 2, "unit_price": 100, "line_total": 200}
+    ]
+    assert "items" not in client.get(f"/orders/{oid}").json()
+    assert client.get(f"/orders/{oid}", params={"include": "bogus"}).status_code == 400
+
+
+def test_export_streams_lines_with_product_names(client, session_factory, admin_headers):
+    import csv
+    import io
+    import json
+
+    from .conftest import add_product
+
+    mug = add_product(session_factory, name="馬克杯")
+    bowl = add_product(session_factory, name="碗")
+    a = add_order(session_factory, items=[(mug, 2, 300), (bowl, 1, 150)], created_at=datetime(2026, 3, 1, tzinfo=timezone.utc))
+    b = add_order(session_factory, items=[], status="paid", created_at=datetime(2026, 3, 2, tzinfo=timezone.utc))
+    add_order(session_factory, items=[(mug, 1, 300)], created_at=datetime(2026, 4, 1, tzinfo=timezone.utc))
+
+    params = {"from": "2026-03-01T00:00:00Z", "to": "2026-04-01T00:00:00Z"}
+    r = client.get("/admin/orders/export", params=params, headers=admin_headers)
+    assert r.status_code == 200
+    assert r.headers["content-type"].startswith("text/csv")
+    rows = list(csv.DictReader(io.StringIO(r.text)))
+    assert [(int(x["order_id"]), x["product_name"], x["line_total"]) for x in rows] == [
+        (a, "馬克杯", "600"),
+        (a, "碗", "150"),
+        (b, "", ""),
+    ]
+
+    r = client.get("/admin/orders/export", params={**params, "format": "jsonl", "status": "pending"}, headers=admin_headers)
+    orders = [json.loads(line) for line in r.text.splitlines()]
+    assert [(o["order_id"], len(o["items"])) for o in orders] == [(a, 2)]
+
+    assert client.get("/admin/orders/export", params={"status": "nope"}, headers=admin_headers).status_code == 400
+
+
+def test_export_csv_neutralises_formulas(client, session_factory, admin_headers):
+    import csv
+    import io
+
+    add_order(
+        session_factory,
+        customer_name='=HYPERLINK("http://evil","x")',
+        customer_email="-1-1",
+        customer_phone="+886 912 345 678",
+        recipient_name="@SUM(1+1)",
+        recipient_phone="+1-2-3",
+        shipping_post_address="-2+3",
+        shipping_method="cvs_711",
+        cvs_brand="@SUM(1)",
+        cvs_store_id='=HYPERLINK("http://x")',
+        cvs_store_name="+cmd|' /C calc'!A0",
+    )
+    r = client.get("/admin/orders/export", params={"format": "csv"}, headers=admin_headers)
+    (row,) = csv.DictReader(io.StringIO(r.text))
+    assert row["customer_name"] == '\'=HYPERLINK("http://evil","x")'
+    assert row["customer_email"] == "'-1-1"
+    assert row["recipient_name"] == "'@SUM(1+1)"
+    assert row["recipient_phone"] == "'+1-2-3"
+    assert row["shipping_post_address"] == "'-2+3"
+    assert row["cvs_brand"] == "'@SUM(1)"
+    assert row["cvs_store_id"] == '\'=HYPERLINK("http://x")'
+    assert row["cvs_store_name"] == "'+cmd|' /C calc'!A0"
+    assert row["customer_phone"] == "+886 912 345 678"  # 單純的電話號碼不動
@@ -0,0 +1,68 @@
+# backend/tests/test_admin_uploads.py
+from pathlib import Path
+
+import pytest
+
+from app.routers import admin_uploads
+from app.services import image_service
+from app.services.image_service import HAS_PIL, variant_urls
+
+# 注意：repo 裡的 test.jpg 其實是 PNG（剛好用來測「看檔頭不看副檔名」）
+IMG = (Path(__file__).resolve().parent.parent / "test.jpg").read_bytes()
+
+
+def _upload(client, headers, data: bytes, content_type: str = "image/jpeg"):
+    return client.post(
+        "/admin/uploads/image",
+        files={"file": ("photo.bin", data, content_type)},
+        headers=headers,
+    )
+
+
+def test_same_image_is_stored_once(client, admin_headers):
+    first = _upload(client, admin_headers, IMG)
+    assert first.status_code == 200
+    body = first.json()
+    assert body["content_type"] == "image/png"
+    assert body["filename"] == f"{body['sha256']}.png"
+    assert body["deduped"] is False
+
+    # Content-Type 亂填也一樣：看的是檔頭
+    again = _upload(client, admin_headers, IMG, content_type="application/octet-stream")
+    assert again.json()["filename"] == body["filename"]
+    assert again.json()["deduped"] is True
+    assert not list(admin_uploads.UPLOAD_DIR.glob(".upload-*"))
+
+
+@pytest.mark.skipif(not HAS_PIL, reason="Pillow not installed")
+def test_variants_generated_as_webp(client, admin_headers):
+    body = _upload(client, admin_headers, IMG).json()
+
+    assert set(body["variants"]) == {"thumb", "list", "detail"}
+    thumb = admin_uploads.UPLOAD_DIR / Path(body["variants"]["thumb"]).name
+    assert thumb.read_bytes()[8:12] == b"WEBP"
+    assert variant_urls(body["url"]) == body["variants"]
+
+
+def test_variant_urls_only_for_files_on_disk(monkeypatch):
+    digest = "b" * 64
+    url = f"/uploads/{digest}.png"
+    # 縮圖沒產生（Pillow 沒裝 / 產生失敗 / 舊圖）：不給會 404 的網址
+    assert variant_urls(url) is None
+    assert variant_urls("/uploads/legacy-uuid.png") is None
+
+    # 只產生了一部分：只列存在的那幾個，過了重查時間才看得到
+    admin_uploads.UPLOAD_DIR.mkdir(parents=True, exist_ok=True)
+    (admin_uploads.UPLOAD_DIR / image_service.variant_name(digest, "thumb")).write_bytes(b"x")
+    assert variant_urls(url) is None
+    monkeypatch.setattr(image_service, "MISSING_RECHECK_SECONDS", 0)
+    assert variant_urls(url) == {"thumb": f"/uploads/{digest}_thumb.webp"}
+
+
+def test_rejects_non_image_and_oversize(client, admin_headers, monkeypatch):
+    assert _upload(client, admin_headers, b"<?php echo 1; ?>", "image/png").status_code == 415
+    assert _upload(client, admin_headers, b"", "image/png").status_code == 400
+
+    monkeypatch.setattr(admin_uploads, "MAX_BYTES", 1024)
+    assert _upload(client, admin_headers, IMG).status_code == 413
+    assert not list(admin_uploads.UPLOAD_DIR.glob(".upload-*"))
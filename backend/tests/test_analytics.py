@@ -0,0 +1,76 @@
+# backend/tests/test_analytics.py
+from datetime import datetime, timezone
+
+from app.services import analytics_service
+
+from .conftest import add_order, add_product, order_payload
+
+
+def _report(client, admin_headers, **params):
+    r = client.get("/admin/analytics", params=params, headers=admin_headers)
+    assert r.status_code == 200
+    return r.json()
+
+
+def test_orders_and_cancellations_update_rollups(client, session_factory, admin_headers):
+    mug = add_product(session_factory, price=300, shipping=[("post", 60)])
+    bowl = add_product(session_factory, price=150, shipping=[("post", 80)])
+
+    first = client.post("/orders", json=order_payload([(mug, 2), (bowl, 1)])).json()["order_id"]
+    client.post("/orders", json=order_payload([(mug, 1)]))
+
+    report = _report(client, admin_headers)
+    assert report["totals"] == {"orders": 2, "revenue": 750 + 80 + 300 + 60, "shipping_fee": 140}
+    assert report["by_shipping_method"] == [
+        {"shipping_method": "post", "orders": 2, "revenue": 1190, "shipping_fee": 140}
+    ]
+    assert [(p["product_id"], p["orders"], p["qty"], p["revenue"]) for p in report["top_products"]] == [
+        (mug, 2, 3, 900),
+        (bowl, 1, 1, 150),
+    ]
+
+    assert client.patch(f"/admin/orders/{first}/status", params={"status": "cancelled"}, headers=admin_headers).status_code == 200
+    report = _report(client, admin_headers)
+    assert report["totals"]["orders"] == 1
+    assert [(p["product_id"], p["qty"]) for p in report["top_products"]] == [(mug, 1)]
+
+    # 狀態在有效之間切換不影響；從 cancelled 改回來會加回去
+    client.patch(f"/admin/orders/{first}/status", params={"status": "paid"}, headers=admin_headers)
+    assert _report(client, admin_headers)["totals"]["orders"] == 2
+
+
+def test_rebuild_matches_incremental_and_picks_up_history(client, session_factory, admin_headers):
+    pid = add_product(session_factory, price=100)
+    for _ in range(3):
+        client.post("/orders", json=order_payload([(pid, 1)]))
+    incremental = _report(client, admin_headers)
+
+    with session_factory() as db:
+        analytics_service.rebuild(db, batch_size=2)
+    assert _report(client, admin_headers) == incremental
+
+    # 彙總上線前的舊訂單（沒經過增量更新）：重建後才算進來；日期用商店時區切
+    add_order(session_factory, items=[(pid, 5, 100)], created_at=datetime(2026, 1, 31, 17, 0, tzinfo=timezone.utc))
+    add_order(session_factory, items=[(pid, 9, 100)], status="cancelled", created_at=datetime(2026, 2, 1, tzinfo=timezone.utc))
+    with session_factory() as db:
+        analytics_service.rebuild(db)
+
+    report = _report(client, admin_headers, **{"from": "2026-02-01", "to": "2026-02-02"})
+    assert report["daily"] == [{"day": "2026-02-01", "orders": 1, "revenue": 500, "shipping_fee": 0}]
+    assert report["top_products"][0]["qty"] == 5
+
+
+def test_rebuild_locks_before_scanning(session_factory, monkeypatch):
+    # 先掃後鎖的話，掃完到鎖之間的改狀態會被 clear 掉；鎖（SQLite = 第一個寫入）要在掃之前
+    calls = []
+    real_clear, real_scan = analytics_service.clear, analytics_service._scan
+    monkeypatch.setattr(analytics_service, "clear", lambda db: (calls.append("clear"), real_clear(db)))
+    monkeypatch.setattr(analytics_service, "_scan", lambda *a: (calls.append("scan"), real_scan(*a))[1])
+    with session_factory() as db:
+        analytics_service.rebuild(db)
+    assert calls == ["clear", "scan"]
+
+
+def test_analytics_rejects_empty_range(client, admin_headers):
+    r = client.get("/admin/analytics", params={"from": "2026-02-01", "to": "2026-02-01"}, headers=admin_headers)
+    assert r.status_code == 400
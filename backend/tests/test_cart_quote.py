@@ -0,0 +1,55 @@
+# backend/tests/test_cart_quote.py
+from sqlalchemy import event
+
+from .conftest import add_product
+
+
+def test_quote_uses_current_prices_and_common_shipping(client, session_factory):
+    a = add_product(session_factory, price=100, stock_qty=5, shipping=[("post", 60), ("cvs_711", 45)])
+    b = add_product(session_factory, price=250, stock_qty=5, shipping=[("post", 80), ("courier", 120)])
+
+    r = client.post("/cart/quote", json={
+        "items": [{"product_id": a, "qty": 1}, {"product_id": b, "qty": 2}, {"product_id": a, "qty": 1}],
+        "shipping_method": "post",
+    })
+    assert r.status_code == 200, r.text
+    body = r.json()
+    assert [(ln["product_id"], ln["qty"], ln["line_total"]) for ln in body["lines"]] == [(a, 2, 200), (b, 2, 500)]
+    assert body["subtotal"] == 700
+    assert body["shipping_options"] == [{"method": "post", "fee": 80}]  # 只有 post 兩件都支援
+    assert body["shipping_fee"] == 80
+    assert body["total"] == 780
+    assert body["ok"] is True
+
+
+def test_quote_flags_unavailable_lines(client, session_factory):
+    ok = add_product(session_factory, stock_qty=5)
+    low = add_product(session_factory, stock_qty=1)
+    off = add_product(session_factory, is_active=False)
+
+    body = client.post("/cart/quote", json={
+        "items": [{"product_id": ok, "qty": 1}, {"product_id": low, "qty": 3},
+                  {"product_id": off, "qty": 1}, {"product_id": 999, "qty": 1}],
+        "shipping_method": "courier",
+    }).json()
+
+    problems = {ln["product_id"]: ln["problem"] for ln in body["lines"]}
+    assert problems == {ok: None, low: "insufficient_stock", off: "inactive", 999: "not_found"}
+    assert body["subtotal"] == 100  # 只算買得到的
+    assert body["ok"] is False
+
+
+def test_quote_query_count_does_not_grow_with_items(client, session_factory):
+    ids = [add_product(session_factory) for _ in range(10)]
+    seen: list[str] = []
+    event.listen(session_factory.kw["bind"], "before_cursor_execute", lambda *a, **k: seen.append(a[2]))
+
+    payload = {"items": [{"product_id": i, "qty": 1} for i in ids]}
+    r = client.post("/cart/quote", json=payload)
+    assert r.status_code == 200
+    assert r.json()["ok"] is True
+    assert len([s for s in seen if s.lstrip().upper().startswith("SELECT")]) == 2  # 商品 + 運送方式
+
+    seen.clear()
+    client.post("/cart/quote", json=payload)
+    assert len([s for s in seen if s.lstrip().upper().startswith("SELECT")]) == 1  # 運送方式已快取
@@ -0,0 +1,63 @@
+# backend/tests/test_catalog_cache.py
+from sqlalchemy import event
+
+from .conftest import add_product, order_payload
+
+
+def _count_queries(factory) -> list[str]:
+    seen: list[str] = []
+    engine = factory.kw["bind"]
+    event.listen(engine, "before_cursor_execute", lambda *a, **k: seen.append(a[2]))
+    return seen
+
+
+def test_products_cached_until_admin_write(client, session_factory, admin_headers):
+    pid = add_product(session_factory, name="兔兔", price=100)
+
+    first = client.get("/products")
+    assert first.status_code == 200
+    assert first.json()[0]["name"] == "兔兔"
+    etag = first.headers["etag"]
+
+    queries = _count_queries(session_factory)
+    again = client.get("/products")
+    assert again.headers["etag"] == etag
+    assert queries == []  # 命中快取：完全不碰 DB
+
+    r = client.patch(f"/admin/products/{pid}", json={"price": 120}, headers=admin_headers)
+    assert r.status_code == 200
+
+    after = client.get("/products")
+    assert after.json()[0]["price"] == 120
+    assert after.headers["etag"] != etag
+
+
+def test_if_none_match_returns_304(client, session_factory):
+    add_product(session_factory)
+    etag = client.get("/products").headers["etag"]
+
+    r = client.get("/products", headers={"If-None-Match": etag})
+    assert r.status_code == 304
+    assert r.content == b""
+
+
+def test_categories_invalidated_on_admin_create(client, admin_headers):
+    assert client.get("/categories").json() == []
+
+    r = client.post("/admin/categories", json={"name": "文具"}, headers=admin_headers)
+    assert r.status_code == 200
+
+    assert [c["name"] for c in client.get("/categories").json()] == ["文具"]
+
+
+def test_orders_only_invalidate_products_when_sold_out(client, session_factory):
+    pid = add_product(session_factory, stock_qty=3)
+    etag = client.get("/products").headers["etag"]
+
+    # 還有庫存：列表快取不動（庫存數字等 TTL 到期再更新）
+    assert client.post("/orders", json=order_payload([(pid, 1)])).status_code == 200
+    assert client.get("/products").headers["etag"] == etag
+
+    # 賣完：立刻失效，前台馬上看到售完
+    assert client.post("/orders", json=order_payload([(pid, 2)])).status_code == 200
+    assert client.get("/products").json()[0]["stock_qty"] == 0
@@ -0,0 +1,134 @@
+# backend/tests/test_email_outbox.py
+"""
+Outbox 寫入 + sender 對本機 HTTP stub（代替 Resend）寄送 / 重試 / dead-letter。
+"""
+import asyncio
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from app.config import settings
+from app.models.email_outbox import EmailOutbox
+from app.services.notification_service import DEAD, SENT, OutboxSender
+
+from .conftest import add_product, order_payload
+
+
+class _Stub:
+    """假 Resend：依 to 位址決定回應（fail-once@ 先 500 一次、reject@ 一律 422）"""
+
+    def __init__(self) -> None:
+        self.received: list[dict] = []
+        self.fail_once_seen: set[str] = set()
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def do_POST(self):
+                data = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+                to = data["to"][0]
+                if to.startswith("reject@"):
+                    code, body = 422, {"message": "invalid"}
+                elif to.startswith("fail-once@") and to not in stub.fail_once_seen:
+                    stub.fail_once_seen.add(to)
+                    code, body = 500, {"message": "boom"}
+                else:
+                    stub.received.append(data)
+                    code, body = 200, {"id": f"msg-{len(stub.received)}"}
+                raw = json.dumps(body).encode()
+                self.send_response(code)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(raw)))
+                self.end_headers()
+                self.wfile.write(raw)
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}/emails"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+
+@pytest.fixture()
+def email_on(monkeypatch):
+    monkeypatch.setattr(settings, "enable_email_notify", 1)
+    monkeypatch.setattr(settings, "admin_notify_email", "owner@example.com")
+    monkeypatch.setattr(settings, "resend_api_key", "re_test")
+    monkeypatch.setattr(settings, "smtp_from_email", "shop@example.com")
+
+
+@pytest.fixture()
+def stub(monkeypatch):
+    s = _Stub()
+    monkeypatch.setattr(settings, "resend_endpoint", s.url)
+    yield s
+    s.server.shutdown()
+
+
+def _drain(factory, rounds: int = 5) -> None:
+    async def go():
+        sender = OutboxSender(session_factory=factory, concurrency=4, max_attempts=3, backoff_base=0)
+        try:
+            for _ in range(rounds):
+                await sender.run_once()
+        finally:
+            await sender.aclose()
+
+    asyncio.run(go())
+
+
+def test_order_writes_outbox_in_same_transaction(client, session_factory, email_on):
+    pid = add_product(session_factory, stock_qty=1)
+
+    assert client.post("/orders", json=order_payload([(pid, 1)])).status_code == 200
+    # 第二張庫存不足 → rollback，不能留下信
+    assert client.post("/orders", json=order_payload([(pid, 1)])).status_code == 400
+
+    with session_factory() as db:
+        rows = db.query(EmailOutbox).order_by(EmailOutbox.id).all()
+    assert [r.to_email for r in rows] == ["test@example.com", "owner@example.com"]
+    assert all(r.status == "pending" for r in rows)
+
+
+def test_sender_delivers_retries_and_dead_letters(client, session_factory, email_on, stub):
+    from app.services.notification_service import enqueue_email
+
+    with session_factory() as db:
+        for i in range(10):
+            enqueue_email(db, f"buyer{i}@example.com", "hi", "body")
+        enqueue_email(db, "fail-once@example.com", "retry", "body")
+        enqueue_email(db, "reject@example.com", "bad", "body")
+        db.commit()
+
+    _drain(session_factory)
+
+    with session_factory() as db:
+        by_to = {r.to_email: r for r in db.query(EmailOutbox)}
+
+    assert len(stub.received) == 11
+    assert by_to["fail-once@example.com"].status == SENT
+    assert by_to["fail-once@example.com"].attempts == 2
+    assert by_to["reject@example.com"].status == DEAD
+    assert by_to["reject@example.com"].attempts == 1
+    assert all(r.provider_id for to, r in by_to.items() if r.status == SENT)
+
+
+def test_unconfigured_sender_warns_once_and_leaves_mail_pending(session_factory, email_on, monkeypatch, caplog):
+    from app.services.notification_service import PENDING, enqueue_email
+
+    monkeypatch.setattr(settings, "resend_api_key", None)
+    with session_factory() as db:
+        enqueue_email(db, "buyer@example.com", "hi", "body")
+        db.commit()
+
+    with caplog.at_level("WARNING"):
+        _drain(session_factory, rounds=5)
+
+    warnings = [r for r in caplog.records if r.name.startswith("app.services") and r.levelname == "WARNING"]
+    assert len(warnings) == 2  # 缺哪個設定 + sender 閒置，各一次（不是每輪一次）
+    with session_factory() as db:
+        assert [r.status for r in db.query(EmailOutbox)] == [PENDING]
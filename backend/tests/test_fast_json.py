@@ -0,0 +1,54 @@
+# backend/tests/test_fast_json.py
+"""FAST_JSON_LISTS=1 的列表輸出要跟原本的路徑逐 byte 相同（含 header）"""
+import warnings
+
+import pytest
+
+from app.config import settings
+from app.services.catalog_cache import catalog_cache
+
+from .conftest import add_order, add_product
+
+
+def _both(client, monkeypatch, path, **kw):
+    out = []
+    for flag in (0, 1):
+        monkeypatch.setattr(settings, "fast_json_lists", flag)
+        catalog_cache.clear()
+        with warnings.catch_warnings():
+            warnings.simplefilter("error")  # pydantic 序列化型別不符會發 warning
+            r = client.get(path, **kw)
+        assert r.status_code == 200
+        out.append(r)
+    return out
+
+
+@pytest.fixture()
+def catalog(session_factory):
+    a = add_product(session_factory, name="白兔馬克杯", price=350, image_url="/uploads/" + "a" * 64 + ".png")
+    b = add_product(session_factory, name="下架", is_active=False)
+    c = add_product(session_factory, name="mug", description="短", shipping=[("cvs_family", 45)])
+    add_order(session_factory, items=[(a, 2, 350), (c, 1, 100)], status="paid", recipient_name="兔")
+    add_order(session_factory, items=[(c, 1, 100)])
+    return a, b, c
+
+
+@pytest.mark.parametrize("path", ["/products", "/products?limit=1", "/products?sort=-price&limit=2"])
+def test_products_same_bytes(client, monkeypatch, catalog, path):
+    slow, fast = _both(client, monkeypatch, path)
+    assert fast.content == slow.content
+    assert fast.headers.get("x-next-cursor") == slow.headers.get("x-next-cursor")
+
+
+def test_admin_products_same_bytes(client, monkeypatch, catalog, admin_headers):
+    slow, fast = _both(client, monkeypatch, "/admin/products", headers=admin_headers)
+    assert fast.content == slow.content
+    assert len(fast.json()) == 3 and fast.json()[0]["shipping_options"][0]["method"] == "cvs_family"
+
+
+@pytest.mark.parametrize("params", ["limit=1&with_total=true", "include=items", "status=paid"])
+def test_admin_orders_same_bytes_and_headers(client, monkeypatch, catalog, admin_headers, params):
+    slow, fast = _both(client, monkeypatch, f"/admin/orders?{params}", headers=admin_headers)
+    assert fast.content == slow.content
+    for h in ("x-next-cursor", "x-total-count"):
+        assert fast.headers.get(h) == slow.headers.get(h)
@@ -0,0 +1,116 @@
+# backend/tests/test_idempotency.py
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from app.models.idempotency_key import IdempotencyKey
+from app.models.order import Order
+from app.models.product import Product
+from app.services import housekeeping
+
+from .conftest import add_product, order_payload
+
+
+def test_retry_with_same_key_returns_same_order(client, session_factory):
+    pid = add_product(session_factory, stock_qty=5)
+    body = order_payload([(pid, 2)])
+
+    first = client.post("/orders", json=body, headers={"Idempotency-Key": "k-1"})
+    again = client.post("/orders", json=body, headers={"Idempotency-Key": "k-1"})
+
+    assert first.status_code == again.status_code == 200
+    assert again.json() == first.json()
+    assert again.headers["Idempotent-Replayed"] == "true"
+    with session_factory() as db:
+        assert db.query(Order).count() == 1
+        assert db.get(Product, pid).stock_qty == 3
+
+
+def test_many_threads_one_key_create_one_order(client, session_factory):
+    pid = add_product(session_factory, stock_qty=100)
+    body = order_payload([(pid, 1)])
+
+    with ThreadPoolExecutor(max_workers=24) as ex:
+        responses = list(ex.map(
+            lambda _: client.post("/orders", json=body, headers={"Idempotency-Key": "hammer"}),
+            range(100),
+        ))
+
+    assert {r.status_code for r in responses} == {200}
+    assert len({r.json()["order_id"] for r in responses}) == 1
+    with session_factory() as db:
+        assert db.query(Order).count() == 1
+        assert db.get(Product, pid).stock_qty == 99
+
+
+def test_key_reused_with_different_body_is_rejected(client, session_factory):
+    pid = add_product(session_factory)
+    assert client.post("/orders", json=order_payload([(pid, 1)]), headers={"Idempotency-Key": "k"}).status_code == 200
+
+    r = client.post("/orders", json=order_payload([(pid, 2)]), headers={"Idempotency-Key": "k"})
+    assert r.status_code == 422
+
+
+def test_client_errors_are_replayed(client, session_factory):
+    pid = add_product(session_factory, stock_qty=1)
+    body = order_payload([(pid, 5)])
+
+    first = client.post("/orders", json=body, headers={"Idempotency-Key": "too-many"})
+    assert first.status_code == 400
+
+    with session_factory() as db:  # 補貨後同一把 key 仍是同一個答案
+        db.get(Product, pid).stock_qty = 10
+        db.commit()
+    again = client.post("/orders", json=body, headers={"Idempotency-Key": "too-many"})
+    assert again.status_code == 400
+    assert again.json() == first.json()
+
+
+def test_abandoned_key_is_taken_over(client, session_factory):
+    pid = add_product(session_factory)
+    body = order_payload([(pid, 1)])
+    past = datetime.now(timezone.utc) - timedelta(minutes=1)
+    with session_factory() as db:
+        from app.services.idempotency_service import request_hash
+        from app.schemas.order import OrderCreate
+
+        db.add(IdempotencyKey(
+            scope="orders", key="crashed", request_hash=request_hash(OrderCreate(**body)),
+            status="in_progress", locked_until=past, expires_at=past + timedelta(days=1),
+        ))
+        db.commit()
+
+    r = client.post("/orders", json=body, headers={"Idempotency-Key": "crashed"})
+    assert r.status_code == 200
+    assert "Idempotent-Replayed" not in r.headers
+
+
+def test_housekeeping_purges_expired_keys(client, session_factory):
+    pid = add_product(session_factory)
+    client.post("/orders", json=order_payload([(pid, 1)]), headers={"Idempotency-Key": "old"})
+    client.post("/orders", json=order_payload([(pid, 1)]), headers={"Idempotency-Key": "new"})
+    with session_factory() as db:
+        row = db.get(IdempotencyKey, ("orders", "old"))
+        row.expires_at = datetime.now(timezone.utc) - timedelta(seconds=1)
+        db.commit()
+
+    assert housekeeping.run_once(session_factory)["idempotency_keys"] == 1
+    with session_factory() as db:
+        assert [k.key for k in db.query(IdempotencyKey)] == ["new"]
+
+
+# 搶輸的重試不能跟 session 裡已讀到的同一把 key 撞 identity map（SAWarning）
+@pytest.mark.filterwarnings("error::sqlalchemy.exc.SAWarning")
+def test_contended_retry_does_not_clash_with_loaded_row(session_factory, monkeypatch):
+    from fastapi import HTTPException
+
+    from app.config import settings
+    from app.services import idempotency_service
+
+    monkeypatch.setattr(settings, "idempotency_wait_seconds", 0.1)
+    with session_factory() as db:
+        assert idempotency_service.begin(db, "orders", "k1", "h") is None
+        with pytest.raises(HTTPException) as e:
+            idempotency_service.begin(db, "orders", "k1", "h")  # 還在處理中：重試幾輪後 409
+    assert e.value.status_code == 409
@@ -0,0 +1,49 @@
+# backend/tests/test_metrics.py
+import pytest
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+
+from app.services.metrics import install_db_listeners, registry
+
+from .conftest import add_product
+
+
+def test_server_timing_and_prometheus(client, session_factory):
+    install_db_listeners(session_factory.kw["bind"])
+    registry.reset()
+    pid = add_product(session_factory)
+
+    r = client.get(f"/products/{pid}")
+    assert r.status_code == 200
+    timing = r.headers["server-timing"]
+    assert timing.startswith("app;dur=")
+    assert 'desc="' in timing and "0 queries" not in timing
+
+    client.get("/products/999999")
+
+    text = client.get("/metrics").text
+    assert 'http_requests_total{method="GET",route="/products/{product_id}",status="200"} 1' in text
+    assert 'http_requests_total{method="GET",route="/products/{product_id}",status="404"} 1' in text
+    assert 'http_request_duration_seconds_count{method="GET",route="/products/{product_id}"} 2' in text
+    assert 'db_queries_per_request_count{method="GET",route="/products/{product_id}"} 2' in text
+    # /metrics 自己正在跑
+    assert "http_requests_in_flight 1" in text
+
+
+def test_metrics_token(client, monkeypatch):
+    from app.config import settings
+
+    monkeypatch.setattr(settings, "metrics_token", "s3cret")
+    assert client.get("/metrics").status_code == 401
+    assert client.get("/metrics", headers={"Authorization": "Bearer s3cret"}).status_code == 200
+
+
+def test_failed_statement_does_not_leak_query_start(session_factory):
+    engine = session_factory.kw["bind"]
+    install_db_listeners(engine)
+    with engine.connect() as conn:
+        for _ in range(3):
+            with pytest.raises(OperationalError):
+                conn.execute(text("SELECT * FROM no_such_table"))
+        conn.execute(text("SELECT 1"))
+        assert conn.connection.info.get("query_start") == []
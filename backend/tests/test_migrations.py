@@ -0,0 +1,66 @@
+# backend/tests/test_migrations.py
+from alembic.autogenerate import compare_metadata
+from alembic.migration import MigrationContext
+from sqlalchemy import create_engine, inspect, text
+
+from app.db import Base
+from app.migrate import upgrade
+from app.services.search_service import is_index_table
+
+
+def _diff(engine) -> list:
+    with engine.connect() as conn:
+        ctx = MigrationContext.configure(
+            conn, opts={"include_name": lambda name, type_, _p: type_ != "table" or not is_index_table(name)}
+        )
+        return compare_metadata(ctx, Base.metadata)
+
+
+def test_upgrade_head_matches_models(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'fresh.db'}")
+    upgrade(bind=engine)
+
+    assert _diff(engine) == []
+    with engine.connect() as conn:
+        assert conn.execute(text("SELECT version_num FROM alembic_version")).scalar() == "0008_payment_events"
+
+    upgrade(bind=engine)  # 再跑一次什麼都不做
+    engine.dispose()
+
+
+def test_upgrade_adds_missing_indexes_to_create_all_db(tmp_path):
+    """以前 create_all 建的舊 DB：表都在，但後來加的 index 沒有 → upgrade 要補上"""
+    engine = create_engine(f"sqlite:///{tmp_path / 'legacy.db'}")
+    Base.metadata.create_all(bind=engine)
+    with engine.begin() as conn:
+        for name in ("ix_products_active_category_id", "ix_products_active_price_id",
+                     "ix_orders_status_id", "ix_orders_shipping_method_id", "ix_orders_created_at"):
+            conn.execute(text(f"DROP INDEX {name}"))
+        conn.execute(text("INSERT INTO categories (name, sort_order, is_active) VALUES ('keep', 0, 1)"))
+
+    upgrade(bind=engine)
+
+    names = {ix["name"] for t in ("products", "orders") for ix in inspect(engine).get_indexes(t)}
+    assert {"ix_products_active_price_id", "ix_orders_status_id", "ix_orders_created_at"} <= names
+    with engine.connect() as conn:
+        assert conn.execute(text("SELECT name FROM categories")).scalar() == "keep"
+    assert _diff(engine) == []
+    engine.dispose()
+
+
+def test_importing_app_does_not_touch_the_database():
+    import app.main  # noqa: F401  （conftest 已經 import 過，這裡確認沒有 create_all 在 import 時跑）
+    from app.db import engine
+
+    assert not inspect(engine).has_table("products")
+
+
+def test_start_runs_same_migrate_step_before_uvicorn(monkeypatch):
+    # start.py 跟 python -m app.migrate 行為一致（含 dev 的 demo seed），再開 uvicorn
+    from app import migrate, start
+
+    calls = []
+    monkeypatch.setattr(migrate, "main", lambda argv=None: calls.append(("migrate", argv)))
+    monkeypatch.setattr(start.uvicorn, "run", lambda *a, **k: calls.append(("uvicorn", a[0])))
+    start.main()
+    assert calls == [("migrate", []), ("uvicorn", "app.main:app")]
@@ -0,0 +1,84 @@
+# backend/tests/test_payments_webhook.py
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from app.config import settings
+from app.models.order import Order
+from app.models.payment_event import PaymentEvent
+from app.models.product import Product
+from app.services import payment_service
+
+from .conftest import add_order, add_product, order_payload
+
+SECRET = "whsec_test"
+
+
+@pytest.fixture(autouse=True)
+def _secret(monkeypatch):
+    monkeypatch.setattr(settings, "payment_webhook_secret", SECRET)
+
+
+def _send(client, event_id, type_, order_id, amount, *, secret=SECRET, timestamp=None):
+    body = json.dumps({"id": event_id, "type": type_, "data": {"order_id": order_id, "amount": amount}}).encode()
+    return client.post(
+        "/payments/webhook",
+        content=body,
+        headers={payment_service.SIGNATURE_HEADER: payment_service.sign(secret, body, timestamp)},
+    )
+
+
+def _status(factory, order_id):
+    with factory() as db:
+        return db.get(Order, order_id).status
+
+
+def test_signature_is_required(client, session_factory):
+    oid = add_order(session_factory, total_amount=100)
+    assert _send(client, "evt_1", "payment.succeeded", oid, 100, secret="wrong").status_code == 401
+    assert _send(client, "evt_1", "payment.succeeded", oid, 100, timestamp=int(time.time()) - 3600).status_code == 401
+    assert client.post("/payments/webhook", content=b"{}").status_code == 401
+    with session_factory() as db:
+        assert db.query(PaymentEvent).count() == 0
+
+
+def test_duplicates_are_acknowledged_and_applied_once(client, session_factory):
+    oid = add_order(session_factory, total_amount=500)
+
+    with ThreadPoolExecutor(max_workers=8) as ex:
+        responses = list(ex.map(lambda _: _send(client, "evt_dup", "payment.succeeded", oid, 500), range(20)))
+    assert {r.status_code for r in responses} == {200}
+    assert sum(not r.json()["duplicate"] for r in responses) == 1
+    # 訂單在背景 processor 跑之前不會被動到
+    assert _status(session_factory, oid) == "pending"
+
+    _send(client, "evt_other", "payment.succeeded", oid, 500)  # 金流對同一筆付款另發的事件
+    assert payment_service.drain(session_factory) == {"applied": 1, "ignored": 1}
+    assert payment_service.drain(session_factory) == {}
+    assert _status(session_factory, oid) == "paid"
+
+
+def test_mismatches_fail_and_refund_cancels_with_restock(client, session_factory):
+    pid = add_product(session_factory, stock_qty=5, price=100, shipping=[("post", 60)])
+    oid = client.post("/orders", json=order_payload([(pid, 2)])).json()["order_id"]
+    cancelled = add_order(session_factory, total_amount=100, status="cancelled")
+
+    _send(client, "evt_short", "payment.succeeded", oid, 1)
+    _send(client, "evt_late", "payment.succeeded", cancelled, 100)
+    _send(client, "evt_ok", "payment.succeeded", oid, 260)
+    _send(client, "evt_refund", "payment.refunded", oid, 260)
+    assert payment_service.drain(session_factory) == {"failed": 2, "applied": 2}
+
+    with session_factory() as db:
+        results = dict(db.query(PaymentEvent.event_id, PaymentEvent.result))
+        assert results["evt_short"].startswith("amount mismatch")
+        assert results["evt_late"] == "order is cancelled"
+        assert db.get(Order, oid).status == "cancelled"
+        assert db.get(Product, pid).stock_qty == 5
+
+
+def test_webhook_is_closed_without_secret(client, monkeypatch):
+    monkeypatch.setattr(settings, "payment_webhook_secret", None)
+    assert _send(client, "evt", "payment.succeeded", 1, 1).status_code == 503
@@ -0,0 +1,78 @@
+# backend/tests/test_product_import_export.py
+import json
+
+from app.models.category import Category
+from app.models.product import Product
+
+from .conftest import add_product
+
+
+def _category(factory, name="杯子") -> int:
+    with factory() as db:
+        c = Category(name=name)
+        db.add(c)
+        db.commit()
+        return c.id
+
+
+def test_csv_import_creates_updates_and_reports_bad_rows(client, session_factory, admin_headers):
+    cid = _category(session_factory)
+    pid = add_product(session_factory, name="舊名字", price=100, stock_qty=1)
+    body = (
+        "id,name,category,price,stock_qty,shipping_options\n"
+        ",白兔馬克杯,杯子,350,5,post:60;cvs_711:45\n"
+        f"{pid},新名字,,120,,\n"
+        ",沒有價格,,,1,\n"
+        ",分類不存在,碗,10,1,\n"
+        "99999,找不到,,10,1,\n"
+    )
+
+    r = client.post(
+        "/admin/products/import",
+        content=body.encode(),
+        headers={**admin_headers, "Content-Type": "text/csv"},
+        params={"batch_size": 2},
+    )
+
+    assert r.status_code == 200
+    report = r.json()
+    assert (report["created"], report["updated"], report["failed"]) == (1, 1, 3)
+    assert [e["row"] for e in report["errors"]] == [4, 5, 6]
+
+    with session_factory() as db:
+        mug = db.query(Product).filter(Product.name == "白兔馬克杯").one()
+        assert mug.category_id == cid
+        assert {(o.method, o.fee) for o in mug.shipping_options} == {("post", 60), ("cvs_711", 45)}
+        old = db.get(Product, pid)
+        assert (old.name, old.price, old.stock_qty, len(old.shipping_options)) == ("新名字", 120, 1, 2)
+
+    # 匯入的商品馬上搜得到
+    assert [p["name"] for p in client.get("/products/search", params={"q": "馬克杯"}).json()] == ["白兔馬克杯"]
+
+
+def test_export_round_trips_through_import(client, session_factory, admin_headers):
+    for i in range(5):
+        add_product(session_factory, name=f"商品 {i}", description="有\n換行, 跟逗號")
+
+    for fmt in ("csv", "jsonl"):
+        exported = client.get("/admin/products/export", params={"format": fmt}, headers=admin_headers)
+        assert exported.status_code == 200
+
+        r = client.post(
+            "/admin/products/import",
+            content=exported.content,
+            headers=admin_headers,
+            params={"format": fmt},
+        )
+        assert r.json() == {"created": 0, "updated": 5, "failed": 0, "errors": []}
+
+    lines = client.get("/admin/products/export", params={"format": "jsonl"}, headers=admin_headers).text.splitlines()
+    first = json.loads(lines[0])
+    assert first["description"] == "有\n換行, 跟逗號"
+    assert [o["method"] for o in first["shipping_options"]] == ["post", "cvs_711"]
+
+
+def test_import_requires_admin_and_known_format(client, admin_headers):
+    assert client.post("/admin/products/import", content=b"").status_code in (401, 403)
+    r = client.post("/admin/products/import", content=b"x", headers=admin_headers)
+    assert r.status_code == 400
@@ -0,0 +1,64 @@
+# backend/tests/test_product_search.py
+from app.services.search_service import tokenize
+
+
+def _create(client, admin_headers, **kw) -> int:
+    body = {"name": "商品", "stock_qty": 5, "price": 100, **kw}
+    r = client.post("/admin/products", json=body, headers=admin_headers)
+    assert r.status_code == 200, r.text
+    return r.json()["id"]
+
+
+def _names(client, q: str, **params) -> list[str]:
+    r = client.get("/products/search", params={"q": q, **params})
+    assert r.status_code == 200, r.text
+    return [p["name"] for p in r.json()]
+
+
+def test_tokenize_cjk_bigrams_and_words():
+    assert tokenize("白兔馬克杯 Mug-2024") == ["白兔", "兔馬", "馬克", "克杯", "杯", "mug", "2024"]
+
+
+def test_search_ranks_name_matches_first(client, admin_headers):
+    _create(client, admin_headers, name="手工木盤", description="適合搭配馬克杯")
+    _create(client, admin_headers, name="白兔馬克杯", description="陶瓷")
+    _create(client, admin_headers, name="保溫瓶", description_text="<p>不是杯子</p>")
+
+    assert _names(client, "馬克杯") == ["白兔馬克杯", "手工木盤"]
+    assert _names(client, "兔") == ["白兔馬克杯"]          # 單字
+    assert _names(client, "杯子") == ["保溫瓶"]            # 長描述（HTML 去掉標籤）
+    assert _names(client, "白兔 陶瓷") == ["白兔馬克杯"]    # 多個詞 = AND
+    assert _names(client, "克馬") == []
+
+
+def test_search_follows_admin_updates_and_deletes(client, admin_headers):
+    pid = _create(client, admin_headers, name="Blue Mug")
+    hidden = _create(client, admin_headers, name="Blue Mug 2", is_active=False)
+    assert _names(client, "mu") == ["Blue Mug"]  # 英文 prefix；下架的不出現
+    assert hidden
+
+    r = client.patch(f"/admin/products/{pid}", json={"name": "綠色水壺"}, headers=admin_headers)
+    assert r.status_code == 200
+    assert _names(client, "mug") == []
+    assert _names(client, "水壺") == ["綠色水壺"]
+
+    assert client.delete(f"/admin/products/{pid}", headers=admin_headers).status_code == 200
+    assert _names(client, "水壺") == []
+
+
+def test_search_pagination(client, admin_headers):
+    for i in range(5):
+        _create(client, admin_headers, name=f"貼紙 {i}")
+
+    seen: list[str] = []
+    cursor = None
+    while True:
+        params = {"q": "貼紙", "limit": 2, **({"cursor": cursor} if cursor else {})}
+        r = client.get("/products/search", params=params)
+        seen += [p["name"] for p in r.json()]
+        cursor = r.headers.get("X-Next-Cursor")
+        if not cursor:
+            break
+    assert sorted(seen) == [f"貼紙 {i}" for i in range(5)]
+
+    assert client.get("/products/search", params={"q": "貼紙", "cursor": "bad"}).status_code == 400
@@ -0,0 +1,104 @@
+# backend/tests/test_products_listing.py
+from .conftest import add_product
+
+
+def _walk(client, **params) -> list[dict]:
+    out: list[dict] = []
+    cursor = None
+    while True:
+        q = dict(params, **({"cursor": cursor} if cursor else {}))
+        r = client.get("/products", params=q)
+        assert r.status_code == 200
+        out += r.json()
+        cursor = r.headers.get("x-next-cursor")
+        if not cursor:
+            return out
+
+
+def test_unpaginated_listing_unchanged(client, session_factory):
+    ids = [add_product(session_factory, name=f"p{i}") for i in range(3)]
+    add_product(session_factory, name="下架", is_active=False)
+
+    r = client.get("/products")
+    assert [p["id"] for p in r.json()] == ids
+    assert "x-next-cursor" not in r.headers
+
+
+def test_keyset_pages_cover_everything_once(client, session_factory):
+    ids = [add_product(session_factory, name=f"p{i}", price=(i * 37) % 11) for i in range(13)]
+
+    assert [p["id"] for p in _walk(client, limit=4)] == ids
+    assert [p["id"] for p in _walk(client, limit=4, sort="-id")] == ids[::-1]
+
+    by_price = _walk(client, limit=3, sort="price")
+    assert len(by_price) == 13
+    assert [(p["price"], p["id"]) for p in by_price] == sorted((p["price"], p["id"]) for p in by_price)
+
+    by_price_desc = _walk(client, limit=5, sort="-price")
+    assert [p["id"] for p in by_price_desc] == [p["id"] for p in by_price][::-1]
+
+
+def test_category_and_price_filters(client, session_factory):
+    from app.models.category import Category
+
+    with session_factory() as db:
+        db.add_all([Category(id=1, name="A"), Category(id=2, name="B")])
+        db.commit()
+
+    add_product(session_factory, name="a-cheap", category_id=1, price=50)
+    add_product(session_factory, name="a-mid", category_id=1, price=150)
+    add_product(session_factory, name="b-mid", category_id=2, price=150)
+
+    r = client.get("/products", params={"category_id": 1, "min_price": 100, "max_price": 200})
+    assert [p["name"] for p in r.json()] == ["a-mid"]
+
+
+def test_cursor_for_other_sort_rejected(client, session_factory):
+    for i in range(3):
+        add_product(session_factory, name=f"p{i}")
+    cursor = client.get("/products", params={"limit": 1}).headers["x-next-cursor"]
+
+    assert client.get("/products", params={"sort": "price", "cursor": cursor}).status_code == 400
+    assert client.get("/products", params={"cursor": "not-a-cursor"}).status_code == 400
+
+
+def test_malformed_cursors_rejected(client, session_factory):
+    import base64
+    import json
+
+    def enc(value) -> str:
+        return base64.urlsafe_b64encode(json.dumps(value).encode()).decode().rstrip("=")
+
+    add_product(session_factory, name="p")
+    for cursor in (enc(1), enc(["id"]), enc(["price", 1]), enc(["id", True]), enc({"id": 1})):
+        assert client.get("/products", params={"cursor": cursor}).status_code == 400
+        assert client.get("/products", params={"cursor": cursor, "sort": "price"}).status_code == 400
+    for cursor in (enc(1), enc(["rank"]), enc(["rank", 1, 2])):
+        assert client.get("/products/search", params={"q": "p", "cursor": cursor}).status_code == 400
+
+
+def test_list_serialization_runs_off_the_event_loop(client, session_factory, monkeypatch):
+    import asyncio
+    import threading
+
+    from app.routers import products
+
+    add_product(session_factory, name="p")
+    threads = {}
+    real_options, real_dump = products.product_options, products._dump_public
+
+    def options(db, ids):
+        asyncio.get_running_loop()  # run_sync 在 event loop 的 thread 上跑
+        threads["query"] = threading.get_ident()
+        return real_options(db, ids)
+
+    def dump(rows, opts):
+        threads["dump"] = threading.get_ident()
+        return real_dump(rows, opts)
+
+    monkeypatch.setattr(products, "product_options", options)
+    monkeypatch.setattr(products, "_dump_public", dump)
+    for path in ("/products", "/products/search?q=p"):
+        threads.clear()
+        assert client.get(path).status_code == 200
+        assert threads["dump"] != threads["query"]
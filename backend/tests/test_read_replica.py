@@ -0,0 +1,113 @@
+# backend/tests/test_read_replica.py
+"""
+主庫 + 唯讀副本：用兩個互不同步的 DB 模擬「副本還沒追上」。
+- SQLite：兩個檔案，一定會跑
+- Postgres：設定 TEST_POSTGRES_URL + TEST_POSTGRES_REPLICA_URL（兩個獨立的 DB）才跑
+"""
+import os
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import sessionmaker
+
+from app.db import (
+    READ_PIN_HEADER,
+    Base,
+    async_read_session_dependency,
+    get_async_read_db,
+    get_read_db,
+    read_session_dependency,
+)
+from app.main import app
+from app.services.catalog_cache import catalog_cache
+
+from .conftest import add_product, bind_app, make_async_sessions, make_engine, order_payload
+
+
+@pytest.fixture(params=["sqlite", "postgres"])
+def routed(request, tmp_path):
+    if request.param == "postgres":
+        primary_url = os.getenv("TEST_POSTGRES_URL")
+        replica_url = os.getenv("TEST_POSTGRES_REPLICA_URL")
+        if not (primary_url and replica_url):
+            pytest.skip("TEST_POSTGRES_URL / TEST_POSTGRES_REPLICA_URL not set")
+    else:
+        primary_url = f"sqlite:///{tmp_path / 'primary.db'}"
+        replica_url = f"sqlite:///{tmp_path / 'replica.db'}"
+
+    primary = make_engine(primary_url)
+    replica = make_engine(replica_url)
+    primary_factory = bind_app(primary)
+    Base.metadata.drop_all(bind=replica)
+    Base.metadata.create_all(bind=replica)
+    replica_factory = sessionmaker(bind=replica, autocommit=False, autoflush=False)
+
+    app.dependency_overrides[get_read_db] = read_session_dependency(
+        primary_factory, replica_factory, lagging=True
+    )
+    app.dependency_overrides[get_async_read_db] = async_read_session_dependency(
+        make_async_sessions(primary), make_async_sessions(replica), lagging=True
+    )
+    yield primary_factory, replica_factory
+    app.dependency_overrides.clear()
+    primary.dispose()
+    replica.dispose()
+
+
+def test_storefront_reads_go_to_replica(routed):
+    primary_factory, replica_factory = routed
+    add_product(primary_factory, name="只在主庫")
+    add_product(replica_factory, name="副本")
+
+    client = TestClient(app)
+    assert [p["name"] for p in client.get("/products").json()] == ["副本"]
+    assert client.get("/categories").json() == []
+
+
+def test_admin_edit_reads_own_write_then_returns_to_replica(routed, admin_headers):
+    primary_factory, replica_factory = routed
+    pid = add_product(primary_factory, name="兔兔", price=100)
+    client = TestClient(app)
+    assert client.get(f"/products/{pid}").status_code == 404  # 副本還沒有
+
+    r = client.patch(f"/admin/products/{pid}", json={"price": 120}, headers=admin_headers)
+    assert r.status_code == 200
+    pin = {READ_PIN_HEADER: r.headers[READ_PIN_HEADER]}
+
+    # 剛改完的這個 client（帶回 pin）：讀主庫，看得到自己的修改
+    assert client.get(f"/products/{pid}", headers=pin).json()["price"] == 120
+    assert [p["price"] for p in client.get("/admin/products", headers={**admin_headers, **pin}).json()] == [120]
+
+    # 其他 client（沒有 pin）照樣走副本：一次後台修改不會把整個行程的讀取都導到主庫
+    catalog_cache.clear()
+    assert client.get(f"/products/{pid}").status_code == 404
+    assert client.get("/products").json() == []
+
+    # 偽造 / 過期的 pin 不算
+    until, _, sig = pin[READ_PIN_HEADER].partition(".")
+    for bad in (f"{int(until) + 60}.{sig}", f"{until}.{'0' * len(sig)}", f"1.{sig}", "junk"):
+        assert client.get(f"/products/{pid}", headers={READ_PIN_HEADER: bad}).status_code == 404
+
+
+def test_pinned_read_skips_stale_cache(routed, admin_headers):
+    primary_factory, replica_factory = routed
+    add_product(replica_factory, name="舊名")  # 副本還停在舊資料
+    pid = add_product(primary_factory, name="新名")
+    client = TestClient(app)
+    assert [p["name"] for p in client.get("/products").json()] == ["舊名"]  # 快取裡是副本的內容
+
+    r = client.patch(f"/admin/products/{pid}", json={"price": 120}, headers=admin_headers)
+    client.get("/products")  # 別的買家在失效後從副本重建快取
+    pinned = client.get("/products", headers={READ_PIN_HEADER: r.headers[READ_PIN_HEADER]})
+    assert [p["name"] for p in pinned.json()] == ["新名"]
+
+
+def test_order_lookup_uses_primary(routed):
+    primary_factory, _ = routed
+    pid = add_product(primary_factory)
+    client = TestClient(app)
+    r = client.post("/orders", json=order_payload([(pid, 1)]))
+    assert r.status_code == 200, r.text
+    oid = r.json()["order_id"]
+    assert client.get(f"/orders/{oid}").status_code == 200
+
@@ -0,0 +1,52 @@
+# backend/tests/test_shipping_service.py
+import pytest
+from pydantic import ValidationError
+
+from app.config import Settings
+from app.services.shipping_service import shipping_engine
+
+from .conftest import add_product, order_payload
+
+
+def test_intersection_and_fee_rules(session_factory):
+    a = add_product(session_factory, shipping=[("post", 60), ("cvs_711", 45), ("courier", 100)])
+    b = add_product(session_factory, shipping=[("post", 80), ("courier", 120)])
+    c = add_product(session_factory, shipping=[])
+
+    with session_factory() as db:
+        assert shipping_engine.quote(db, [a, b], rule="max").methods == {"post": 80, "courier": 120}
+        assert shipping_engine.quote(db, [a, b], rule="sum").methods == {"post": 140, "courier": 220}
+        assert shipping_engine.quote(db, [a, c]).methods == {}
+        assert shipping_engine.quote(db, []).methods == {}
+
+
+def test_checkout_charges_fee_and_rejects_unsupported_method(client, session_factory):
+    a = add_product(session_factory, price=100, shipping=[("post", 60), ("cvs_711", 45)])
+    b = add_product(session_factory, price=200, shipping=[("post", 80)])
+
+    r = client.post("/orders", json=order_payload([(a, 1), (b, 1)]))
+    assert r.status_code == 200, r.text
+    assert r.json()["total_amount"] == 380
+    assert r.json()["shipping_fee"] == 80
+
+    r = client.post("/orders", json=order_payload([(a, 1), (b, 1)], shipping_method="cvs_711", cvs_store_name="門市"))
+    assert r.status_code == 400
+    assert "Shipping method not available" in r.json()["detail"]
+
+
+def test_admin_edit_refreshes_cached_methods(client, session_factory, admin_headers):
+    pid = add_product(session_factory, shipping=[("post", 60)])
+    assert client.get("/products").json()[0]["shipping_options"][0]["fee"] == 60
+
+    r = client.patch(f"/admin/products/{pid}", headers=admin_headers,
+                     json={"shipping_options": [{"method": "cvs_711", "fee": 45}]})
+    assert r.status_code == 200
+
+    assert [o["method"] for o in client.get("/products").json()[0]["shipping_options"]] == ["cvs_711"]
+    r = client.post("/orders", json=order_payload([(pid, 1)]))  # post 已經不能用
+    assert r.status_code == 400
+
+
+def test_unknown_fee_rule_rejected_at_startup():
+    with pytest.raises(ValidationError):
+        Settings(shipping_fee_rule="avg")
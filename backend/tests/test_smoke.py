@@ -0,0 +1,27 @@
+# backend/tests/test_smoke.py
+
+
+def test_health(client):
+    r = client.get("/health")
+    assert r.status_code == 200
+    assert r.json() == {"ok": True}
+
+
+def test_bench_harness_runs(tmp_path):
+    """壓測 harness 用極小資料跑一輪：確保情境都打得通（0 errors）、JSON 格式正確"""
+    import json
+
+    from bench import harness
+
+    out = tmp_path / "bench.json"
+    harness.main([
+        "--products", "20", "--orders", "30", "--duration", "0.5", "--warmup", "0",
+        "--concurrency", "4", "--out", str(out), "--quiet",
+    ])
+
+    report = json.loads(out.read_text(encoding="utf-8"))
+    res = report["results"]["sqlite"]
+    assert res["total"]["count"] > 0
+    assert res["total"]["errors"] == 0
+    assert set(res["scenarios"]) == {"browse", "detail", "order", "admin_orders"}
+    assert {"p50_ms", "p95_ms", "p99_ms", "rps"} <= set(res["total"])
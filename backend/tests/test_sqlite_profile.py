@@ -0,0 +1,32 @@
+# backend/tests/test_sqlite_profile.py
+import pytest
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+
+from app.db import Base, build_engines
+
+
+def test_production_profile_pragmas_and_pools(tmp_path):
+    writer, reader = build_engines(f"sqlite:///{tmp_path / 'prod.db'}", sqlite_production=True)
+    assert writer is not reader
+    assert writer.pool.size() == 1
+    Base.metadata.create_all(bind=writer)
+
+    with writer.begin() as conn:
+        assert conn.exec_driver_sql("PRAGMA journal_mode").scalar() == "wal"
+        assert conn.exec_driver_sql("PRAGMA synchronous").scalar() == 1  # NORMAL
+        conn.execute(text("INSERT INTO categories (name, sort_order, is_active) VALUES ('A', 0, 1)"))
+
+    with reader.connect() as conn:
+        assert conn.exec_driver_sql("PRAGMA query_only").scalar() == 1
+        assert conn.execute(text("SELECT count(*) FROM categories")).scalar() == 1
+        with pytest.raises(OperationalError):
+            conn.execute(text("INSERT INTO categories (name, sort_order, is_active) VALUES ('B', 0, 1)"))
+
+    writer.dispose()
+    reader.dispose()
+
+
+def test_default_profile_is_single_engine(tmp_path):
+    writer, reader = build_engines(f"sqlite:///{tmp_path / 'dev.db'}", sqlite_production=False)
+    assert writer is reader
@@ -0,0 +1,55 @@
+# backend/tests/test_static_uploads.py
+import gzip
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.static_uploads import IMMUTABLE, UploadsStaticFiles
+
+SHA = "ab" * 32
+
+
+def _client(tmp_path) -> TestClient:
+    app = FastAPI()
+    app.mount("/uploads", UploadsStaticFiles(directory=str(tmp_path)), name="uploads")
+    return TestClient(app)
+
+
+def test_immutable_headers_strong_etag_and_304(tmp_path):
+    (tmp_path / f"{SHA}.png").write_bytes(b"\x89PNG\r\n\x1a\n" + b"x" * 100)
+    c = _client(tmp_path)
+
+    r = c.get(f"/uploads/{SHA}.png")
+    assert r.status_code == 200
+    assert r.headers["cache-control"] == IMMUTABLE
+    assert r.headers["etag"] == f'"{SHA}"'
+    assert r.headers["content-type"] == "image/png"
+
+    r304 = c.get(f"/uploads/{SHA}.png", headers={"If-None-Match": f'"{SHA}"'})
+    assert r304.status_code == 304
+    assert r304.headers["cache-control"] == IMMUTABLE
+
+
+def test_range_request(tmp_path):
+    (tmp_path / "old-uuid-name.jpg").write_bytes(bytes(range(100)))
+    r = _client(tmp_path).get("/uploads/old-uuid-name.jpg", headers={"Range": "bytes=10-19"})
+    assert r.status_code == 206
+    assert r.content == bytes(range(10, 20))
+
+
+def test_precompressed_sibling(tmp_path):
+    svg = b"<svg xmlns='http://www.w3.org/2000/svg'></svg>" * 20
+    (tmp_path / "logo.svg").write_bytes(svg)
+    (tmp_path / "logo.svg.gz").write_bytes(gzip.compress(svg))
+    c = _client(tmp_path)
+
+    r = c.get("/uploads/logo.svg", headers={"Accept-Encoding": "gzip"})
+    assert r.headers["content-encoding"] == "gzip"
+    assert r.headers["content-type"].startswith("image/svg+xml")
+    assert r.content == svg  # httpx 會自動解壓
+
+    plain = c.get("/uploads/logo.svg", headers={"Accept-Encoding": "identity"})
+    assert "content-encoding" not in plain.headers
+
+    assert c.get("/uploads/logo.svg.gz").status_code == 404
+    assert c.get("/uploads/.upload-123.tmp").status_code == 404
@@ -0,0 +1,88 @@
+# backend/tests/test_stock_ledger.py
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import update
+
+from app.config import settings
+from app.models.product import Product
+from app.models.stock_movement import StockMovement, StockSnapshot
+from app.services import inventory_service
+
+from .conftest import order_payload
+
+
+def _create_product(client, admin_headers, stock_qty=10) -> int:
+    r = client.post(
+        "/admin/products",
+        json={"name": "帳本測試", "price": 100, "stock_qty": stock_qty, "shipping_options": [{"method": "post", "fee": 60}]},
+        headers=admin_headers,
+    )
+    assert r.status_code == 200
+    return r.json()["id"]
+
+
+def _history(client, admin_headers, pid, **params):
+    r = client.get(f"/admin/products/{pid}/stock-movements", params=params, headers=admin_headers)
+    assert r.status_code == 200
+    return r
+
+
+def test_every_stock_change_is_recorded(client, session_factory, admin_headers):
+    pid = _create_product(client, admin_headers, stock_qty=10)
+    order_id = client.post("/orders", json=order_payload([(pid, 3)])).json()["order_id"]
+    client.patch(f"/admin/products/{pid}", json={"stock_qty": 20}, headers=admin_headers)
+    client.patch(f"/admin/orders/{order_id}/status", params={"status": "cancelled"}, headers=admin_headers)
+
+    moves = _history(client, admin_headers, pid).json()
+    assert [(m["reason"], m["delta"], m["ref"]) for m in moves] == [
+        ("restock", 3, f"order:{order_id}"),
+        ("adjustment", 13, "admin"),
+        ("sale", -3, f"order:{order_id}"),
+        ("adjustment", 10, "admin"),
+    ]
+    stock = client.get(f"/admin/products/{pid}/stock", headers=admin_headers).json()
+    assert stock == {"product_id": pid, "stock_qty": 23, "ledger_qty": 23, "drift": 0}
+
+    # 取消又改回來：重新扣庫存
+    client.patch(f"/admin/orders/{order_id}/status", params={"status": "paid"}, headers=admin_headers)
+    with session_factory() as db:
+        assert db.get(Product, pid).stock_qty == 20
+
+
+def test_history_keyset_pagination(client, admin_headers):
+    pid = _create_product(client, admin_headers, stock_qty=0)
+    for qty in range(1, 6):
+        client.patch(f"/admin/products/{pid}", json={"stock_qty": qty}, headers=admin_headers)
+
+    seen, params = [], {"limit": 2}
+    while True:
+        r = _history(client, admin_headers, pid, **params)
+        seen += [m["id"] for m in r.json()]
+        if "x-next-cursor" not in r.headers:
+            break
+        params["cursor"] = r.headers["x-next-cursor"]
+    assert len(seen) == 5 and seen == sorted(seen, reverse=True)
+
+
+def test_compaction_moves_snapshot_and_prunes_old_movements(client, session_factory, admin_headers, monkeypatch):
+    pid = _create_product(client, admin_headers, stock_qty=10)
+    client.post("/orders", json=order_payload([(pid, 4)]))
+
+    with session_factory() as db:
+        # 還在 grace 內的異動不會進快照
+        assert inventory_service.compact(db) == 0
+
+        old = datetime.now(timezone.utc) - timedelta(days=40)
+        db.execute(update(StockMovement).values(created_at=old))
+        db.commit()
+        monkeypatch.setattr(settings, "stock_movement_retention_days", 30)
+        assert inventory_service.compact(db) == 1
+
+        snap = db.get(StockSnapshot, pid)
+        assert snap.qty == 6
+        assert db.query(StockMovement).count() == 0
+        assert inventory_service.ledger_stock(db, [pid]) == {pid: 6}
+
+    client.post("/orders", json=order_payload([(pid, 1)]))
+    with session_factory() as db:
+        assert inventory_service.drift(db, pid) == {"stock_qty": 5, "ledger_qty": 5, "drift": 0}
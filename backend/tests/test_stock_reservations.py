@@ -0,0 +1,76 @@
+# backend/tests/test_stock_reservations.py
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+
+from app.models.product import Product
+from app.models.stock_reservation import StockReservation
+from app.services import checkout_service, housekeeping
+
+from .conftest import add_product, order_payload
+
+
+def _reserve(client, items, token=None):
+    body = {"items": [{"product_id": pid, "qty": qty} for pid, qty in items]}
+    if token:
+        body["token"] = token
+    return client.post("/cart/reservations", json=body)
+
+
+def test_reservation_blocks_other_buyers(client, session_factory):
+    pid = add_product(session_factory, stock_qty=3)
+    assert _reserve(client, [(pid, 2)]).status_code == 200
+
+    r = client.post("/orders", json=order_payload([(pid, 2)]))
+    assert r.status_code == 400
+
+    quote = client.post("/cart/quote", json={"items": [{"product_id": pid, "qty": 1}]}).json()
+    assert quote["lines"][0]["stock_qty"] == 1
+
+
+def test_holder_order_consumes_its_hold(client, session_factory):
+    pid = add_product(session_factory, stock_qty=3)
+    token = _reserve(client, [(pid, 3)]).json()["token"]
+
+    body = order_payload([(pid, 3)])
+    body["reservation_token"] = token
+    assert client.post("/orders", json=body).status_code == 200
+
+    with session_factory() as db:
+        assert db.get(Product, pid).stock_qty == 0
+        assert db.query(StockReservation).count() == 0
+
+
+def test_same_token_replaces_and_release_frees(client, session_factory):
+    pid = add_product(session_factory, stock_qty=5)
+    token = _reserve(client, [(pid, 4)]).json()["token"]
+    # 購物車改小：同 token 整組換掉，不會跟自己的舊保留疊加
+    assert _reserve(client, [(pid, 5)], token=token).status_code == 200
+    assert _reserve(client, [(pid, 1)]).status_code == 400
+
+    assert client.delete(f"/cart/reservations/{token}").json()["released"] == 1
+    assert _reserve(client, [(pid, 5)]).status_code == 200
+
+
+def test_expired_holds_are_ignored_and_swept(client, session_factory):
+    pid = add_product(session_factory, stock_qty=2)
+    with session_factory() as db:
+        db.add(StockReservation(
+            token="stale", product_id=pid, qty=2,
+            expires_at=datetime.now(timezone.utc) - timedelta(seconds=1),
+        ))
+        db.commit()
+        assert checkout_service.available_stock(db, [pid]) == {pid: 2}
+
+    assert client.post("/orders", json=order_payload([(pid, 1)])).status_code == 200
+    assert housekeeping.run_once(session_factory)["stock_reservations"] == 1
+
+
+def test_concurrent_reservations_never_over_hold(client, session_factory):
+    pid = add_product(session_factory, stock_qty=10)
+
+    with ThreadPoolExecutor(max_workers=16) as ex:
+        responses = list(ex.map(lambda _: _reserve(client, [(pid, 1)]), range(40)))
+
+    assert sum(r.status_code == 200 for r in responses) == 10
+    with session_factory() as db:
+        assert checkout_service.available_stock(db, [pid]) == {pid: 0}
@@ -1,6 +1,7 @@
 // src/api/adminClient.ts
 import { clearAdminSession, getAdminToken } from "../utils/adminSession";
 import { API_BASE } from "./base";
+import { readPinHeaders, rememberReadPin } from "./readPin";
 
 function joinUrl(base: string, path: string) {
   const p = path.startsWith("/") ? path : `/${path}`;
@@ -12,6 +13,7 @@ function jsonHeaders(extra?: Record<string, string>) {
     Accept: "application/json",
     "Content-Type": "application/json",
     "X-Admin-Token": getAdminToken(),
+    ...readPinHeaders(),
     ...(extra || {}),
   };
 }
@@ -21,6 +23,7 @@ function authHeaders(extra?: Record<string, string>) {
   return {
     Accept: "application/json",
     "X-Admin-Token": getAdminToken(),
+    ...readPinHeaders(),
     ...(extra || {}),
   };
 }
@@ -69,6 +72,8 @@ async function parseError(res: Response): Promise<string> {
 }
 
 async function ensureOk<T>(res: Response): Promise<T> {
+  rememberReadPin(res);
+
   if (!res.ok) {
     // ✅ 401：立刻清掉管理狀態
     if (res.status === 401) {
@@ -1,5 +1,6 @@
 // src/api/client.ts
 import { API_BASE } from "./base";
+import { readPinHeaders } from "./readPin";
 
 function joinUrl(base: string, path: string) {
   const p = path.startsWith("/") ? path : `/${path}`;
@@ -46,7 +47,7 @@ export async function apiGet<T>(path: string): Promise<T> {
   console.log("GET", url);
 
   const res = await fetch(url, {
-    headers: { Accept: "application/json" },
+    headers: { Accept: "application/json", ...readPinHeaders() },
   });
 
   if (!res.ok) throw new Error(await parseError(res));
@@ -78,6 +79,7 @@ export async function apiFetch<T>(path: string, init?: RequestInit): Promise<T>
     ...init,
     headers: {
       Accept: "application/json",
+      ...readPinHeaders(),
       ...(init?.body ? { "Content-Type": "application/json" } : {}),
       ...(init?.headers || {}),
     },
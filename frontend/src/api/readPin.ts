@@ -0,0 +1,25 @@
+// src/api/readPin.ts
+// 後台寫入後，後端會回一個 X-Read-Primary（簽過名的到期時間）。
+// 之後幾秒內的 request 原樣帶回去，讀取就會走主庫，看得到自己剛改的內容（read-your-writes）。
+// ✅ 放 sessionStorage：重新整理頁面也還在；後台 / 前台兩個 client 共用
+
+const HEADER = "X-Read-Primary";
+const STORAGE_KEY = "readPrimaryPin";
+
+export function rememberReadPin(res: Response) {
+  const pin = res.headers.get(HEADER);
+  if (pin) sessionStorage.setItem(STORAGE_KEY, pin);
+}
+
+export function readPinHeaders(): Record<string, string> {
+  const pin = sessionStorage.getItem(STORAGE_KEY);
+  if (!pin) return {};
+
+  // 格式：<到期 unix 秒>.<簽章>；過期就丟掉，不再帶
+  const until = Number(pin.split(".")[0]);
+  if (!Number.isFinite(until) || until * 1000 < Date.now()) {
+    sessionStorage.removeItem(STORAGE_KEY);
+    return {};
+  }
+  return { [HEADER]: pin };
+}